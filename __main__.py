@@ -1,21 +1,34 @@
-import sys
-import pandas as pd
+import argparse
 from pipeline import run_pipeline
+from ingest import read_table
+from tracing import Trace
 
 
 def main():
-    if len(sys.argv) < 4:
-        print("Usage: python -m risk_model ds1.csv ds2.csv ds3.csv [preds.csv]")
-        return
-    ds1 = pd.read_csv(sys.argv[1])
-    ds2 = pd.read_csv(sys.argv[2])
-    ds3 = pd.read_csv(sys.argv[3])
-    preds = pd.read_csv(sys.argv[4]) if len(sys.argv) >= 5 else None
+    ap = argparse.ArgumentParser(prog="python -m risk_model")
+    ap.add_argument("ds1")
+    ap.add_argument("ds2")
+    ap.add_argument("ds3")
+    ap.add_argument("preds", nargs="?", default=None)
+    ap.add_argument("--profile", metavar="PATH", default=None,
+                    help="write the per-stage trace (time, rows, memory, warnings) to PATH as JSON")
+    ap.add_argument("--profile-alloc", action="store_true",
+                    help="also record tracemalloc peaks per stage (slow)")
+    args = ap.parse_args()
 
-    out = run_pipeline(ds1, ds2, ds3, preds)
+    ds1 = read_table(args.ds1)
+    ds2 = read_table(args.ds2)
+    ds3 = read_table(args.ds3)
+    preds = read_table(args.preds) if args.preds else None
+
+    trace = Trace(alloc=args.profile_alloc, echo=args.profile is not None)
+    out = run_pipeline(ds1, ds2, ds3, preds, trace=trace)
     out.to_csv("risk_output.csv", index=False)
     print("Saved: risk_output.csv")
+    if args.profile:
+        trace.save_json(args.profile)
+        print("Saved:", args.profile)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,43 +1,130 @@
+import os
 import numpy as np
 import pandas as pd
+from typing import Optional
 from config import THRESHOLDS
+from utils import block_positions
+
+ALERT_LABELS = np.array(["GREEN", "YELLOW", "ORANGE", "RED"], dtype=object)
 
 
 def rolling_mean(x: pd.Series, k: int) -> pd.Series:
     return x.rolling(window=k, min_periods=1).mean()
 
 
-def assign_alert(prob: pd.Series) -> pd.Series:
-    t_y, t_o, t_r, delta = THRESHOLDS["yellow"], THRESHOLDS["orange"], THRESHOLDS["red"], THRESHOLDS["delta"]
-    k = THRESHOLDS["persistence_k"]
-    pbar = rolling_mean(prob, k)
-    lbl = np.where((prob >= t_r) & (pbar >= t_r - delta), "RED",
-                   np.where(prob >= t_o, "ORANGE",
-                            np.where(prob >= t_y, "YELLOW", "GREEN")))
-    return pd.Series(lbl, index=prob.index)
+class AlertState:
+    """Per-merchant end state of assign_alert: alert level (0..3) and the last k-1 probabilities."""
 
+    def __init__(self, ids: np.ndarray, level: np.ndarray, hist: np.ndarray):
+        self.ids = np.asarray(ids, dtype=object)
+        self.level = np.asarray(level, dtype="int8")
+        self.hist = np.asarray(hist, dtype="float64")
+        self._index = pd.Index(self.ids)
 
-def _label_series(s: pd.Series, q_y=0.80, q_o=0.90, q_r=0.97) -> pd.Series:
-    y = s.quantile(q_y)
-    o = s.quantile(q_o)
-    r = s.quantile(q_r)
+    def __len__(self):
+        return len(self.ids)
 
-    def lab(v):
-        if v >= r: return "RED"
-        if v >= o: return "ORANGE"
-        if v >= y: return "YELLOW"
-        return "GREEN"
+    @classmethod
+    def empty(cls, k: int = THRESHOLDS["persistence_k"]) -> "AlertState":
+        return cls(np.array([], dtype=object), np.zeros(0, dtype="int8"), np.full((0, k - 1), np.nan))
 
-    return s.apply(lab)
+    def lookup(self, ids: np.ndarray):
+        """(level, hist) for ``ids``; merchants without state start GREEN with no history."""
+        rows = self._index.get_indexer(ids)
+        known = rows >= 0
+        level = np.zeros(len(ids), dtype="int8")
+        hist = np.full((len(ids), self.hist.shape[1]), np.nan)
+        level[known] = self.level[rows[known]]
+        hist[known] = self.hist[rows[known]]
+        return level, hist
 
+    def update(self, ids: np.ndarray, level: np.ndarray, hist: np.ndarray) -> "AlertState":
+        rows = self._index.get_indexer(ids)
+        known = rows >= 0
+        new_level = self.level.copy()
+        new_hist = self.hist.copy()
+        new_level[rows[known]] = level[known]
+        new_hist[rows[known]] = hist[known]
+        new = ~known
+        return AlertState(np.concatenate([self.ids, np.asarray(ids, dtype=object)[new]]),
+                          np.concatenate([new_level, level[new]]),
+                          np.concatenate([new_hist, hist[new]]))
 
-def assign_alert_by_quantile(df: pd.DataFrame,
-                             group_cols=None,
-                             score_col="p_final",
-                             q_y=0.80, q_o=0.90, q_r=0.97) -> pd.Series:
-    if score_col not in df.columns:
-        raise KeyError(f"score_col '{score_col}' not in DataFrame")
+    def save(self, path: str):
+        tmp = path + ".tmp.npz"
+        np.savez(tmp, ids=self.ids.astype(str), level=self.level, hist=self.hist)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "AlertState":
+        with np.load(path, allow_pickle=False) as z:
+            if z["hist"].shape[1] != THRESHOLDS["persistence_k"] - 1:
+                raise ValueError(f"alert state {path} was built with a different persistence_k")
+            return cls(z["ids"].astype(object), z["level"], z["hist"])
+
+
+def _windows(x: np.ndarray, pos: np.ndarray, hist: np.ndarray, k: int) -> np.ndarray:
+    """(n, k) trailing windows per row; lags before the block start are filled from ``hist``."""
+    lags = np.arange(k - 1, -1, -1)
+    win = np.lib.stride_tricks.sliding_window_view(np.r_[np.full(k - 1, np.nan), x], k).copy()
+    r, j = np.nonzero(lags[None, :] > pos[:, None])
+    win[r, j] = hist[r, (k - 1) + pos[r] - lags[j]]
+    return win
+
+
+def _latch(on: np.ndarray, off: np.ndarray, starts: np.ndarray, init: np.ndarray) -> np.ndarray:
+    """Hysteresis flip-flop per block: set on ``on``, reset on ``off``, otherwise hold."""
+    ev = np.where(on, 1.0, np.where(off, 0.0, np.nan))
+    ev[starts] = np.where(np.isnan(ev[starts]), init, ev[starts])
+    idx = np.where(np.isnan(ev), 0, np.arange(len(ev)))
+    return ev[np.maximum.accumulate(idx)] > 0
+
+
+def assign_alert(prob: pd.Series, ids=None, state: Optional[AlertState] = None,
+                 return_state: bool = False):
+    """Alert state machine with persistence and hysteresis, run per merchant.
+
+    ``prob`` must be sorted by merchant then month, with ``ids`` (e.g. ENCODED_MCT) aligned to
+    it; without ``ids`` the whole series is one merchant. A level is entered when prob reaches
+    its threshold (RED also needs the k-month mean >= red - delta) and left only once prob
+    drops below threshold - delta; NaN holds the previous level. ``state`` carries each
+    merchant's level and last k-1 probabilities across runs; ``return_state=True`` also
+    returns the updated AlertState.
+    """
+    t_y, t_o, t_r, delta = THRESHOLDS["yellow"], THRESHOLDS["orange"], THRESHOLDS["red"], THRESHOLDS["delta"]
+    k = THRESHOLDS["persistence_k"]
+    state = AlertState.empty(k) if state is None else state
+    if not len(prob):
+        lbl = pd.Series(np.array([], dtype=object), index=prob.index)
+        return (lbl, state) if return_state else lbl
+    p = prob.to_numpy(dtype="float64")
+    ids = np.zeros(len(p), dtype="int64") if ids is None else np.asarray(ids)
+    pos = block_positions(ids)
+    starts = np.flatnonzero(pos == 0)
+    if pd.Index(ids[starts]).has_duplicates:
+        raise ValueError("merchants split into non-adjacent blocks; sort prob by merchant then month")
+    block = np.cumsum(pos == 0) - 1
+
+    level0, hist0 = state.lookup(ids[starts])
+    win = _windows(p, pos, hist0[block], k)
+    cnt = (~np.isnan(win)).sum(axis=1)
+    pbar = np.divide(np.nansum(win, axis=1), cnt, out=np.full(len(p), np.nan), where=cnt > 0)
+
+    level = np.zeros(len(p), dtype="int8")
+    for lvl, t in ((1, t_y), (2, t_o), (3, t_r)):
+        on = p >= t
+        if lvl == 3:
+            on &= pbar >= t_r - delta
+        level += _latch(on, p < t - delta, starts, (level0 >= lvl).astype("float64"))
+
+    lbl = pd.Series(ALERT_LABELS[level], index=prob.index)
+    if not return_state:
+        return lbl
+    ends = np.r_[starts[1:] - 1, len(p) - 1]
+    return lbl, state.update(ids[starts], level[ends], win[ends, 1:])
 
+
+def resolve_group_cols(df: pd.DataFrame, group_cols=None) -> list:
     cols = []
     if group_cols:
         cols = [c for c in group_cols if c in df.columns]
@@ -55,8 +142,69 @@ def assign_alert_by_quantile(df: pd.DataFrame,
             if len(ok) == len(cand):
                 cols = ok
                 break
+    return cols
+
+
+def _label(v: np.ndarray, thr: np.ndarray) -> np.ndarray:
+    lvl = np.select([v >= thr[:, 2], v >= thr[:, 1], v >= thr[:, 0]], [3, 2, 1], 0)
+    return ALERT_LABELS[lvl]
+
+
+def _grouped_thresholds(df: pd.DataFrame, cols: list, score_col: str, qs: list):
+    """Threshold table plus each row's position in it (-1 where a group key is NaN)."""
+    if not cols:
+        thr = pd.DataFrame([df[score_col].quantile(qs).to_numpy()], columns=["yellow", "orange", "red"])
+        return thr, np.zeros(len(df), dtype="int64")
+    g = df.groupby(cols)
+    thr = g[score_col].quantile(qs).unstack()
+    thr.columns = ["yellow", "orange", "red"]
+    pos = g.ngroup().fillna(-1).to_numpy(dtype="int64")
+    return thr.reset_index(), pos
+
+
+def alert_thresholds(df: pd.DataFrame, cols: list, score_col="p_final",
+                     q_y=0.80, q_o=0.90, q_r=0.97) -> pd.DataFrame:
+    """Per-group yellow/orange/red score thresholds (one row per group of ``cols``)."""
+    return _grouped_thresholds(df, cols, score_col, [q_y, q_o, q_r])[0]
+
+
+def _broadcast(df: pd.DataFrame, thresholds: pd.DataFrame, pos: np.ndarray, score_col: str) -> pd.Series:
+    thr = thresholds[["yellow", "orange", "red"]].to_numpy(dtype="float64")
+    thr = np.vstack([thr, np.full((1, 3), np.nan)])[pos]
+    lbl = _label(df[score_col].to_numpy(dtype="float64"), thr)
+    lbl[pos < 0] = np.nan
+    return pd.Series(lbl, index=df.index)
 
+
+def apply_alert_thresholds(df: pd.DataFrame, thresholds: pd.DataFrame, cols: list,
+                           score_col="p_final") -> pd.Series:
+    """Label rows against precomputed thresholds; rows whose group has none get NaN."""
     if cols:
-        return df.groupby(cols, group_keys=False)[score_col].apply(lambda s: _label_series(s, q_y, q_o, q_r))
+        idx = pd.MultiIndex.from_frame(thresholds[cols]) if len(cols) > 1 else pd.Index(thresholds[cols[0]])
+        keys = pd.MultiIndex.from_frame(df[cols]) if len(cols) > 1 else pd.Index(df[cols[0]])
+        pos = idx.get_indexer(keys)
     else:
-        return _label_series(df[score_col], q_y, q_o, q_r)
\ No newline at end of file
+        pos = np.zeros(len(df), dtype="int64")
+    return _broadcast(df, thresholds, pos, score_col)
+
+
+def assign_alert_by_quantile(df: pd.DataFrame,
+                             group_cols=None,
+                             score_col="p_final",
+                             q_y=0.80, q_o=0.90, q_r=0.97,
+                             return_thresholds: bool = False):
+    """Label each row by its score's position among the per-group quantiles.
+
+    One groupby().quantile builds the threshold table; the same grouping's ngroup() codes
+    broadcast it back to rows, and np.select assigns the level. With
+    ``return_thresholds=True`` the table is returned as well.
+    """
+    if score_col not in df.columns:
+        raise KeyError(f"score_col '{score_col}' not in DataFrame")
+
+    cols = resolve_group_cols(df, group_cols)
+    thresholds, pos = _grouped_thresholds(df, cols, score_col, [q_y, q_o, q_r])
+    labels = _broadcast(df, thresholds, pos, score_col)
+    if return_thresholds:
+        return labels, thresholds
+    return labels
@@ -1,23 +1,250 @@
 # ===== api/cache.py - Redis 캐시 설정 =====
 import redis.asyncio as redis
-from typing import Optional
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+import asyncio
+import hashlib
 import json
+import math
+import time
+import uuid
+from collections import OrderedDict
 
 from .config import settings
+from .codec import CacheSerializer, make_serializer
 
 # Redis 클라이언트
 _redis_client: Optional[redis.Redis] = None
 
+# 다른 워커의 로컬 캐시를 무효화하는 pub/sub 채널 (메시지: "<보낸 노드 ID> <키>")
+INVALIDATION_CHANNEL = "cache:invalidate"
 
-async def init_cache():
-    """Redis 초기화"""
-    global _redis_client
+
+class LocalCache:
+    """프로세스 내 LRU + TTL 캐시. 값은 Redis에 저장하는 직렬화 형태 그대로 보관하므로
+    호출자가 꺼낸 객체를 바꿔도 캐시는 영향받지 않는다."""
+    
+    def __init__(self, maxsize: int, max_ttl: float):
+        self.maxsize = maxsize
+        self.max_ttl = max_ttl
+        self._data: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def get(self, key: str):
+        item = self._data.get(key)
+        if item is None or item[0] <= time.monotonic():
+            if item is not None:
+                del self._data[key]
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return item[1]
+    
+    def set(self, key: str, raw, ttl: Optional[float] = None):
+        ttl = self.max_ttl if ttl is None else min(ttl, self.max_ttl)
+        if self.maxsize <= 0 or ttl <= 0:
+            self._data.pop(key, None)
+            return
+        self._data[key] = (time.monotonic() + ttl, raw)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+    
+    def __contains__(self, key: str) -> bool:
+        """만료 전 항목 존재 여부 (적중/실패 집계에는 넣지 않음)"""
+        item = self._data.get(key)
+        return item is not None and item[0] > time.monotonic()
+    
+    def delete(self, key: str):
+        self._data.pop(key, None)
+    
+    def clear(self):
+        self._data.clear()
+    
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                "size": len(self._data), "maxsize": self.maxsize}
+
+
+class TieredCache:
+    """로컬 LRU/TTL 계층 + Redis. 값은 ``serializer`` (api/codec.py)로 바이트로 바꿔 저장한다.
+    쓰기/삭제는 Redis에 반영하면서 무효화 메시지를 발행하고,
+    각 워커의 리스너가 받은 키를 로컬 계층에서 지운다. Redis 조회 도중 무효화가 도착했으면
+    읽은 값은 오래됐을 수 있으므로 로컬에 채우지 않는다. 구독이 끊기면 놓친 메시지가 있을 수
+    있으므로 로컬 계층을 비운다. ``client``는 redis.asyncio 호환 객체 (테스트에서는 fakeredis),
+    None이면 로컬 계층만 사용한다."""
+    
+    def __init__(self, client=None, local: Optional[LocalCache] = None,
+                 channel: str = INVALIDATION_CHANNEL, serializer: Optional[CacheSerializer] = None):
+        self.client = client
+        self.local = local or LocalCache(settings.MODEL_CACHE_SIZE, settings.LOCAL_CACHE_TTL)
+        self.serializer = serializer or make_serializer(settings.CACHE_CODEC, settings.CACHE_COMPRESS_THRESHOLD)
+        self.channel = channel
+        self.node_id = uuid.uuid4().hex
+        self.redis_hits = 0
+        self.redis_misses = 0
+        self.redis_errors = 0
+        self.invalidations = 0
+        # Redis 조회 중인 키 -> [진행 중 조회 수, 무효화 세대]; 조회 중 세대가 바뀌었으면
+        # 읽은 값은 오래됐을 수 있으므로 로컬에 넣지 않음
+        self._fetching: Dict[str, List[int]] = {}
+        self._listener: Optional[asyncio.Task] = None
+    
+    async def get(self, key: str):
+        raw = self.local.get(key)
+        if raw is None and self.client is not None:
+            entry = self._fetching.setdefault(key, [0, 0])
+            entry[0] += 1
+            generation = entry[1]
+            try:
+                # 값과 남은 TTL을 한 번의 왕복으로
+                async with self.client.pipeline(transaction=False) as pipe:
+                    pipe.get(key)
+                    pipe.pttl(key)
+                    raw, pttl = await pipe.execute()
+            except Exception as e:
+                self.redis_errors += 1
+                print(f"Cache get error: {e}")
+                return None
+            finally:
+                entry[0] -= 1
+                if entry[0] == 0:
+                    del self._fetching[key]
+            if raw is None:
+                self.redis_misses += 1
+                return None
+            self.redis_hits += 1
+            if generation == entry[1]:
+                self.local.set(key, raw, pttl / 1000 if pttl and pttl > 0 else None)
+        if raw is None:
+            return None
+        try:
+            return self.serializer.decode(raw)
+        except Exception as e:
+            # 읽을 수 없는 값 (알 수 없는 코덱/형식)은 캐시 실패로 처리
+            self.redis_errors += 1
+            self.local.delete(key)
+            print(f"Cache decode error for {key}: {e}")
+            return None
+    
+    async def set(self, key: str, value: Any, ttl: int) -> bool:
+        raw = self.serializer.encode(value)
+        self._touch(key)
+        self.local.set(key, raw, ttl)
+        if self.client is None:
+            return True
+        try:
+            async with self.client.pipeline(transaction=False) as pipe:
+                pipe.set(key, raw, ex=ttl)
+                pipe.publish(self.channel, f"{self.node_id} {key}")
+                await pipe.execute()
+            return True
+        except Exception as e:
+            self.redis_errors += 1
+            print(f"Cache set error: {e}")
+            return False
+    
+    async def delete(self, key: str) -> bool:
+        self._touch(key)
+        self.local.delete(key)
+        if self.client is None:
+            return True
+        try:
+            async with self.client.pipeline(transaction=False) as pipe:
+                pipe.delete(key)
+                pipe.publish(self.channel, f"{self.node_id} {key}")
+                await pipe.execute()
+            return True
+        except Exception as e:
+            self.redis_errors += 1
+            print(f"Cache delete error: {e}")
+            return False
+    
+    async def exists(self, key: str) -> bool:
+        if key in self.local:
+            return True
+        if self.client is None:
+            return False
+        try:
+            return await self.client.exists(key) > 0
+        except Exception:
+            return False
+    
+    def on_invalidate(self, message):
+        if isinstance(message, bytes):
+            message = message.decode("utf-8")
+        sender, _, key = message.partition(" ")
+        if sender != self.node_id:
+            self._touch(key)
+            self.local.delete(key)
+            self.invalidations += 1
+    
+    def _touch(self, key: str):
+        entry = self._fetching.get(key)
+        if entry is not None:
+            entry[1] += 1
+    
+    def _clear_local(self):
+        for entry in self._fetching.values():
+            entry[1] += 1
+        self.local.clear()
+    
+    def start(self):
+        if self.client is not None and self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+    
+    async def stop(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+    
+    async def _listen(self):
+        while True:
+            pubsub = self.client.pubsub()
+            try:
+                await pubsub.subscribe(self.channel)
+                self._clear_local()
+                async for msg in pubsub.listen():
+                    if msg.get("type") == "message":
+                        self.on_invalidate(msg["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Cache invalidation listener error: {e}")
+                self._clear_local()
+                await asyncio.sleep(1)
+            finally:
+                close = getattr(pubsub, "aclose", None) or pubsub.reset
+                await close()
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "local": self.local.stats(),
+            "redis": {"hits": self.redis_hits, "misses": self.redis_misses, "errors": self.redis_errors,
+                      "connected": self.client is not None},
+            "invalidations_received": self.invalidations,
+        }
+
+
+_cache = TieredCache()
+
+
+async def init_cache(client=None):
+    """Redis 초기화 (``client``를 주면 그 클라이언트 사용, 예: fakeredis)"""
+    global _redis_client, _cache
     
     try:
-        _redis_client = redis.from_url(
+        # 값은 코덱이 만든 바이트 그대로 주고받음 (decode_responses 사용 안 함)
+        _redis_client = client or redis.from_url(
             settings.REDIS_URL,
-            encoding="utf-8",
-            decode_responses=True,
+            decode_responses=False,
             socket_connect_timeout=5
         )
         # 연결 테스트
@@ -26,11 +253,15 @@ async def init_cache():
     except Exception as e:
         print(f"Redis connection failed: {e}")
         _redis_client = None
+    
+    _cache = TieredCache(_redis_client)
+    _cache.start()
 
 
 async def close_cache():
     """Redis 연결 종료"""
     global _redis_client
+    await _cache.stop()
     if _redis_client:
         await _redis_client.close()
 
@@ -40,62 +271,101 @@ async def get_cache() -> Optional[redis.Redis]:
     return _redis_client
 
 
+def cache_stats() -> Dict[str, Any]:
+    """계층별 적중/실패 카운터"""
+    return _cache.stats()
+
+
 # ===== 캐시 유틸리티 함수 =====
 async def cache_get(key: str):
-    """캐시에서 데이터 가져오기"""
-    if not _redis_client:
-        return None
-    
-    try:
-        value = await _redis_client.get(key)
-        if value:
-            return json.loads(value)
-    except Exception as e:
-        print(f"Cache get error: {e}")
-    
-    return None
+    """캐시에서 데이터 가져오기 (로컬 -> Redis)"""
+    return await _cache.get(key)
 
 
 async def cache_set(key: str, value: any, ttl: int = None):
-    """캐시에 데이터 저장"""
-    if not _redis_client:
-        return False
-    
-    try:
-        ttl = ttl or settings.CACHE_TTL
-        await _redis_client.setex(
-            key,
-            ttl,
-            json.dumps(value, default=str)
-        )
-        return True
-    except Exception as e:
-        print(f"Cache set error: {e}")
-        return False
+    """캐시에 데이터 저장 (다른 워커의 로컬 사본은 무효화)"""
+    return await _cache.set(key, value, ttl or settings.CACHE_TTL)
 
 
 async def cache_delete(key: str):
     """캐시에서 데이터 삭제"""
-    if not _redis_client:
-        return False
-    
-    try:
-        await _redis_client.delete(key)
-        return True
-    except Exception as e:
-        print(f"Cache delete error: {e}")
-        return False
+    return await _cache.delete(key)
 
 
 async def cache_exists(key: str) -> bool:
     """캐시 키 존재 여부 확인"""
-    if not _redis_client:
-        return False
+    return await _cache.exists(key)
+
+
+# ===== 캐시 키 / 동시 요청 병합 =====
+CACHE_KEY_VERSION = 1
+
+
+def _canonical(value):
+    """키용 정규화: None 필드 제거, float은 repr (1 == 1.0, -0.0 == 0.0), 중첩 구조는 재귀"""
+    if isinstance(value, dict):
+        return {str(k): _canonical(v) for k, v in value.items() if v is not None}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(v) for v in value]
+    if isinstance(value, bool) or value is None or isinstance(value, str):
+        return value
+    if isinstance(value, (int, float)):
+        x = float(value)
+        if math.isnan(x) or math.isinf(x):
+            return repr(x)
+        return repr(x + 0.0)
+    return str(value)
+
+
+def make_cache_key(namespace: str, payload: Dict) -> str:
+    """워커/프로세스와 무관한 결정적 캐시 키 (정렬된 필드의 blake2b 다이제스트)"""
+    body = json.dumps(_canonical(payload), sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    digest = hashlib.blake2b(body.encode("utf-8"), digest_size=16).hexdigest()
+    return f"{namespace}:v{CACHE_KEY_VERSION}:{digest}"
+
+
+class SingleFlight:
+    """같은 키로 동시에 들어온 요청은 먼저 온 요청(leader)의 작업 하나만 실행하고 결과를 공유"""
     
-    try:
-        return await _redis_client.exists(key) > 0
-    except Exception:
-        return False
+    def __init__(self):
+        self._flights: Dict[str, asyncio.Future] = {}
+        self.leaders = 0
+        self.coalesced = 0
+    
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """``(결과, leader 여부)``; 후발 요청은 leader의 결과(또는 예외)를 그대로 받는다.
+        leader가 취소되면 대기자 중 하나가 leader를 이어받고 나머지는 그 결과를 기다린다."""
+        while True:
+            fut = self._flights.get(key)
+            if fut is None or fut.cancelled():
+                break
+            try:
+                value = await asyncio.shield(fut)
+                self.coalesced += 1
+                return value, False
+            except asyncio.CancelledError:
+                if not fut.cancelled():
+                    raise
+                # leader가 취소됨: 그새 다른 대기자가 이어받았는지 다시 확인
+        
+        fut = asyncio.get_running_loop().create_future()
+        self._flights[key] = fut
+        self.leaders += 1
+        try:
+            value = await fn()
+        except Exception as e:
+            fut.set_exception(e)
+            fut.exception()  # 기다리는 요청이 없어도 경고가 나지 않도록
+            raise
+        except BaseException:
+            fut.cancel()
+            raise
+        else:
+            fut.set_result(value)
+            return value, True
+        finally:
+            if self._flights.get(key) is fut:
+                del self._flights[key]
 
 
 # 세션 관리
@@ -0,0 +1,144 @@
+# api/codec.py - 캐시 값 직렬화 (코덱 + 선택적 압축)
+import json
+import struct
+import zlib
+from datetime import date, datetime, timedelta, timezone
+from typing import Any
+
+try:
+    import msgpack
+except ImportError:  # requirements.txt에 있지만, 없으면 JSON 코덱만 사용
+    msgpack = None
+
+_EPOCH = datetime(1970, 1, 1)
+_US = timedelta(microseconds=1)
+
+# msgpack 확장 타입 코드
+EXT_DATETIME = 1  # naive datetime: 1970-01-01 기준 마이크로초 (int64)
+EXT_DATETIME_TZ = 2  # aware datetime: UTC 마이크로초 (int64) + UTC 오프셋 초 (int32)
+EXT_DATE = 3  # date: 서수 (int32)
+
+
+class JSONCodec:
+    """기존 형식: datetime 등은 문자열이 된다 (default=str)"""
+    name = "json"
+    codec_id = 0
+
+    def dumps(self, value: Any) -> bytes:
+        return json.dumps(value, default=str, ensure_ascii=False).encode("utf-8")
+
+    def loads(self, data: bytes) -> Any:
+        return json.loads(data)
+
+
+def _msgpack_default(obj):
+    if isinstance(obj, datetime):
+        if obj.tzinfo is None:
+            return msgpack.ExtType(EXT_DATETIME, struct.pack(">q", (obj - _EPOCH) // _US))
+        off = obj.utcoffset()
+        utc = obj.astimezone(timezone.utc).replace(tzinfo=None)
+        return msgpack.ExtType(EXT_DATETIME_TZ, struct.pack(">qi", (utc - _EPOCH) // _US, int(off.total_seconds())))
+    if isinstance(obj, date):
+        return msgpack.ExtType(EXT_DATE, struct.pack(">i", obj.toordinal()))
+    if hasattr(obj, "item"):  # numpy 스칼라
+        return obj.item()
+    if isinstance(obj, tuple):
+        return list(obj)
+    return str(obj)
+
+
+def _msgpack_ext(code: int, data: bytes):
+    if code == EXT_DATETIME:
+        return _EPOCH + struct.unpack(">q", data)[0] * _US
+    if code == EXT_DATETIME_TZ:
+        us, off = struct.unpack(">qi", data)
+        return (_EPOCH + us * _US).replace(tzinfo=timezone.utc).astimezone(timezone(timedelta(seconds=off)))
+    if code == EXT_DATE:
+        return date.fromordinal(struct.unpack(">i", data)[0])
+    return msgpack.ExtType(code, data)
+
+
+class MsgpackCodec:
+    """msgpack: float는 float64 그대로, datetime/date는 확장 타입으로 정확히 왕복"""
+    name = "msgpack"
+    codec_id = 1
+
+    def __init__(self):
+        if msgpack is None:
+            raise ImportError("msgpack is not installed")
+
+    def dumps(self, value: Any) -> bytes:
+        return msgpack.packb(value, default=_msgpack_default, use_bin_type=True, datetime=False)
+
+    def loads(self, data: bytes) -> Any:
+        return msgpack.unpackb(data, ext_hook=_msgpack_ext, raw=False, strict_map_key=False)
+
+
+CODECS = {"json": JSONCodec, "msgpack": MsgpackCodec}
+
+
+def _available_codecs() -> list:
+    """CODECS 중 의존 패키지가 설치된 코덱 인스턴스 (읽기용)"""
+    out = []
+    for cls in CODECS.values():
+        try:
+            out.append(cls())
+        except ImportError:
+            continue
+    return out
+
+
+# 헤더 첫 바이트: UTF-8 텍스트(이전 형식의 JSON)의 첫 바이트가 될 수 없는 값 (msgpack에서도 미사용)
+MAGIC = 0xC1
+MAX_CODEC_ID = 0x7F
+
+
+class CacheSerializer:
+    """값 <-> Redis 바이트. 2바이트 헤더 (MAGIC, 코덱 ID << 1 | zlib 여부) 뒤에 본문.
+
+    헤더로 코덱을 고르므로 설정이 다른 워커가 쓴 값도 읽고 (CODECS의 모든 코덱), MAGIC으로
+    시작하지 않는 값 (이 형식 이전의 JSON 텍스트)은 JSON으로 읽는다. ``compress_threshold``
+    바이트 이상인 본문만 압축한다 (0이면 압축 안 함).
+    """
+
+    def __init__(self, codec=None, compress_threshold: int = 1024, level: int = 1):
+        self.codec = codec or JSONCodec()
+        self.compress_threshold = compress_threshold
+        self.level = level
+        self._by_id = {}
+        for c in [self.codec] + _available_codecs():
+            if not 0 <= c.codec_id <= MAX_CODEC_ID:
+                raise ValueError(f"codec {c.name}: id {c.codec_id} outside 0..{MAX_CODEC_ID}")
+            other = self._by_id.setdefault(c.codec_id, c)
+            if type(other) is not type(c):
+                raise ValueError(f"codecs {other.name} and {c.name} share id {c.codec_id}")
+
+    def encode(self, value: Any) -> bytes:
+        body = self.codec.dumps(value)
+        flag = 0
+        if self.compress_threshold and len(body) >= self.compress_threshold:
+            packed = zlib.compress(body, self.level)
+            if len(packed) < len(body):
+                body, flag = packed, 1
+        return bytes([MAGIC, self.codec.codec_id << 1 | flag]) + body
+
+    def decode(self, data) -> Any:
+        if isinstance(data, str) or not data or data[0] != MAGIC:
+            return json.loads(data)
+        codec = self._by_id.get(data[1] >> 1)
+        if codec is None:
+            raise ValueError(f"unknown cache codec id {data[1] >> 1}")
+        body = data[2:]
+        if data[1] & 1:
+            body = zlib.decompress(body)
+        return codec.loads(body)
+
+
+def make_serializer(name: str = "msgpack", compress_threshold: int = 1024) -> CacheSerializer:
+    """설정 이름으로 직렬화기 생성; msgpack이 없으면 JSON으로 대체"""
+    try:
+        codec = CODECS[name]()
+    except ImportError as e:
+        print(f"Cache codec {name} unavailable ({e}); using json")
+        codec = JSONCodec()
+    return CacheSerializer(codec, compress_threshold)
@@ -1,5 +1,7 @@
 # api/database.py - PostgreSQL 설정
-from typing import AsyncGenerator
+import asyncio
+import logging
+from typing import AsyncGenerator, Optional
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import declarative_base
 from sqlalchemy import Column, String, Float, DateTime, Integer, Text, JSON
@@ -7,12 +9,14 @@ from datetime import datetime
 
 from .config import settings
 
-# SQLAlchemy 엔진 생성
+logger = logging.getLogger(__name__)
+
+# SQLAlchemy 엔진 생성 (풀 크기는 서버 DB용; sqlite+aiosqlite 테스트 DB는 풀 인자를 받지 않음)
+_DATABASE_URL = settings.DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://")
 engine = create_async_engine(
-    settings.DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://"),
+    _DATABASE_URL,
     echo=settings.DEBUG,
-    pool_size=10,
-    max_overflow=20
+    **({} if _DATABASE_URL.startswith("sqlite") else {"pool_size": 10, "max_overflow": 20})
 )
 
 # 세션 팩토리
@@ -125,6 +129,24 @@ class APIUsage(Base):
     created_at = Column(DateTime, default=datetime.utcnow, index=True)
 
 
+class APIUsageRollup(Base):
+    """API 사용량 분 단위 롤업 (usage.UsageRecorder가 저장)"""
+    __tablename__ = "api_usage_rollup"
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    api_key = Column(String, index=True)
+    endpoint = Column(String, index=True)
+    minute = Column(DateTime, index=True)
+    
+    count = Column(Integer)
+    total_time = Column(Float)
+    latency_hist = Column(JSON)  # {지연 버킷 번호: 요청 수} (usage.LATENCY_EDGES)
+    status_counts = Column(JSON)  # {상태 코드: 요청 수}
+
+
+_HISTORY_COLUMNS = tuple(c.key for c in PredictionHistory.__table__.columns)
+
+
 # ===== 데이터베이스 초기화 =====
 async def init_db():
     """데이터베이스 초기화"""
@@ -149,12 +171,133 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
 # ===== 리포지토리 함수 =====
 async def save_prediction(db: AsyncSession, prediction: dict):
     """예측 결과 저장"""
-    history = PredictionHistory(**prediction)
+    history = PredictionHistory(**history_row(prediction))
     db.add(history)
     await db.commit()
     return history
 
 
+def history_row(prediction: dict) -> dict:
+    """예측 dict에서 PredictionHistory 컬럼만 추림 (explanations 등 응답 전용 키 제외)"""
+    return {k: prediction[k] for k in _HISTORY_COLUMNS if k in prediction}
+
+
+async def save_predictions(db: AsyncSession, predictions: list):
+    """예측 결과 일괄 저장 (multi-row INSERT 한 번 + commit 한 번)"""
+    from sqlalchemy import insert
+    
+    if not predictions:
+        return 0
+    await db.execute(insert(PredictionHistory), [history_row(p) for p in predictions])
+    await db.commit()
+    return len(predictions)
+
+
+_STOP = object()
+
+
+class HistoryWriter:
+    """PredictionHistory write-behind 버퍼.
+
+    요청은 행을 큐에 넣기만 하고, 백그라운드 태스크가 ``batch_rows``개가 모이거나 첫 행 이후
+    ``flush_ms``가 지나면 multi-row INSERT 한 번으로 저장한다. 큐가 가득 차면 ``submit``이
+    자리가 날 때까지 기다린다 (백프레셔). ``created_at``은 저장 시각이 아니라 ``submit`` 시각.
+    ``stop``은 남은 행을 모두 (종료 신호 뒤에 들어온 행까지) 저장한 뒤 끝난다.
+    시작 전/종료 후의 ``submit``은 바로 저장한다.
+    """
+    
+    def __init__(self, batch_rows: int = 500, flush_ms: int = 200, max_queue: int = 10000):
+        self.batch_rows = batch_rows
+        self.flush_ms = flush_ms
+        self.max_queue = max_queue
+        self.written = 0
+        self.failed = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+    
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+    
+    def start(self):
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._task = asyncio.create_task(self._run())
+    
+    async def submit(self, prediction: dict):
+        row = history_row(prediction)
+        row.setdefault("created_at", datetime.utcnow())
+        if not self.running:
+            await self._write([row])
+            return
+        await self._queue.put(row)
+    
+    async def stop(self):
+        """남은 행을 저장하고 종료 (lifespan 종료 시)"""
+        if not self.running:
+            return
+        task, queue = self._task, self._queue
+        await queue.put(_STOP)
+        self._task = None
+        await task
+        # 큐가 가득 찼을 때 put()에서 기다리던 submit은 _STOP 뒤에 들어간다: 빌 때까지 직접 저장
+        while True:
+            await asyncio.sleep(0)  # 자리가 난 대기 중 put()이 행을 넣도록
+            rows = []
+            while not queue.empty():
+                item = queue.get_nowait()
+                if item is not _STOP:
+                    rows.append(item)
+            if not rows:
+                break
+            for i in range(0, len(rows), self.batch_rows):
+                await self._write(rows[i:i + self.batch_rows])
+    
+    def pending(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+    
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            item = await self._queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            deadline = loop.time() + self.flush_ms / 1000
+            while len(batch) < self.batch_rows:
+                timeout = deadline - loop.time()
+                try:
+                    item = self._queue.get_nowait() if timeout <= 0 else await asyncio.wait_for(self._queue.get(), timeout)
+                except (asyncio.QueueEmpty, asyncio.TimeoutError):
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            await self._write(batch)
+    
+    async def _write(self, rows: list):
+        from sqlalchemy import insert
+        
+        try:
+            async with AsyncSessionLocal() as db:
+                await db.execute(insert(PredictionHistory), rows)
+                await db.commit()
+            self.written += len(rows)
+        except Exception as e:
+            self.failed += len(rows)
+            logger.error(f"Prediction history flush failed ({len(rows)} rows dropped): {e}")
+
+
+history_writer = HistoryWriter(
+    batch_rows=settings.HISTORY_FLUSH_ROWS,
+    flush_ms=settings.HISTORY_FLUSH_MS,
+    max_queue=settings.HISTORY_QUEUE_SIZE
+)
+
+
 async def get_prediction_history(
     db: AsyncSession,
     store_id: str = None,
@@ -187,24 +330,44 @@ async def get_api_usage_stats(
     api_key: str = None,
     days: int = 7
 ):
-    """API 사용 통계"""
-    from sqlalchemy import select, func
+    """API 사용 통계: 롤업 행을 엔드포인트별로 합쳐 요청 수, 평균, p50/p95/p99, 상태 코드별 수"""
+    from sqlalchemy import select
     from datetime import timedelta
+    from collections import Counter
+    from .usage import histogram_quantile
     
     cutoff = datetime.utcnow() - timedelta(days=days)
     
     query = select(
-        APIUsage.endpoint,
-        func.count(APIUsage.id).label('count'),
-        func.avg(APIUsage.response_time).label('avg_response_time')
+        APIUsageRollup.endpoint,
+        APIUsageRollup.count,
+        APIUsageRollup.total_time,
+        APIUsageRollup.latency_hist,
+        APIUsageRollup.status_counts
     ).where(
-        APIUsage.created_at >= cutoff
+        APIUsageRollup.minute >= cutoff
     )
     
     if api_key:
-        query = query.where(APIUsage.api_key == api_key)
+        query = query.where(APIUsageRollup.api_key == api_key)
     
-    query = query.group_by(APIUsage.endpoint)
+    merged = {}
+    for endpoint, count, total_time, hist, statuses in (await db.execute(query)).all():
+        m = merged.setdefault(endpoint, {"count": 0, "total_time": 0.0, "hist": Counter(), "statuses": Counter()})
+        m["count"] += count
+        m["total_time"] += total_time
+        m["hist"].update({int(k): v for k, v in (hist or {}).items()})
+        m["statuses"].update(statuses or {})
     
-    result = await db.execute(query)
-    return result.all()
\ No newline at end of file
+    return [
+        {
+            "endpoint": endpoint,
+            "count": m["count"],
+            "avg_response_time": m["total_time"] / m["count"] if m["count"] else 0.0,
+            "p50": histogram_quantile(m["hist"], 0.50),
+            "p95": histogram_quantile(m["hist"], 0.95),
+            "p99": histogram_quantile(m["hist"], 0.99),
+            "status_counts": dict(m["statuses"])
+        }
+        for endpoint, m in sorted(merged.items())
+    ]
@@ -1,7 +1,14 @@
 import os
+import logging
+import threading
+import numpy as np
 import pandas as pd
+from typing import Dict, Optional, Tuple
 
 from .config import settings
+from .snapshot import snapshot_lock, open_snapshot, write_snapshot
+
+logger = logging.getLogger(__name__)
 
 def load_risk_output():
     """위험도 출력 파일 로드"""
@@ -10,4 +17,146 @@ def load_risk_output():
         df["ENCODED_MCT"] = df["ENCODED_MCT"].astype(str)
         df["TA_YM"] = pd.to_datetime(df["TA_YM"], errors="coerce").dt.to_period("M").dt.to_timestamp()
         return df
-    return None
\ No newline at end of file
+    return None
+
+
+class RiskTable:
+    """Risk output as fixed-width column arrays sorted by (ENCODED_MCT, TA_YM), plus a merchant
+    index: sorted store IDs ``ids`` with row offsets, store k owning rows
+    ``offsets[k]:offsets[k + 1]``. A store lookup is a binary search over ``ids`` and one over
+    that store's months. The arrays are either in memory or np.memmap views of a shared
+    snapshot (api/snapshot.py). Rows without a valid month are dropped (they cannot be selected).
+    """
+
+    def __init__(self, columns: Dict[str, np.ndarray], ids: np.ndarray, offsets: np.ndarray,
+                 source_key: Optional[Tuple[int, int]] = None, mapped: bool = False):
+        # np.asarray: memmap 서브클래스 대신 같은 매핑을 가리키는 ndarray (원소 접근이 빠름)
+        self.columns = {c: np.asarray(v) for c, v in columns.items()}
+        self.ids = np.asarray(ids)
+        self.offsets = np.asarray(offsets)
+        self.months = self.columns["TA_YM"]
+        self.source_key = source_key
+        self.mapped = mapped
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, source_key: Optional[Tuple[int, int]] = None) -> "RiskTable":
+        df = df[df["TA_YM"].notna()].sort_values(["ENCODED_MCT", "TA_YM"], kind="mergesort", ignore_index=True)
+        mct = df["ENCODED_MCT"].to_numpy(dtype=str)
+        starts = np.flatnonzero(np.r_[True, mct[1:] != mct[:-1]]) if len(mct) else np.array([], dtype=np.int64)
+        offsets = np.r_[starts, len(mct)].astype(np.int64)
+        columns = {}
+        for c in df.columns:
+            if c == "ENCODED_MCT":
+                continue
+            s = df[c]
+            if c == "TA_YM":
+                columns[c] = s.to_numpy(dtype="datetime64[ns]")
+            elif s.dtype.kind in "biuf":
+                columns[c] = s.to_numpy()
+            else:
+                # 문자열 컬럼은 고정 폭 유니코드 배열로 (mmap 가능)
+                columns[c] = np.asarray(s.astype(str).where(s.notna(), ""), dtype=str)
+        return cls(columns, np.asarray(mct[starts], dtype=str), offsets, source_key)
+
+    def __len__(self) -> int:
+        return len(self.months)
+
+    def column(self, name: str) -> np.ndarray:
+        return self.columns[name]
+
+    def row(self, i: int) -> Dict:
+        out = {c: v[i] for c, v in self.columns.items()}
+        out["ENCODED_MCT"] = str(self.ids[np.searchsorted(self.offsets, i, side="right") - 1])
+        out["TA_YM"] = pd.Timestamp(self.months[i])
+        return out
+
+    def _block(self, store_id: str) -> Tuple[int, int]:
+        k = int(np.searchsorted(self.ids, store_id))
+        if k == len(self.ids) or self.ids[k] != store_id:
+            return 0, 0
+        return int(self.offsets[k]), int(self.offsets[k + 1])
+
+    def lookup(self, store_id: Optional[str], month: Optional[pd.Timestamp] = None) -> Optional[Dict]:
+        """Row of ``store_id`` at ``month`` (the latest month when None); without a store,
+        the last row of ``month`` (or of the latest month) over all stores."""
+        if store_id:
+            start, stop = self._block(str(store_id))
+        else:
+            start, stop = 0, len(self)
+        if start == stop:
+            return None
+        months = self.months[start:stop]
+        if month is None:
+            if store_id:
+                return self.row(stop - 1)
+            month = months.max()
+        elif pd.isna(month):
+            return None
+        month = np.datetime64(month, "ns")
+        if store_id:
+            i = np.searchsorted(months, month, side="right") - 1
+            return self.row(start + i) if i >= 0 and months[i] == month else None
+        hits = np.flatnonzero(months == month)
+        return self.row(hits[-1]) if len(hits) else None
+
+
+_table: Optional[RiskTable] = None
+_table_lock = threading.Lock()
+
+
+def _source_key(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def _load_table(key: Tuple[int, int]) -> Optional[RiskTable]:
+    """스냅샷이 있으면 매핑, 없으면 CSV를 한 번 파싱해 스냅샷을 쓰고 매핑 (워커 간 잠금)"""
+    root = settings.RISK_SNAPSHOT_DIR
+    if not root:
+        df = load_risk_output()
+        return RiskTable.from_frame(df, key) if df is not None else None
+    try:
+        with snapshot_lock(root):
+            snap = open_snapshot(root, key)
+            if snap is None:
+                df = load_risk_output()
+                if df is None:
+                    return None
+                t = RiskTable.from_frame(df, key)
+                del df
+                write_snapshot(root, key, t.columns, t.ids, t.offsets)
+                snap = open_snapshot(root, key)
+                if snap is None:
+                    return t
+    except OSError as e:
+        logger.warning("risk snapshot unavailable (%s); using an in-memory table", e)
+        df = load_risk_output()
+        return RiskTable.from_frame(df, key) if df is not None else None
+    return RiskTable(*snap, source_key=key, mapped=True)
+
+
+def init_risk_table() -> Optional[RiskTable]:
+    """시작 시 위험도 테이블 미리 로드 (lifespan)"""
+    table = get_risk_table()
+    if table is not None:
+        logger.info("risk table loaded: %d rows, %d stores (%s)", len(table), len(table.ids),
+                    "memory-mapped snapshot" if table.mapped else "in memory")
+    return table
+
+
+def get_risk_table() -> Optional[RiskTable]:
+    """인덱싱된 위험도 테이블; 파일이 바뀌면 (mtime/크기) 다시 로드, 파일이 없으면 None"""
+    global _table
+    key = _source_key(settings.RISK_OUTPUT_PATH)
+    if key is None:
+        return None
+    table = _table
+    if table is not None and table.source_key == key:
+        return table
+    with _table_lock:
+        if _table is None or _table.source_key != key:
+            _table = _load_table(key)
+        return _table
@@ -29,8 +29,11 @@ from .middleware import (
     TimingMiddleware,
     AuthenticationMiddleware
 )
-from .database import init_db, close_db
+from .database import init_db, close_db, history_writer
+from .usage import usage_recorder
 from .cache import init_cache, close_cache
+from .loader import init_risk_table
+from .peer_index import get_peer_index
 
 # 로깅 설정
 logging.basicConfig(
@@ -58,13 +61,20 @@ async def lifespan(app: FastAPI):
     # 시작 시
     logger.info("Starting SME Early Warning API...")
     await init_db()
+    history_writer.start()
+    usage_recorder.start()
     await init_cache()
-    logger.info("Database and cache initialized")
+    table = init_risk_table()
+    get_peer_index()
+    logger.info("Database and cache initialized; risk table: %s rows", len(table) if table is not None else "not found")
     
     yield
     
     # 종료 시
     logger.info("Shutting down SME Early Warning API...")
+    await history_writer.stop()
+    await usage_recorder.stop()
+    logger.info("Prediction history flushed: %d written, %d failed", history_writer.written, history_writer.failed)
     await close_db()
     await close_cache()
     logger.info("Cleanup completed")
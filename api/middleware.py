@@ -8,6 +8,7 @@ from fastapi.responses import JSONResponse
 from starlette.middleware.base import BaseHTTPMiddleware
 
 from .config import settings, validate_api_key
+from .usage import usage_recorder, UNMATCHED_ENDPOINT
 
 logger = logging.getLogger(__name__)
 
@@ -51,6 +52,16 @@ class TimingMiddleware(BaseHTTPMiddleware):
         process_time = time.time() - start_time
         response.headers["X-Process-Time"] = str(round(process_time, 3))
         
+        # 사용량 집계 (메모리 버킷만 갱신; DB 저장은 주기적 롤업)
+        route = request.scope.get("route")
+        api_key_info = getattr(request.state, "api_key_info", None)
+        usage_recorder.record(
+            api_key_info.get("name") if api_key_info else None,
+            getattr(route, "path", None) or UNMATCHED_ENDPOINT,
+            response.status_code,
+            process_time
+        )
+        
         # 느린 요청 경고
         if process_time > 1.0:
             logger.warning(
@@ -0,0 +1,139 @@
+# api/peer_index.py - 업종/지역/월별 동종 그룹 백분위 인덱스
+import os
+import threading
+import numpy as np
+import pandas as pd
+from typing import Dict, Optional, Tuple
+
+from .config import settings
+from .loader import RiskTable, get_risk_table
+
+INDUSTRY_COL = "HPSN_MCT_ZCD_NM"
+REGION_COL = "MCT_SIGUNGU_NM"
+QUANTILES = {"p25": 0.25, "median": 0.5, "p75": 0.75}
+
+
+def load_merchant_info() -> Optional[pd.DataFrame]:
+    """가맹점 -> 업종/지역 (ds1); 파일이 없으면 None"""
+    if not os.path.exists(settings.MERCHANT_INFO_PATH):
+        return None
+    from ingest import read_table
+    info = read_table(settings.MERCHANT_INFO_PATH)
+    return info[["ENCODED_MCT", INDUSTRY_COL, REGION_COL]].drop_duplicates("ENCODED_MCT")
+
+
+def _sorted_quantile(sv: np.ndarray, starts: np.ndarray, stops: np.ndarray, q: float) -> np.ndarray:
+    """그룹별로 정렬된 구간 [starts, stops)의 선형 보간 분위수 (빈 그룹은 NaN)"""
+    cnt = stops - starts
+    pos = starts + q * np.maximum(cnt - 1, 0)
+    lo = np.floor(pos).astype(np.int64)
+    hi = np.minimum(lo + 1, np.maximum(stops - 1, starts))
+    lo, hi = np.minimum(lo, len(sv) - 1), np.minimum(hi, len(sv) - 1)
+    out = sv[lo] + (sv[hi] - sv[lo]) * (pos - lo) if len(sv) else np.zeros(len(cnt))
+    return np.where(cnt > 0, out, np.nan)
+
+
+class PeerIndex:
+    """Sorted metric values and summary stats for every (industry, region, month) peer group.
+
+    ``region=None`` is the industry-wide group of that month. Per metric, the values of all
+    groups live in one array sorted by (group, value) with group offsets, so a group's
+    mean/median/quartiles are precomputed lookups and a user value's percentile is one binary
+    search inside the group.
+    """
+
+    def __init__(self, table: RiskTable, info: Optional[pd.DataFrame], source_key=None):
+        self.source_key = source_key
+        n_rows = len(table)
+        row_mct = np.repeat(np.arange(len(table.ids)), np.diff(table.offsets))
+        if info is not None and len(info):
+            pos = pd.Index(info["ENCODED_MCT"].astype(str)).get_indexer(table.ids)
+            ind = np.where(pos >= 0, info[INDUSTRY_COL].fillna("").to_numpy(dtype=object)[pos], "")
+            reg = np.where(pos >= 0, info[REGION_COL].fillna("").to_numpy(dtype=object)[pos], "")
+        else:
+            ind = reg = np.full(len(table.ids), "", dtype=object)
+        ind_codes, industries = pd.factorize(ind[row_mct] if n_rows else np.array([], dtype=object))
+        reg_codes, regions = pd.factorize(reg[row_mct] if n_rows else np.array([], dtype=object))
+        month_codes, months = pd.factorize(table.months)
+
+        # 지역별 그룹과 업종 전체(지역=None) 그룹을 한 번에: 행을 두 번 넣고 지역 코드 len(regions)를 "전체"로
+        all_reg = len(regions)
+        shape = (max(len(industries), 1), all_reg + 1, max(len(months), 1))
+        gid = np.r_[np.ravel_multi_index((ind_codes, reg_codes, month_codes), shape),
+                    np.ravel_multi_index((ind_codes, np.full(n_rows, all_reg), month_codes), shape)]
+        gid_codes, gids = pd.factorize(gid, sort=True)
+        self.n_groups = len(gids)
+        i, r, m = np.unravel_index(gids, shape) if len(gids) else ([], [], [])
+        self.groups: Dict[Tuple[str, Optional[str], pd.Timestamp], int] = {}
+        self.latest: Dict[Tuple[str, Optional[str]], pd.Timestamp] = {}
+        for g, (ii, rr, mm) in enumerate(zip(i, r, m)):
+            key = (industries[ii], None if rr == all_reg else regions[rr])
+            month = pd.Timestamp(months[mm])
+            self.groups[key + (month,)] = g
+            if key not in self.latest or month > self.latest[key]:
+                self.latest[key] = month
+
+        self.values, self.bounds, self.stats = {}, {}, {}
+        for metric, col in table.columns.items():
+            if col.dtype.kind not in "iuf":
+                continue
+            v = np.r_[col, col].astype(np.float64)
+            ok = ~np.isnan(v)
+            v, g = v[ok], gid_codes[ok]
+            order = np.lexsort((v, g))
+            sv = v[order]
+            bounds = np.searchsorted(g[order], np.arange(self.n_groups + 1))
+            starts, stops = bounds[:-1], bounds[1:]
+            cnt = stops - starts
+            with np.errstate(invalid="ignore", divide="ignore"):
+                mean = np.bincount(g, weights=v, minlength=self.n_groups) / cnt
+            self.values[metric], self.bounds[metric] = sv, bounds
+            self.stats[metric] = {"mean": mean, "count": cnt,
+                                  **{k: _sorted_quantile(sv, starts, stops, q) for k, q in QUANTILES.items()}}
+
+    def group(self, industry: str, region: Optional[str], month: Optional[pd.Timestamp] = None):
+        """그룹 번호와 월 (월이 없으면 그 업종/지역의 최신 월); 그룹이 없으면 (None, month)"""
+        if month is None:
+            month = self.latest.get((industry, region))
+        return self.groups.get((industry, region, month)), month
+
+    def summary(self, metric: str, g: int) -> Dict[str, Optional[float]]:
+        """그룹 통계; 값이 하나도 없으면 (count 0) 평균/분위수는 None (JSON에 NaN 불가)"""
+        st = self.stats[metric]
+        return {k: (int(v[g]) if k == "count" else float(v[g]) if np.isfinite(v[g]) else None)
+                for k, v in st.items()}
+
+    def percentile(self, metric: str, g: int, value: float) -> float:
+        """그룹 내 백분위 순위 (0~100; 같은 값은 절반만 아래로 계산)"""
+        lo, hi = self.bounds[metric][g], self.bounds[metric][g + 1]
+        peers = self.values[metric][lo:hi]
+        if not len(peers):
+            return float("nan")
+        below = np.searchsorted(peers, value, side="left")
+        upto = np.searchsorted(peers, value, side="right")
+        return float((below + upto) / 2 / len(peers) * 100)
+
+
+_index: Optional[PeerIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_peer_index() -> Optional[PeerIndex]:
+    """위험도 출력 또는 가맹점 정보 파일이 바뀌면 다시 만든다; 위험도 출력이 없으면 None"""
+    global _index
+    table = get_risk_table()
+    if table is None:
+        return None
+    try:
+        st = os.stat(settings.MERCHANT_INFO_PATH)
+        info_key = (st.st_mtime_ns, st.st_size)
+    except OSError:
+        info_key = None
+    key = (table.source_key, info_key)
+    index = _index
+    if index is not None and index.source_key == key:
+        return index
+    with _index_lock:
+        if _index is None or _index.source_key != key:
+            _index = PeerIndex(table, load_merchant_info(), key)
+        return _index
@@ -1,5 +1,5 @@
 # api/routes/admin.py - 관리자 API
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..database import get_db, get_api_usage_stats
@@ -7,6 +7,10 @@ from ..database import get_db, get_api_usage_stats
 router = APIRouter()
 
 
+def _round(seconds):
+    return round(seconds, 4) if seconds is not None else None
+
+
 @router.get("/stats")
 async def get_stats(
     days: int = 7,
@@ -19,12 +23,24 @@ async def get_stats(
             "period_days": days,
             "endpoints": [
                 {
-                    "endpoint": s.endpoint,
-                    "count": s.count,
-                    "avg_response_time": round(s.avg_response_time, 3)
+                    "endpoint": s["endpoint"],
+                    "count": s["count"],
+                    "avg_response_time": round(s["avg_response_time"], 3),
+                    "p50": _round(s["p50"]),
+                    "p95": _round(s["p95"]),
+                    "p99": _round(s["p99"]),
+                    "status_counts": s["status_counts"]
                 }
                 for s in stats
             ]
         }
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/cache")
+async def get_cache_stats():
+    """캐시 계층별 적중/실패 통계 (이 워커 기준)"""
+    from ..cache import cache_stats
+    
+    return cache_stats()
@@ -1,6 +1,7 @@
 # api/routes/analysis.py - 분석 API
-from fastapi import APIRouter
-from pydantic import BaseModel
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel, Field
+from typing import Optional
 
 router = APIRouter()
 
@@ -8,6 +9,9 @@ class BenchmarkRequest(BaseModel):
     industry_code: str
     region_code: Optional[str] = None
     metric: str = "p_final"
+    target_month: Optional[str] = Field(None, description="YYYY-MM (없으면 최신 월)")
+    value: Optional[float] = Field(None, description="백분위를 구할 사용자 값")
+    store_id: Optional[str] = Field(None, description="value가 없을 때 이 매장의 값을 사용")
 
 
 @router.post("/benchmark")
@@ -19,8 +23,15 @@ async def benchmark(request: BenchmarkRequest):
         result = await get_benchmark(
             request.industry_code,
             request.region_code,
-            request.metric
+            request.metric,
+            value=request.value,
+            store_id=request.store_id,
+            target_month=request.target_month
         )
         return result
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
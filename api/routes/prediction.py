@@ -6,11 +6,15 @@ from typing import Optional, List, Dict
 from datetime import datetime
 import uuid
 
-from ..database import get_db, save_prediction
-from ..cache import cache_get, cache_set
+from ..database import get_db, save_predictions, history_writer
+from ..cache import cache_get, cache_set, make_cache_key, SingleFlight
+from ..schemas import BatchAnalysisRequest, BatchAnalysisResponse
 
 router = APIRouter()
 
+# quickscore 캐시 키별 진행 중인 스코어링 (워커 내 동시 요청 병합)
+quickscore_flights = SingleFlight()
+
 
 class PredictRequest(BaseModel):
     store_id: Optional[str] = None
@@ -41,36 +45,43 @@ class PredictResponse(BaseModel):
 @router.post("/quickscore", response_model=PredictResponse)
 async def quick_score(
     request: PredictRequest,
-    req: Request,
-    db: AsyncSession = Depends(get_db)
+    req: Request
 ):
     """즉시 위험도 스코어링"""
     from ..service.prediction import quickscore, generate_recommendations
     
     try:
-        # 캐시 키 생성 (동일한 입력에 대해 캐싱)
-        cache_key = f"quickscore:{hash(str(request.dict()))}"
-        cached = await cache_get(cache_key)
-        
-        if cached:
-            return PredictResponse(**cached)
+        # 캐시 키 생성 (정규화된 입력의 다이제스트: 모든 워커에서 같은 키)
+        payload = request.dict()
+        cache_key = make_cache_key("quickscore", payload)
         
-        # 스코어링
-        result = quickscore(request.dict())
-        result["recommendations"] = generate_recommendations(result)
-        
-        # ID 및 타임스탬프 추가
-        prediction_id = str(uuid.uuid4())
-        result["id"] = prediction_id
-        result["timestamp"] = datetime.utcnow()
+        async def score():
+            cached = await cache_get(cache_key)
+            if cached:
+                return cached, True
+            
+            # 스코어링
+            result = quickscore(payload)
+            result["recommendations"] = generate_recommendations(result)
+            
+            # ID 및 타임스탬프 추가
+            result["id"] = str(uuid.uuid4())
+            result["timestamp"] = datetime.utcnow()
+            
+            # 캐시 저장 (5분)
+            await cache_set(cache_key, result, ttl=300)
+            return result, False
         
-        # 캐시 저장 (5분)
-        await cache_set(cache_key, result, ttl=300)
+        # 동일한 동시 요청은 한 번만 스코어링 (나머지는 캐시 적중처럼 같은 결과를 받음)
+        (result, from_cache), leader = await quickscore_flights.do(cache_key, score)
+        if from_cache or not leader:
+            return PredictResponse(**result)
+        prediction_id = result["id"]
         
-        # DB 저장 (비동기)
-        await save_prediction(db, {
+        # DB 저장 (write-behind: 요청 경로에서는 큐에만 넣음)
+        await history_writer.submit({
             "id": prediction_id,
-            **request.dict(),
+            **payload,
             **result,
             "api_key": req.state.api_key_info.get("name") if hasattr(req.state, "api_key_info") else None,
             "ip_address": req.client.host if req.client else None,
@@ -86,8 +97,7 @@ async def quick_score(
 @router.post("/model", response_model=PredictResponse)
 async def model_predict(
     request: PredictRequest,
-    req: Request,
-    db: AsyncSession = Depends(get_db)
+    req: Request
 ):
     """ML 모델 기반 예측"""
     from ..service.prediction import predict_batch, quickscore, generate_recommendations
@@ -110,8 +120,8 @@ async def model_predict(
         result["id"] = prediction_id
         result["timestamp"] = datetime.utcnow()
         
-        # DB 저장
-        await save_prediction(db, {
+        # DB 저장 (write-behind)
+        await history_writer.submit({
             "id": prediction_id,
             **request.dict(),
             **result,
@@ -127,6 +137,45 @@ async def model_predict(
         raise HTTPException(status_code=500, detail=f"예측 실패: {str(e)}")
 
 
+@router.post("/batch", response_model=BatchAnalysisResponse)
+async def batch_score(
+    request: BatchAnalysisRequest,
+    req: Request,
+    db: AsyncSession = Depends(get_db)
+):
+    """여러 매장 일괄 스코어링 (배열 연산 + 이력 일괄 저장)"""
+    from ..service.prediction import quickscore_batch, generate_recommendations, summarize_batch, HIGH_RISK_ALERTS
+    
+    try:
+        payloads = [s.dict() for s in request.stores]
+        results = quickscore_batch(payloads)
+        
+        # 단건 요청 이력과 같은 필드 (created_at은 요청 시각)
+        request_meta = {
+            "api_key": req.state.api_key_info.get("name") if hasattr(req.state, "api_key_info") else None,
+            "ip_address": req.client.host if req.client else None,
+            "user_agent": req.headers.get("user-agent"),
+        }
+        now = datetime.utcnow()
+        rows = []
+        for payload, result in zip(payloads, results):
+            result["recommendations"] = generate_recommendations(result)
+            result["id"] = str(uuid.uuid4())
+            result["timestamp"] = now
+            rows.append({**payload, **result, **request_meta, "created_at": now})
+        
+        await save_predictions(db, rows)
+        
+        return BatchAnalysisResponse(
+            results=results,
+            summary=summarize_batch(results),
+            high_risk_stores=[r["store_id"] or f"#{i}" for i, r in enumerate(results) if r["alert"] in HIGH_RISK_ALERTS]
+        )
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"일괄 예측 실패: {str(e)}")
+
+
 @router.get("/history/{store_id}")
 async def get_store_history(
     store_id: str,
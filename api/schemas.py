@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, validator
-from typing import Optional, Dict, List
+from typing import Any, Optional, Dict, List
 from datetime import datetime
 from enum import Enum
 
@@ -74,17 +74,24 @@ class BenchmarkRequest(BaseModel):
     industry_code: str
     region_code: Optional[str] = None
     metric: str = Field(default="p_final", description="비교할 지표")
+    target_month: Optional[str] = Field(None, description="YYYY-MM (없으면 최신 월)")
+    value: Optional[float] = Field(None, description="백분위를 구할 사용자 값")
+    store_id: Optional[str] = Field(None, description="value가 없을 때 이 매장의 값을 사용")
 
 
 class BenchmarkResponse(BaseModel):
     industry_code: str
     region_code: Optional[str]
     metric: str
-    user_value: float
+    target_month: str
+    user_value: Optional[float]
     industry_avg: float
     industry_median: float
-    industry_percentile: float  # 사용자가 상위 몇%인지
+    industry_25th: float
+    industry_75th: float
+    industry_percentile: Optional[float]  # 동종 그룹 내 백분위 (100에 가까울수록 상위)
     interpretation: str
+    sample_size: int
 
 
 # ============ 설명 API 스키마 ============
@@ -97,7 +104,7 @@ class ExplainResponse(BaseModel):
     component: str
     value: float
     severity: str  # Low, Medium, High, Critical
-    factors: List[Dict[str, any]]  # 구성 요소별 상세
+    factors: List[Dict[str, Any]]  # 구성 요소별 상세
     actionable_insights: List[str]  # 실행 가능한 인사이트
 
 
@@ -109,7 +116,7 @@ class ForecastRequest(BaseModel):
 
 class ForecastResponse(BaseModel):
     store_id: str
-    forecasts: List[Dict[str, any]]  # [{month, p_final, confidence_lower, confidence_upper}]
+    forecasts: List[Dict[str, Any]]  # [{month, p_final, confidence_lower, confidence_upper}]
     trend: str  # improving, stable, declining
     warnings: List[str]
 
@@ -161,12 +168,12 @@ class FeedbackResponse(BaseModel):
 
 # ============ 배치 분석 스키마 ============
 class BatchAnalysisRequest(BaseModel):
-    stores: List[PredictRequest]
+    stores: List[PredictRequest] = Field(..., max_length=10000)
 
 
 class BatchAnalysisResponse(BaseModel):
     results: List[PredictResponse]
-    summary: Dict[str, any]  # 전체 통계
+    summary: Dict[str, Any]  # 전체 통계
     high_risk_stores: List[str]  # 위험 매장 ID 목록
 
 
@@ -1,11 +1,12 @@
 # api/service/__init__.py
 from .nlp import parse_utterance
-from .prediction import quickscore, predict_batch, generate_recommendations
+from .prediction import quickscore, quickscore_batch, predict_batch, generate_recommendations
 from .analysis import get_benchmark
 
 __all__ = [
     "parse_utterance",
     "quickscore",
+    "quickscore_batch",
     "predict_batch",
     "generate_recommendations",
     "get_benchmark"
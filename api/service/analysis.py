@@ -1,23 +1,69 @@
 # api/service/analysis.py
-async def get_benchmark(industry_code: str, region_code: Optional[str], metric: str) -> Dict:
-    """벤치마크 분석"""
-    from ..loader import load_risk_output
+import math
+from typing import Optional, Dict
+
+
+def _interpret(metric: str, percentile: Optional[float]) -> str:
+    if percentile is None:
+        return "비교할 사용자 값이 없어 동종 그룹 통계만 제공합니다"
+    top = 100 - percentile
+    if top <= 10:
+        return f"{metric} 값이 동종 그룹 상위 {top:.0f}%로 매우 높은 편입니다"
+    if top <= 30:
+        return f"{metric} 값이 동종 그룹 상위 {top:.0f}%로 높은 편입니다"
+    if top >= 70:
+        return f"{metric} 값이 동종 그룹 하위 {percentile:.0f}%로 낮은 편입니다"
+    return f"{metric} 값이 동종 그룹 평균 수준입니다"
+
+
+async def get_benchmark(industry_code: str, region_code: Optional[str], metric: str,
+                        value: Optional[float] = None, store_id: Optional[str] = None,
+                        target_month: Optional[str] = None) -> Dict:
+    """벤치마크 분석: 업종/지역/월 동종 그룹의 통계와 사용자 값의 백분위"""
+    from ..loader import get_risk_table
+    from ..peer_index import get_peer_index
     import pandas as pd
     
-    df = load_risk_output()
-    if df is None:
+    index = get_peer_index()
+    if index is None:
         raise Exception("벤치마크 데이터를 로드할 수 없습니다")
+    if metric not in index.stats:
+        raise ValueError(f"지원하지 않는 지표입니다: {metric} (가능: {', '.join(index.stats)})")
     
-    # 필터링 (실제로는 더 정교하게)
-    metric_values = df[metric].dropna()
+    if value is not None and not math.isfinite(value):
+        raise ValueError(f"value는 유한한 숫자여야 합니다: {value}")
+    tm = None
+    if target_month:
+        tm = pd.to_datetime(target_month, format="%Y-%m", errors="coerce")
+        if pd.isna(tm):
+            raise ValueError(f"target_month는 YYYY-MM 형식이어야 합니다: {target_month}")
+    g, month = index.group(industry_code, region_code, tm)
+    if g is None:
+        raise LookupError(f"동종 그룹 데이터가 없습니다: {industry_code}/{region_code or '전체'}/{target_month or '최신'}")
+    
+    st = index.summary(metric, g)
+    if st["count"] == 0:
+        raise LookupError(f"동종 그룹에 {metric} 값이 없습니다: {industry_code}/{region_code or '전체'}/{month:%Y-%m}")
+    
+    # 사용자 값이 없으면 해당 매장의 같은 월 값 사용
+    if value is None and store_id:
+        row = get_risk_table().lookup(store_id, month)
+        if row is not None and pd.notna(row.get(metric)):
+            value = float(row[metric])
+    
+    percentile = index.percentile(metric, g, value) if value is not None else None
     
     return {
         "industry_code": industry_code,
         "region_code": region_code,
         "metric": metric,
-        "industry_avg": float(metric_values.mean()),
-        "industry_median": float(metric_values.median()),
-        "industry_25th": float(metric_values.quantile(0.25)),
-        "industry_75th": float(metric_values.quantile(0.75)),
-        "sample_size": len(metric_values)
+        "target_month": month.strftime("%Y-%m"),
+        "user_value": value,
+        "industry_avg": st["mean"],
+        "industry_median": st["median"],
+        "industry_25th": st["p25"],
+        "industry_75th": st["p75"],
+        "industry_percentile": percentile,
+        "interpretation": _interpret(metric, percentile),
+        "sample_size": st["count"]
     }
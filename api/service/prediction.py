@@ -106,28 +106,92 @@ def quickscore(payload: Dict) -> Dict:
     }
 
 
+def _float_array(payloads: List[Dict], key: str) -> np.ndarray:
+    return np.array([p.get(key) for p in payloads], dtype=float)  # None -> NaN
+
+
+def compute_rule_risks_batch(payloads: List[Dict]) -> Dict[str, np.ndarray]:
+    """compute_rule_risks의 배열 버전 (payload 목록 -> 컬럼별 위험도 배열, 반올림 전)"""
+    s1, s3 = _float_array(payloads, "sales_1m"), _float_array(payloads, "sales_3m_avg")
+    c1, c3 = _float_array(payloads, "cust_1m"), _float_array(payloads, "cust_3m_avg")
+    ds = _float_array(payloads, "delivery_share")
+    
+    def momentum_risk(x1, x3):
+        # 스칼라 버전의 `if x1 and x3 and x3 > 0` (None/0이면 0)
+        ok = (x1 != 0) & ~np.isnan(x1) & (x3 > 0)
+        with np.errstate(invalid="ignore"):
+            mom = (x1 - x3) / (x3 + 1e-9)
+        return np.where(ok, np.clip(-mom, 0, 1) * 0.1, 0.0)
+    
+    base = np.array([BASE_MARKET.get(p.get("industry_code"), BASE_MARKET["default"]) for p in payloads], dtype=float)
+    base += np.where(np.isnan(ds), 0.0, 0.02 * (ds - 0.5))
+    base += np.array([0.002 if (p.get("region_code") or "").endswith("구") else 0.0 for p in payloads])
+    
+    return {
+        "Sales_Risk": momentum_risk(s1, s3),
+        "Customer_Risk": momentum_risk(c1, c3),
+        "Market_Risk": np.clip(base, 0.45, 0.65),
+    }
+
+
+def quickscore_batch(payloads: List[Dict]) -> List[Dict]:
+    """quickscore의 배열 버전: 결과는 payload마다 quickscore(payload)와 같다"""
+    if not payloads:
+        return []
+    raw = compute_rule_risks_batch(payloads)
+    # 스칼라 버전과 같은 값이 되도록 반올림은 파이썬 round로
+    rc = {k: [round(float(x), 6) for x in v] for k, v in raw.items()}
+    sales, cust, market = (np.array(rc[k]) for k in ("Sales_Risk", "Customer_Risk", "Market_Risk"))
+    risk_score = ALPHA * sales + BETA * cust + GAMMA * market
+    p_final = np.clip(risk_score, 0, 1)
+    
+    out = []
+    for i, p in enumerate(payloads):
+        rc_i = {k: v[i] for k, v in rc.items()}
+        out.append({
+            "store_id": p.get("store_id"),
+            "target_month": p.get("target_month"),
+            "p_model": 0.0,
+            "risk_components": rc_i,
+            "risk_score": round(float(risk_score[i]), 6),
+            "p_final": float(p_final[i]),
+            "alert": _label_alert(p_final[i]),
+            "explanations": _explain(rc_i)
+        })
+    return out
+
+
+HIGH_RISK_ALERTS = ("ORANGE", "RED")
+
+
+def summarize_batch(results: List[Dict]) -> Dict:
+    """배치 결과 요약 통계"""
+    p = np.array([r["p_final"] for r in results], dtype=float)
+    alerts = [r["alert"] for r in results]
+    return {
+        "count": len(results),
+        "alert_counts": {a: alerts.count(a) for a in ("GREEN", "YELLOW", "ORANGE", "RED") if a in alerts},
+        "p_final_mean": float(p.mean()) if len(p) else None,
+        "p_final_max": float(p.max()) if len(p) else None,
+        "high_risk_count": sum(a in HIGH_RISK_ALERTS for a in alerts),
+    }
+
+
 def predict_batch(store_id: Optional[str], target_month: Optional[str]) -> Optional[Dict]:
     """배치 예측 (학습된 모델 사용)"""
-    from ..loader import load_risk_output
+    from ..loader import get_risk_table
     import pandas as pd
     
-    df = load_risk_output()
-    if df is None:
+    table = get_risk_table()
+    if table is None:
         return None
     
     tm = pd.to_datetime((target_month + "-01") if target_month else None, errors="coerce")
     
-    sub = df.copy()
-    if store_id:
-        sub = sub[sub["ENCODED_MCT"] == str(store_id)]
-    if tm is not None:
-        sub = sub[sub["TA_YM"] == tm]
-    
-    if sub.empty:
+    row = table.lookup(store_id, tm)
+    if row is None:
         return None
     
-    row = sub.sort_values("TA_YM").iloc[-1]
-    
     rc = {
         "Sales_Risk": float(row.get("Sales_Risk", 0.0)),
         "Customer_Risk": float(row.get("Customer_Risk", 0.0)),
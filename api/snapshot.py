@@ -0,0 +1,97 @@
+# api/snapshot.py - 워커 간 공유되는 메모리 맵 위험도 스냅샷
+import os
+import json
+import shutil
+from contextlib import contextmanager
+from typing import Dict, Tuple
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: 잠금 없이 동작 (동시 생성 시 원자적 rename으로 정리)
+    fcntl = None
+
+SNAPSHOT_VERSION = 1
+CURRENT = "CURRENT"
+
+
+def snapshot_name(source_key: Tuple[int, int]) -> str:
+    """원본 파일의 (mtime_ns, size)로 정해지는 스냅샷 디렉터리 이름"""
+    return f"v{SNAPSHOT_VERSION}-{source_key[0]}-{source_key[1]}"
+
+
+@contextmanager
+def snapshot_lock(root: str):
+    """스냅샷 생성은 한 워커만 (나머지는 기다렸다가 만들어진 것을 매핑)"""
+    os.makedirs(root, exist_ok=True)
+    with open(os.path.join(root, ".lock"), "w") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def write_snapshot(root: str, source_key: Tuple[int, int], columns: Dict[str, np.ndarray],
+                   ids: np.ndarray, offsets: np.ndarray) -> str:
+    """고정 폭 컬럼 배열(.npy)과 가맹점 오프셋 인덱스를 쓰고 CURRENT를 원자적으로 교체.
+
+    ``ids`` (정렬된 가맹점 ID)의 k번째 가맹점 행은 ``offsets[k]:offsets[k + 1]``.
+    """
+    name = snapshot_name(source_key)
+    final = os.path.join(root, name)
+    tmp = os.path.join(root, f".tmp-{name}-{os.getpid()}")
+    os.makedirs(tmp, exist_ok=True)
+    try:
+        np.save(os.path.join(tmp, "_ids.npy"), ids)
+        np.save(os.path.join(tmp, "_offsets.npy"), offsets)
+        for i, arr in enumerate(columns.values()):
+            np.save(os.path.join(tmp, f"c{i}.npy"), arr)
+        meta = {"version": SNAPSHOT_VERSION, "source": list(source_key), "rows": int(offsets[-1]),
+                "columns": list(columns)}
+        with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+        if os.path.isdir(final):
+            shutil.rmtree(tmp, ignore_errors=True)
+        else:
+            os.rename(tmp, final)
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+
+    pointer = os.path.join(root, f".{CURRENT}.{os.getpid()}")
+    with open(pointer, "w") as f:
+        f.write(name)
+    os.replace(pointer, os.path.join(root, CURRENT))
+    # 이전 스냅샷 삭제: 이미 매핑한 워커는 unlink된 파일을 계속 읽을 수 있음
+    for entry in os.listdir(root):
+        if entry.startswith("v") and entry != name:
+            shutil.rmtree(os.path.join(root, entry), ignore_errors=True)
+    return final
+
+
+def open_snapshot(root: str, source_key: Tuple[int, int]):
+    """``source_key``에 해당하는 스냅샷을 읽기 전용으로 매핑; 없거나 깨졌으면 None.
+
+    Returns ``(columns, ids, offsets)``; 모든 배열은 페이지 캐시를 공유하는 np.memmap.
+    """
+    path = os.path.join(root, snapshot_name(source_key))
+    try:
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("version") != SNAPSHOT_VERSION or tuple(meta["source"]) != tuple(source_key):
+            return None
+        # 빈 파일은 mmap 불가
+        mode = "r" if meta["rows"] > 0 else None
+        ids = np.load(os.path.join(path, "_ids.npy"), mmap_mode=mode)
+        offsets = np.load(os.path.join(path, "_offsets.npy"), mmap_mode="r")
+        columns = {c: np.load(os.path.join(path, f"c{i}.npy"), mmap_mode=mode)
+                   for i, c in enumerate(meta["columns"])}
+    except (OSError, ValueError, KeyError):
+        return None
+    if len(offsets) != len(ids) + 1 or any(len(v) != meta["rows"] for v in columns.values()):
+        return None
+    return columns, ids, offsets
@@ -0,0 +1,146 @@
+# api/usage.py - API 사용량 집계 (분 단위 롤업)
+import asyncio
+import logging
+from bisect import bisect_right
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+# 지연 시간 히스토그램 경계 (초): 1ms부터 2^(1/4)배씩 ~33s까지, 버킷 내 상대 오차 < 19%
+LATENCY_EDGES = [0.001 * 2 ** (i / 4) for i in range(61)]
+
+
+def latency_bucket(seconds: float) -> int:
+    """0: < 1ms, k: [EDGES[k-1], EDGES[k]), len(EDGES): 상한 초과"""
+    return bisect_right(LATENCY_EDGES, seconds)
+
+
+def histogram_quantile(hist: Dict[int, int], q: float) -> Optional[float]:
+    """버킷 히스토그램의 분위수 (버킷 안에서는 기하 보간)"""
+    total = sum(hist.values())
+    if total == 0:
+        return None
+    target = q * total
+    seen = 0
+    for k in sorted(hist):
+        n = hist[k]
+        if seen + n >= target:
+            if k >= len(LATENCY_EDGES):
+                return LATENCY_EDGES[-1]
+            hi = LATENCY_EDGES[k]
+            lo = LATENCY_EDGES[k - 1] if k > 0 else 0.0
+            frac = (target - seen) / n
+            return lo + (hi - lo) * frac if lo == 0.0 else lo * (hi / lo) ** frac
+        seen += n
+    return LATENCY_EDGES[-1]
+
+
+class UsageBucket:
+    """(api_key, endpoint, minute) 하나의 집계: 요청 수, 지연 합계, 히스토그램, 상태 코드별 수"""
+
+    __slots__ = ("count", "total_time", "hist", "statuses")
+
+    def __init__(self):
+        self.count = 0
+        self.total_time = 0.0
+        self.hist = Counter()
+        self.statuses = Counter()
+
+    def add(self, status_code: int, seconds: float):
+        self.count += 1
+        self.total_time += seconds
+        self.hist[latency_bucket(seconds)] += 1
+        self.statuses[status_code] += 1
+
+    def merge(self, other: "UsageBucket"):
+        self.count += other.count
+        self.total_time += other.total_time
+        self.hist.update(other.hist)
+        self.statuses.update(other.statuses)
+
+
+Key = Tuple[Optional[str], str, datetime]
+
+# 라우트에 매칭되지 않은 요청 (404 스캔 등)의 엔드포인트 이름: URL별 버킷이 끝없이 늘지 않도록
+UNMATCHED_ENDPOINT = "<unmatched>"
+
+
+class UsageRecorder:
+    """요청마다 메모리의 분 단위 버킷만 갱신하고, ``flush_seconds``마다 끝난 분의 버킷을
+    APIUsageRollup 행으로 일괄 저장한다 (종료 시에는 진행 중인 분까지). 저장에 실패한
+    버킷은 다음 주기에 다시 시도한다."""
+
+    def __init__(self, flush_seconds: int = 60):
+        self.flush_seconds = flush_seconds
+        self._buckets: Dict[Key, UsageBucket] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def record(self, api_key: Optional[str], endpoint: str, status_code: int, seconds: float,
+               now: Optional[datetime] = None):
+        minute = (now or datetime.utcnow()).replace(second=0, microsecond=0)
+        key = (api_key, endpoint, minute)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = UsageBucket()
+        bucket.add(status_code, seconds)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """주기 태스크를 멈추고 남은 버킷을 모두 저장 (lifespan 종료 시)"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush(everything=True)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_seconds)
+            await self.flush()
+
+    def _take(self, everything: bool) -> Dict[Key, UsageBucket]:
+        current = datetime.utcnow().replace(second=0, microsecond=0)
+        done = {k: b for k, b in self._buckets.items() if everything or k[2] < current}
+        for k in done:
+            del self._buckets[k]
+        return done
+
+    async def flush(self, everything: bool = False) -> int:
+        done = self._take(everything)
+        if not done:
+            return 0
+        rows = [{
+            "api_key": api_key,
+            "endpoint": endpoint,
+            "minute": minute,
+            "count": b.count,
+            "total_time": b.total_time,
+            "latency_hist": {str(k): v for k, v in b.hist.items()},
+            "status_counts": {str(k): v for k, v in b.statuses.items()},
+        } for (api_key, endpoint, minute), b in done.items()]
+        try:
+            from sqlalchemy import insert
+            from .database import AsyncSessionLocal, APIUsageRollup
+
+            async with AsyncSessionLocal() as db:
+                await db.execute(insert(APIUsageRollup), rows)
+                await db.commit()
+        except Exception as e:
+            logger.error(f"API usage flush failed ({len(rows)} buckets kept for retry): {e}")
+            for k, b in done.items():
+                self._buckets.setdefault(k, UsageBucket()).merge(b)
+            return 0
+        return len(rows)
+
+
+usage_recorder = UsageRecorder(flush_seconds=settings.USAGE_FLUSH_SECONDS)
@@ -0,0 +1,85 @@
+"""
+bench_cache_codec.py
+Usage:
+    python benchmarks/bench_cache_codec.py [--repeat 2000] [--redis-url redis://localhost:6379/15]
+Compares the cache serializers of api/codec.py on representative API cache values (a
+quickscore result, a chat session, a 1,000-store batch response): encoded size, encode and
+decode time per value (decode = CPU per cache hit) and whether the value round-trips exactly
+(JSON turns datetimes into strings). With --redis-url each encoded value is also stored and
+Redis' MEMORY USAGE reported.
+"""
+import os, sys, time, uuid, random, argparse
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from api.codec import CacheSerializer, JSONCodec, MsgpackCodec
+
+
+def _result(i: int, rng: random.Random) -> dict:
+    rc = {"Sales_Risk": round(rng.random() * 0.1, 6), "Customer_Risk": round(rng.random() * 0.1, 6),
+          "Market_Risk": round(0.45 + rng.random() * 0.2, 6)}
+    p = 0.4 * rc["Sales_Risk"] + 0.3 * rc["Customer_Risk"] + 0.3 * rc["Market_Risk"]
+    return {"id": str(uuid.UUID(int=rng.getrandbits(128))), "store_id": f"{i:010X}", "target_month": "2024-06",
+            "p_model": 0.0, "risk_components": rc, "risk_score": round(p, 6), "p_final": p, "alert": "GREEN",
+            "explanations": ["지역/업종 시장 위험도 상회"],
+            "recommendations": ["🎯 차별화: 경쟁업체와 차별화된 강점을 부각하세요", "📱 온라인 강화: 배달앱 외 자체 채널을 개발하세요"],
+            "timestamp": datetime(2024, 6, 1, 12, 0) + timedelta(microseconds=rng.getrandbits(32))}
+
+
+def payloads(seed: int = 0) -> dict:
+    rng = random.Random(seed)
+    t0 = datetime(2024, 6, 1, 9, 30, 15, 123456)
+    session = {"session_id": str(uuid.UUID(int=rng.getrandbits(128))),
+               "messages": [{"role": "user" if k % 2 == 0 else "assistant",
+                             "content": "지난달 매출이 1,200만원이고 최근 3개월 평균은 1,500만원이에요" * (1 + k % 3),
+                             "timestamp": t0 + timedelta(seconds=37 * k)} for k in range(20)],
+               "parsed_data": {"sales_1m": 12_000_000.0, "sales_3m_avg": 15_000_000.0, "industry_code": "치킨"}}
+    results = [_result(i, rng) for i in range(1000)]
+    return {"quickscore": _result(0, rng), "session": session,
+            "batch_1000": {"results": results, "summary": {"count": 1000}, "high_risk_stores": []}}
+
+
+def serializers() -> dict:
+    return {"json": CacheSerializer(JSONCodec(), 0),
+            "json+zlib": CacheSerializer(JSONCodec(), 1024),
+            "msgpack": CacheSerializer(MsgpackCodec(), 0),
+            "msgpack+zlib": CacheSerializer(MsgpackCodec(), 1024)}
+
+
+def _per_call_us(fn, arg, repeat: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn(arg)
+    return (time.perf_counter() - t0) / repeat * 1e6
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--repeat", type=int, default=2000, help="calls per timing (divided by 100 for batch_1000)")
+    ap.add_argument("--redis-url", default=None)
+    args = ap.parse_args()
+
+    client = None
+    if args.redis_url:
+        import redis
+        client = redis.Redis.from_url(args.redis_url)
+
+    print(f"{'value':>11} {'serializer':>13} {'bytes':>9} {'enc_us':>9} {'dec_us':>9} {'exact':>6}"
+          + (f" {'redis_mem':>10}" if client else ""))
+    for name, value in payloads().items():
+        repeat = max(args.repeat // 100, 10) if name == "batch_1000" else args.repeat
+        for sname, ser in serializers().items():
+            data = ser.encode(value)
+            enc = _per_call_us(ser.encode, value, repeat)
+            dec = _per_call_us(ser.decode, data, repeat)
+            line = f"{name:>11} {sname:>13} {len(data):>9,} {enc:>9.1f} {dec:>9.1f} {str(ser.decode(data) == value):>6}"
+            if client:
+                key = f"bench:codec:{name}:{sname}"
+                client.set(key, data)
+                line += f" {client.memory_usage(key):>10,}"
+                client.delete(key)
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+bench_memory.py
+Usage:
+    python benchmarks/bench_memory.py --merchants 50000 --months 24
+Peak memory of run_pipeline in the default, compact, lean and lean+compact modes. Each mode
+runs in a fresh child process; reported are the tracemalloc peak during the call (Python +
+numpy/pandas buffers), the child's max RSS net of the inputs already held in memory, and
+the peak RSS of every stage (absolute, inputs included).
+"""
+import os, sys, json, argparse, subprocess, tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pipeline import run_pipeline
+from memtrack import rss_peak_mb, reset_rss_peak
+from tracing import Trace
+from benchmarks.synthetic import make_datasets
+
+
+def _child(args):
+    ds1, ds2, ds3 = make_datasets(args.merchants, args.months, args.seed)
+    trace = Trace()
+    if args.trace:
+        tracemalloc.start()
+    reset_rss_peak()
+    rss0 = rss_peak_mb()
+    run_pipeline(ds1, ds2, ds3, compact=args.compact, lean=args.lean, trace=trace)
+    peak = tracemalloc.get_traced_memory()[1] / 2 ** 20 if args.trace else float("nan")
+    tracemalloc.stop()
+    peaks = trace.peaks()
+    rss1 = max(peaks.values())
+    print(json.dumps({"rows": len(ds2), "peak_mb": peak, "rss_mb": max(rss1 - rss0, 0), "stages": "  ".join(f"{k}={v:.0f}MB" for k, v in peaks.items())}))
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--merchants", type=int, default=20000)
+    ap.add_argument("--months", type=int, default=24)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--no-trace", dest="trace", action="store_false", help="skip tracemalloc (much faster)")
+    ap.add_argument("--compact", action="store_true", help=argparse.SUPPRESS)
+    ap.add_argument("--lean", action="store_true", help=argparse.SUPPRESS)
+    ap.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+    if args.child:
+        return _child(args)
+
+    base = [sys.executable, os.path.abspath(__file__), "--child", "--merchants", str(args.merchants),
+            "--months", str(args.months), "--seed", str(args.seed)] + ([] if args.trace else ["--no-trace"])
+    print(f"{'mode':>13} {'rows':>10} {'peak_MB':>9} {'rss_MB':>8}  stages")
+    modes = {"default": [], "compact": ["--compact"], "lean": ["--lean"], "lean+compact": ["--lean", "--compact"]}
+    for mode, flags in modes.items():
+        res = json.loads(subprocess.run(base + flags, check=True, capture_output=True, text=True).stdout.strip().splitlines()[-1])
+        print(f"{mode:>13} {res['rows']:>10} {res['peak_mb']:>9.1f} {res['rss_mb']:>8.1f}  {res['stages']}")
+
+
+if __name__ == "__main__":
+    main()
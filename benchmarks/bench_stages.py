@@ -0,0 +1,110 @@
+"""
+bench_stages.py
+Usage:
+    python benchmarks/bench_stages.py --rows 10000 100000 1000000 10000000 --months 24 --csv stages.csv
+Times every offline scoring stage on synthetic data (benchmarks/synthetic.py) for each panel
+size: load_and_join, normalize_bins, each compute_*_risk, the fused compute_risk_components,
+weighted_ensemble, Calibrator fit/transform and assign_alert_by_quantile. Each size runs in
+a fresh child process; reported per stage are wall time, throughput (ds2 rows/s) and peak
+RSS above the RSS at stage start. --csv writes the long-format table for plotting curves.
+"""
+import os, sys, json, time, argparse, subprocess
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from preprocessing import load_and_join, normalize_bins
+from risk_components import (
+    compute_sales_risk, compute_customer_risk, compute_market_risk, compute_risk_components
+)
+from ensemble import weighted_ensemble, Calibrator
+from alerting import assign_alert_by_quantile
+from pipeline import _coerce_keys, ALERT_GROUP_COLS, ALERT_QUANTILES
+from memtrack import rss_mb, rss_peak_mb, reset_rss_peak
+from benchmarks.synthetic import make_datasets, make_preds, merchants_for_rows
+
+STAGES = ["load_and_join", "normalize_bins", "compute_sales_risk", "compute_customer_risk",
+          "compute_market_risk", "compute_risk_components", "weighted_ensemble", "Calibrator",
+          "assign_alert_by_quantile"]
+
+
+def run_stages(ds1, ds2, ds3, preds, seed: int = 0) -> list:
+    n = len(ds2)
+    results = []
+
+    def timed(name, fn, *args):
+        reset_rss_peak()
+        start = rss_mb()
+        t0 = time.perf_counter()
+        out = fn(*args)
+        wall = time.perf_counter() - t0
+        results.append({"stage": name, "rows": n, "seconds": wall, "rows_per_s": n / wall if wall else float("inf"),
+                        "peak_mb": max(rss_peak_mb() - start, 0.0)})
+        return out
+
+    df = timed("load_and_join", load_and_join, ds1, ds2, ds3)
+    df = timed("normalize_bins", normalize_bins, df)
+    df = _coerce_keys(df)
+    s = timed("compute_sales_risk", compute_sales_risk, df)
+    c = timed("compute_customer_risk", compute_customer_risk, df)
+    m = timed("compute_market_risk", compute_market_risk, df)
+    del s, c, m
+    risks = timed("compute_risk_components", compute_risk_components, df)
+    del df
+
+    risks = _coerce_keys(risks).merge(_coerce_keys(preds), on=["ENCODED_MCT", "TA_YM"], how="left")
+    p_model = timed("weighted_ensemble", weighted_ensemble, risks).to_numpy()
+    y = (np.random.default_rng(seed).random(n) < p_model).astype(int)
+
+    def calibrate(p, y):
+        return Calibrator().fit(p, y).transform(p)
+
+    risks["p_final"] = timed("Calibrator", calibrate, p_model, y)
+    timed("assign_alert_by_quantile", assign_alert_by_quantile, risks, ALERT_GROUP_COLS, "p_final",
+          *ALERT_QUANTILES.values())
+    return results
+
+
+def _child(args):
+    ds1, ds2, ds3 = make_datasets(merchants_for_rows(args.child, args.months), args.months, args.seed)
+    preds = make_preds(ds2, args.seed)
+    for r in run_stages(ds1, ds2, ds3, preds, args.seed):
+        print(json.dumps(r))
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000, 10_000_000])
+    ap.add_argument("--months", type=int, default=24)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--csv", default=None)
+    ap.add_argument("--child", type=int, default=None, help=argparse.SUPPRESS)
+    args = ap.parse_args()
+    if args.child is not None:
+        return _child(args)
+
+    rows = []
+    for n in args.rows:
+        cmd = [sys.executable, os.path.abspath(__file__), "--child", str(n),
+               "--months", str(args.months), "--seed", str(args.seed)]
+        proc = subprocess.run(cmd, capture_output=True, text=True)
+        got = [json.loads(line) for line in proc.stdout.splitlines() if line.startswith("{")]
+        if proc.returncode != 0:
+            print(f"[warn] {n} rows: child exited with {proc.returncode} after {len(got)} stages "
+                  f"(out of memory?)")
+        rows.extend(got)
+    if not rows:
+        return
+    res = pd.DataFrame(rows)
+
+    for metric, fmt in (("seconds", "{:.3f}"), ("rows_per_s", "{:,.0f}"), ("peak_mb", "{:.0f}")):
+        table = res.pivot(index="stage", columns="rows", values=metric).reindex(STAGES)
+        print(f"\n{metric} by ds2 rows")
+        print(table.to_string(float_format=lambda v: fmt.format(v)))
+    if args.csv:
+        res.to_csv(args.csv, index=False)
+        print(f"\nSaved: {args.csv}")
+
+
+if __name__ == "__main__":
+    main()
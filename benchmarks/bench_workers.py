@@ -0,0 +1,39 @@
+"""
+bench_workers.py
+Usage:
+    python benchmarks/bench_workers.py --merchants 50000 --months 24 --max-workers 8
+Times run_pipeline(workers=N) for N = 1..max-workers on synthetic data and checks that
+every sharded run returns exactly the serial output.
+"""
+import os, sys, time, argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pipeline import run_pipeline
+from benchmarks.synthetic import make_datasets
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--merchants", type=int, default=20000)
+    ap.add_argument("--months", type=int, default=24)
+    ap.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    ds1, ds2, ds3 = make_datasets(args.merchants, args.months, args.seed)
+    print(f"rows={len(ds2)} cpu_count={os.cpu_count()}")
+    print(f"{'workers':>8} {'wall_s':>8} {'speedup':>8} {'identical':>10}")
+
+    serial, base = None, None
+    for w in range(1, args.max_workers + 1):
+        t0 = time.perf_counter()
+        out = run_pipeline(ds1, ds2, ds3, workers=w)
+        wall = time.perf_counter() - t0
+        if serial is None:
+            serial, base = out, wall
+        same = out.equals(serial)
+        print(f"{w:>8} {wall:>8.2f} {base / wall:>7.2f}x {str(same):>10}")
+
+
+if __name__ == "__main__":
+    main()
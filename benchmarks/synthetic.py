@@ -0,0 +1,129 @@
+"""
+synthetic.py
+Deterministic ds1/ds2/ds3 generator with the real column schema
+(bin label strings, -999999.9 sentinels, region/industry names), plus model predictions.
+
+    from benchmarks.synthetic import make_datasets, make_preds
+    ds1, ds2, ds3 = make_datasets(n_merchants=10_000, n_months=24, seed=0)
+    preds = make_preds(ds2)
+
+    python benchmarks/synthetic.py --out data/synthetic --merchants 10000 --months 24
+"""
+import os, sys, argparse
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import BIN2RANK
+
+SENTINEL = -999999.9
+BIN_COLS = ["RC_M1_SAA", "RC_M1_TO_UE_CT", "RC_M1_UE_CUS_CN", "RC_M1_AV_NP_AT", "APV_CE_RAT", "MCT_OPE_MS_CN"]
+DS2_RATIO_COLS = ["DLV_SAA_RAT", "M1_SME_RY_SAA_RAT", "M1_SME_RY_CNT_RAT", "M12_SME_RY_SAA_PCE_RT",
+                  "M12_SME_BZN_SAA_PCE_RT", "M12_SME_RY_ME_MCT_RAT", "M12_SME_BZN_ME_MCT_RAT"]
+DS3_RATIO_COLS = ["M12_MAL_1020_RAT", "M12_MAL_30_RAT", "M12_MAL_40_RAT", "M12_MAL_50_RAT", "M12_MAL_60_RAT",
+                  "M12_FME_1020_RAT", "M12_FME_30_RAT", "M12_FME_40_RAT", "M12_FME_50_RAT", "M12_FME_60_RAT",
+                  "MCT_UE_CLN_REU_RAT", "MCT_UE_CLN_NEW_RAT",
+                  "RC_M1_SHC_RSD_UE_CLN_RAT", "RC_M1_SHC_WP_UE_CLN_RAT", "RC_M1_SHC_FLP_UE_CLN_RAT"]
+SIGUNGU = ["서울 성동구", "서울 강남구", "서울 마포구", "서울 송파구", "서울 종로구"]
+DONG = {"서울 성동구": ["마장동", "성수동", "왕십리동"], "서울 강남구": ["역삼동", "논현동", "신사동"],
+        "서울 마포구": ["서교동", "망원동", "합정동"], "서울 송파구": ["잠실동", "문정동", "가락동"],
+        "서울 종로구": ["혜화동", "익선동", "삼청동"]}
+INDUSTRY = ["축산물", "치킨", "카페", "한식-육류/고기", "일식-우동/소바/라면", "중식당", "베이커리", "분식", "호프/맥주", "피자"]
+BIN_LABELS = list(BIN2RANK.keys())  # 붙여쓰기/띄어쓰기 라벨 모두 포함
+
+
+def make_datasets(n_merchants: int = 1000, n_months: int = 24, seed: int = 0,
+                  start: str = "2023-01", missing: float = 0.05, sentinel: float = 0.03):
+    """Return (ds1, ds2, ds3). ``missing`` drops merchant-months, ``sentinel`` plants -999999.9."""
+    rng = np.random.default_rng(seed)
+    ids = np.char.upper(np.char.mod("%010x", rng.choice(16 ** 10 // 4, n_merchants, replace=False) * 4 + 1))
+    ids = ids.astype(object)
+
+    sigungu = rng.choice(np.array(SIGUNGU, dtype=object), n_merchants)
+    dong = np.array([DONG[s][i] for s, i in zip(sigungu, rng.integers(0, 3, n_merchants))], dtype=object)
+    open_d = pd.Timestamp("2005-01-01") + pd.to_timedelta(rng.integers(0, 6500, n_merchants), unit="D")
+    closed = rng.random(n_merchants) < 0.05
+    close_d = pd.Timestamp(start) + pd.to_timedelta(rng.integers(0, 30 * n_months, n_merchants), unit="D")
+    ds1 = pd.DataFrame({
+        "ENCODED_MCT": ids,
+        "MCT_BSE_AR": sigungu + " " + dong,
+        "MCT_NM": rng.choice(np.array(list("가나다라마바사아자차카타파하"), dtype=object), n_merchants) + "**",
+        "MCT_BRD_NUM": np.where(rng.random(n_merchants) < 0.1,
+                                "BRD" + pd.Series(rng.integers(0, 50, n_merchants)).astype(str), None),
+        "MCT_SIGUNGU_NM": sigungu,
+        "HPSN_MCT_ZCD_NM": rng.choice(INDUSTRY, n_merchants),
+        "HPSN_MCT_BZN_CD_NM": dong,
+        "ARE_D": open_d.strftime("%Y%m%d").astype(int),
+        "MCT_ME_D": np.where(closed, close_d.strftime("%Y%m%d").astype(float), np.nan),
+    })
+
+    months = pd.period_range(start, periods=n_months, freq="M").strftime("%Y%m").astype(int).to_numpy()
+    mct = np.repeat(np.arange(n_merchants), n_months)
+    ym = np.tile(months, n_merchants)
+    keep = rng.random(len(mct)) >= missing
+    mct, ym = mct[keep], ym[keep]
+    order = np.lexsort((mct, ym))  # 실제 파일처럼 월 순서로 적재
+    mct, ym = mct[order], ym[order]
+    n = len(mct)
+
+    def ratios(cols, hi):
+        out = {}
+        for c in cols:
+            v = np.round(rng.uniform(0.0, hi, n), 1)
+            v[rng.random(n) < sentinel] = SENTINEL
+            out[c] = v
+        return out
+
+    # 매장별 기준 구간에서 ±1 구간 정도 움직이는 순위형 라벨
+    base = rng.integers(0, 6, (n_merchants, len(BIN_COLS)))
+    step = rng.integers(-1, 2, (n, len(BIN_COLS)))
+    level = np.clip(base[mct] + step, 0, 5)
+    style = rng.integers(0, 2, (n, len(BIN_COLS)))
+    labels = np.array(BIN_LABELS, dtype=object)
+    ds2 = pd.DataFrame({"ENCODED_MCT": ids[mct], "TA_YM": ym})
+    for j, c in enumerate(BIN_COLS):
+        ds2[c] = labels[level[:, j] + 6 * style[:, j]]
+    ds2 = ds2.assign(**ratios(DS2_RATIO_COLS, 100.0))
+
+    ds3 = pd.DataFrame({"ENCODED_MCT": ids[mct], "TA_YM": ym}).assign(**ratios(DS3_RATIO_COLS, 40.0))
+    return ds1, ds2, ds3
+
+
+def make_preds(ds2: pd.DataFrame, seed: int = 0) -> pd.DataFrame:
+    """Model predictions (pred_xgb ... pred_dl) for every ds2 merchant-month, in preds.csv layout."""
+    rng = np.random.default_rng(seed + 1)
+    base = rng.beta(2.0, 5.0, len(ds2))
+    preds = pd.DataFrame({"ENCODED_MCT": ds2["ENCODED_MCT"].to_numpy(),
+                          "TA_YM": pd.to_datetime(ds2["TA_YM"].astype(str), format="%Y%m").dt.strftime("%Y-%m-%d")})
+    for c in ["pred_xgb", "pred_lgbm", "pred_rf", "pred_gb", "pred_dl"]:
+        preds[c] = np.clip(base + rng.normal(0.0, 0.05, len(ds2)), 0.0, 1.0)
+    return preds
+
+
+def merchants_for_rows(n_rows: int, n_months: int = 24, missing: float = 0.05) -> int:
+    """Merchant count whose ds2 comes out at roughly ``n_rows`` rows."""
+    return max(1, int(round(n_rows / (n_months * (1.0 - missing)))))
+
+
+def write_csvs(out_dir: str, n_merchants: int, n_months: int, seed: int = 0):
+    os.makedirs(out_dir, exist_ok=True)
+    ds1, ds2, ds3 = make_datasets(n_merchants, n_months, seed)
+    ds1.to_csv(os.path.join(out_dir, "big_data_set1_f.csv"), index=False, encoding="cp949")
+    ds2.to_csv(os.path.join(out_dir, "ds2_monthly_usage.csv"), index=False, encoding="utf-8")
+    ds3.to_csv(os.path.join(out_dir, "ds3_monthly_customers.csv"), index=False, encoding="utf-8")
+    return len(ds2)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--out", required=True)
+    ap.add_argument("--merchants", type=int, default=1000)
+    ap.add_argument("--months", type=int, default=24)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+    rows = write_csvs(args.out, args.merchants, args.months, args.seed)
+    print(f"Saved: {args.out} ({rows} ds2 rows)")
+
+
+if __name__ == "__main__":
+    main()
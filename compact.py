@@ -0,0 +1,110 @@
+import numpy as np
+import pandas as pd
+from typing import Optional
+
+KEY_MCT = "ENCODED_MCT"
+KEY_YM = "TA_YM"
+
+# 압축 모드의 월 키: 1970-01 기준 개월 수(int32) = datetime64[M]의 정수값
+MONTH_DTYPE = np.dtype("int32")
+MONTH_NA = np.iinfo("int32").min
+
+
+def is_month_index(s: pd.Series) -> bool:
+    return s.dtype == MONTH_DTYPE
+
+
+def month_index(s: pd.Series, fmt: Optional[str] = "%Y%m") -> np.ndarray:
+    """Month keys as int32 months since 1970-01, parsing each distinct label once.
+
+    With ``fmt`` unparseable labels raise (as utils.as_month_sorted does); with ``fmt=None``
+    any date-like label is accepted and failures become MONTH_NA.
+    """
+    codes, uniques = pd.factorize(s)
+    labels = pd.Index(uniques).astype(str)
+    if fmt is None:
+        dt = pd.to_datetime(labels, errors="coerce")
+    else:
+        dt = pd.to_datetime(labels, format=fmt)
+    m = dt.to_numpy().astype("datetime64[M]").astype("int64")
+    m[pd.isna(dt)] = MONTH_NA
+    table = np.append(m, MONTH_NA).astype(MONTH_DTYPE)
+    return table[codes]
+
+
+def month_to_datetime(ix) -> np.ndarray:
+    ix = np.asarray(ix, dtype="int64")
+    out = ix.astype("datetime64[M]").astype("datetime64[ns]")
+    out[ix == MONTH_NA] = np.datetime64("NaT")
+    return out
+
+
+def _merchant_categories(frames) -> pd.Index:
+    uniq = [pd.Index(pd.unique(f[KEY_MCT])).astype(str) for f in frames if f is not None and KEY_MCT in f.columns]
+    cats = uniq[0].append(uniq[1:]) if uniq else pd.Index([], dtype=object)
+    return cats.unique().sort_values()
+
+
+def _as_category(s: pd.Series, categories: Optional[pd.Index] = None) -> pd.Categorical:
+    codes, uniques = pd.factorize(s)
+    labels = pd.Index(uniques).astype(str)
+    if categories is None:
+        categories = labels.sort_values()
+    remap = np.append(categories.get_indexer(labels), -1)
+    return pd.Categorical.from_codes(remap[codes], categories=categories)
+
+
+def compact_frame(df: pd.DataFrame, merchants: pd.Index, str_cols=(), month_fmt: Optional[str] = "%Y%m") -> pd.DataFrame:
+    """Column-by-column compact copy: merchant IDs and ``str_cols`` as categoricals, month as
+    int32 index, float64 as float32. Other columns are passed through unchanged."""
+    data = {}
+    for col in df.columns:
+        s = df[col]
+        if col == KEY_MCT:
+            data[col] = _as_category(s, merchants)
+        elif col == KEY_YM:
+            data[col] = month_index(s, month_fmt)
+        elif col in str_cols and s.dtype == object:
+            data[col] = _as_category(s)
+        elif s.dtype == "float64":
+            data[col] = s.to_numpy(dtype="float32")
+        else:
+            data[col] = s.to_numpy()
+    return pd.DataFrame(data, index=df.index, copy=False)
+
+
+def compact_inputs(ds1: pd.DataFrame, ds2: pd.DataFrame, ds3: pd.DataFrame,
+                   preds: Optional[pd.DataFrame] = None, label_cols=()):
+    """Compact copies of the pipeline inputs sharing one merchant category set (from ds1-ds3).
+
+    Name columns of ds1 and the ``label_cols`` of ds2/ds3 (bin labels) become categoricals;
+    other object columns of ds2/ds3 are left alone (load_and_join coerces them to numbers).
+    """
+    merchants = _merchant_categories([ds1, ds2, ds3])
+    names = [c for c in ds1.columns if c != KEY_MCT and ds1[c].dtype == object]
+    return (compact_frame(ds1, merchants, names),
+            compact_frame(ds2, merchants, label_cols),
+            compact_frame(ds3, merchants, label_cols),
+            None if preds is None else compact_preds(preds, merchants))
+
+
+def compact_preds(preds: pd.DataFrame, merchants: pd.Index) -> pd.DataFrame:
+    """Predictions on an existing merchant category set; unknown merchants get NaN codes and
+    so match no panel row, exactly as in the left merge of the regular path."""
+    return compact_frame(preds, merchants, month_fmt=None)
+
+
+def expand_output(out: pd.DataFrame) -> pd.DataFrame:
+    """Back to the regular output dtypes: string IDs, datetime64 months, float64 scores."""
+    data = {}
+    for col in out.columns:
+        s = out[col]
+        if col == KEY_MCT and isinstance(s.dtype, pd.CategoricalDtype):
+            data[col] = s.astype(str).to_numpy(dtype=object)
+        elif col == KEY_YM and is_month_index(s):
+            data[col] = month_to_datetime(s.to_numpy())
+        elif s.dtype == "float32":
+            data[col] = s.to_numpy(dtype="float64")
+        else:
+            data[col] = s.to_numpy()
+    return pd.DataFrame(data, index=out.index)
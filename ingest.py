@@ -0,0 +1,149 @@
+import os
+import json
+import codecs
+import shutil
+import hashlib
+import numpy as np
+import pandas as pd
+from typing import Optional
+
+ENCODINGS = ["utf-8", "cp949", "euc-kr", "latin1"]
+CACHE_VERSION = 1
+
+# 키/이름 컬럼은 항상 문자열, 비율 컬럼은 항상 float64 (나머지는 pandas 추론)
+STR_COLS = [
+    "ENCODED_MCT", "TA_YM", "MCT_BSE_AR", "MCT_NM", "MCT_BRD_NUM", "MCT_SIGUNGU_NM",
+    "HPSN_MCT_ZCD_NM", "HPSN_MCT_BZN_CD_NM",
+]
+FLOAT_COLS = [
+    "DLV_SAA_RAT", "M1_SME_RY_SAA_RAT", "M1_SME_RY_CNT_RAT",
+    "M12_SME_RY_SAA_PCE_RT", "M12_SME_BZN_SAA_PCE_RT", "M12_SME_RY_ME_MCT_RAT", "M12_SME_BZN_ME_MCT_RAT",
+    "M12_MAL_1020_RAT", "M12_MAL_30_RAT", "M12_MAL_40_RAT", "M12_MAL_50_RAT", "M12_MAL_60_RAT",
+    "M12_FME_1020_RAT", "M12_FME_30_RAT", "M12_FME_40_RAT", "M12_FME_50_RAT", "M12_FME_60_RAT",
+    "MCT_UE_CLN_REU_RAT", "MCT_UE_CLN_NEW_RAT",
+    "RC_M1_SHC_RSD_UE_CLN_RAT", "RC_M1_SHC_WP_UE_CLN_RAT", "RC_M1_SHC_FLP_UE_CLN_RAT",
+    "pred_xgb", "pred_lgbm", "pred_rf", "pred_gb", "pred_dl",
+]
+SCHEMA = {**{c: str for c in STR_COLS}, **{c: "float64" for c in FLOAT_COLS}}
+
+
+def detect_encoding(path: str, sample_size: int = 1 << 16) -> str:
+    with open(path, "rb") as f:
+        raw = f.read(sample_size)
+    if raw.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    for enc in ENCODINGS:
+        try:
+            # final=False: 샘플 끝에서 잘린 멀티바이트 문자는 허용
+            codecs.getincrementaldecoder(enc)().decode(raw, final=False)
+            return enc
+        except UnicodeDecodeError:
+            continue
+    return "latin1"
+
+
+def encoding_candidates(path: str) -> list:
+    """Encodings to try in order: the sniffed one, then the rest of ENCODINGS."""
+    first = detect_encoding(path)
+    return [first] + [e for e in ENCODINGS if e != first]
+
+
+def parse_csv(path: str, schema: Optional[dict] = None) -> pd.DataFrame:
+    schema = SCHEMA if schema is None else schema
+    for enc in encoding_candidates(path):
+        try:
+            return pd.read_csv(path, encoding=enc, dtype=schema)
+        except UnicodeDecodeError:
+            continue
+    raise RuntimeError(f"CSV 인코딩 해석 실패: {path}")
+
+
+def _file_digest(path: str) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _cache_path(path: str, cache_dir: Optional[str]) -> str:
+    path = os.path.abspath(path)
+    cache_dir = cache_dir or os.path.join(os.path.dirname(path), ".cache")
+    tag = hashlib.blake2b(path.encode("utf-8"), digest_size=4).hexdigest()
+    return os.path.join(cache_dir, f"{os.path.basename(path)}.{tag}")
+
+
+def _read_meta(cdir: str) -> Optional[dict]:
+    try:
+        with open(os.path.join(cdir, "meta.json"), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_cache(cdir: str, df: pd.DataFrame, meta: dict):
+    tmp = cdir + ".tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    cols = []
+    for i, col in enumerate(df.columns):
+        s = df[col]
+        if s.dtype == object:
+            if pd.api.types.infer_dtype(s, skipna=True) not in ("string", "empty"):
+                raise TypeError(f"column {col!r} holds non-string objects")
+            codes, cats = pd.factorize(s)
+            np.save(os.path.join(tmp, f"{i}.codes.npy"), codes.astype("int32"))
+            np.save(os.path.join(tmp, f"{i}.cats.npy"), np.asarray(cats, dtype=str))
+            cols.append({"name": str(col), "kind": "str"})
+        else:
+            np.save(os.path.join(tmp, f"{i}.npy"), s.to_numpy())
+            cols.append({"name": str(col), "kind": "num"})
+    meta = dict(meta, columns=cols, version=CACHE_VERSION)
+    with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False)
+    shutil.rmtree(cdir, ignore_errors=True)
+    os.replace(tmp, cdir)
+
+
+def _load_cache(cdir: str, meta: dict) -> pd.DataFrame:
+    data = {}
+    for i, c in enumerate(meta["columns"]):
+        if c["kind"] == "str":
+            codes = np.load(os.path.join(cdir, f"{i}.codes.npy"), mmap_mode="c")
+            cats = np.load(os.path.join(cdir, f"{i}.cats.npy")).astype(object)
+            data[c["name"]] = np.append(cats, np.nan)[codes]
+        else:
+            data[c["name"]] = np.load(os.path.join(cdir, f"{i}.npy"), mmap_mode="c")
+    return pd.DataFrame(data, copy=False)
+
+
+def read_table(path: str, schema: Optional[dict] = None, cache_dir: Optional[str] = None,
+               use_cache: bool = True) -> pd.DataFrame:
+    """CSV를 한 번만 파싱하고, 이후에는 컬럼형 바이너리 캐시(.npy, mmap)에서 읽는다.
+
+    캐시는 파일 크기/mtime이 같으면 그대로 쓰고, mtime만 바뀐 경우 내용 해시로 재확인한다.
+    """
+    schema = SCHEMA if schema is None else schema
+    if not use_cache:
+        return parse_csv(path, schema)
+
+    st = os.stat(path)
+    cdir = _cache_path(path, cache_dir)
+    meta = _read_meta(cdir)
+    if meta is not None and meta.get("version") == CACHE_VERSION and meta.get("schema") == repr(schema):
+        if meta["size"] == st.st_size and meta["mtime_ns"] == st.st_mtime_ns:
+            return _load_cache(cdir, meta)
+        if meta["size"] == st.st_size and meta["digest"] == _file_digest(path):
+            meta["mtime_ns"] = st.st_mtime_ns
+            with open(os.path.join(cdir, "meta.json"), "w", encoding="utf-8") as f:
+                json.dump(meta, f, ensure_ascii=False)
+            return _load_cache(cdir, meta)
+
+    df = parse_csv(path, schema)
+    try:
+        _write_cache(cdir, df, {"size": st.st_size, "mtime_ns": st.st_mtime_ns,
+                                "digest": _file_digest(path), "schema": repr(schema)})
+    except (OSError, TypeError) as e:
+        shutil.rmtree(cdir + ".tmp", ignore_errors=True)
+        print(f"[warn] ingest cache write skipped for {path}: {e}")
+    return df
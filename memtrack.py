@@ -0,0 +1,39 @@
+import sys
+import resource
+
+
+def _status_mb(field: str) -> float:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(field):
+                return int(line.split()[1]) / 1024
+    raise OSError(field)
+
+
+def rss_mb() -> float:
+    """Current resident set size (NaN where /proc is unavailable)."""
+    try:
+        return _status_mb("VmRSS:")
+    except OSError:
+        return float("nan")
+
+
+def rss_peak_mb() -> float:
+    """Peak resident set size of this process (VmHWM; ru_maxrss where /proc is unavailable)."""
+    try:
+        return _status_mb("VmHWM:")
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 1024
+
+
+def reset_rss_peak() -> bool:
+    """Reset the kernel's RSS high-water mark to the current RSS (Linux only)."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
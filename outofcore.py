@@ -0,0 +1,127 @@
+import os
+import shutil
+import tempfile
+import pandas as pd
+from typing import Optional
+from ingest import SCHEMA, detect_encoding, encoding_candidates
+from utils import shard_of
+from sketch import QuantileSketchStore
+from alerting import resolve_group_cols, alert_thresholds, apply_alert_thresholds
+from pipeline import score_shard, ALERT_GROUP_COLS, ALERT_QUANTILES, OUTPUT_COLS
+
+KEY_MCT = "ENCODED_MCT"
+
+
+def partition_csv(path: str, out_dir: str, n_shards: int, chunksize: int = 500_000) -> int:
+    """Stream a CSV in chunks and append each chunk's rows to the shard of their merchant.
+
+    The encoding is sniffed from the head of the file only, so a decode error further in
+    restarts the whole partition into a clean ``out_dir`` with the next candidate encoding.
+    """
+    for enc in encoding_candidates(path):
+        shutil.rmtree(out_dir, ignore_errors=True)
+        try:
+            return _partition(path, enc, out_dir, n_shards, chunksize)
+        except UnicodeDecodeError:
+            continue
+    shutil.rmtree(out_dir, ignore_errors=True)
+    raise RuntimeError(f"CSV 인코딩 해석 실패: {path}")
+
+
+def _partition(path: str, enc: str, out_dir: str, n_shards: int, chunksize: int) -> int:
+    rows = 0
+    for part, chunk in enumerate(pd.read_csv(path, encoding=enc, dtype=SCHEMA, chunksize=chunksize)):
+        shard = shard_of(chunk[KEY_MCT], n_shards)
+        for k, piece in chunk.groupby(shard, sort=False):
+            d = os.path.join(out_dir, f"shard_{k:04d}")
+            os.makedirs(d, exist_ok=True)
+            piece.to_pickle(os.path.join(d, f"part_{part:06d}.pkl"))
+        rows += len(chunk)
+    return rows
+
+
+def _read_shard(root: str, k: int) -> Optional[pd.DataFrame]:
+    d = os.path.join(root, f"shard_{k:04d}")
+    if not os.path.isdir(d):
+        return None
+    parts = [pd.read_pickle(os.path.join(d, f)) for f in sorted(os.listdir(d))]
+    return pd.concat(parts, ignore_index=True)
+
+
+def run_pipeline_out_of_core(ds1_path: str, ds2_path: str, ds3_path: str, out_path: str,
+                             preds_path: Optional[str] = None,
+                             n_shards: int = 16,
+                             chunksize: int = 500_000,
+                             work_dir: Optional[str] = None,
+                             exact_thresholds: bool = True) -> int:
+    """run_pipeline over CSVs that do not fit in memory; writes ``out_path`` and returns its row count.
+
+    Inputs are hash-partitioned by ENCODED_MCT into on-disk shards and scored one shard at
+    a time. Only the alert quantiles need every row, so a final pass computes them from the
+    scored shards' group/score columns and labels each shard against them. Rows come out
+    grouped by shard (sorted by merchant/month within a shard). Calibration fitting needs
+    the full population and is not available here.
+
+    With ``exact_thresholds=False`` each scored shard is folded into a t-digest store
+    instead, so the final pass never holds more than one shard plus the sketches.
+    """
+    own_dir = work_dir is None
+    work_dir = work_dir or tempfile.mkdtemp(prefix="risk_ooc_")
+    try:
+        inputs = {"ds1": ds1_path, "ds2": ds2_path, "ds3": ds3_path}
+        if preds_path is not None:
+            inputs["preds"] = preds_path
+        for name, path in inputs.items():
+            partition_csv(path, os.path.join(work_dir, name), n_shards, chunksize)
+
+        scored_dir = os.path.join(work_dir, "scored")
+        os.makedirs(scored_dir, exist_ok=True)
+        scored = []
+        cols, store = None, None
+        for k in range(n_shards):
+            ds2 = _read_shard(os.path.join(work_dir, "ds2"), k)
+            if ds2 is None:
+                continue
+            ds1 = _read_shard(os.path.join(work_dir, "ds1"), k)
+            ds3 = _read_shard(os.path.join(work_dir, "ds3"), k)
+            preds = _read_shard(os.path.join(work_dir, "preds"), k) if preds_path is not None else None
+            if ds1 is None:
+                ds1 = pd.read_csv(ds1_path, encoding=detect_encoding(ds1_path), dtype=SCHEMA, nrows=0)
+            if ds3 is None:
+                ds3 = pd.read_csv(ds3_path, encoding=detect_encoding(ds3_path), dtype=SCHEMA, nrows=0)
+            if preds_path is not None and preds is None:
+                preds = pd.read_csv(preds_path, encoding=detect_encoding(preds_path), dtype=SCHEMA, nrows=0)
+
+            path = os.path.join(scored_dir, f"scored_{k:04d}.pkl")
+            risks = score_shard(ds1, ds2, ds3, preds)
+            if not exact_thresholds:
+                if store is None:
+                    cols = resolve_group_cols(risks, ALERT_GROUP_COLS)
+                    store = QuantileSketchStore(cols)
+                store.update(risks, "p_final")
+            risks.to_pickle(path)
+            scored.append(path)
+            del risks
+
+        if store is not None:
+            thresholds = store.thresholds(**ALERT_QUANTILES)
+        else:
+            # 경보 임계값은 전체 모집단 분위수 → 점수/그룹 컬럼만 모아서 계산
+            head = pd.read_pickle(scored[0]) if scored else pd.DataFrame(columns=OUTPUT_COLS)
+            cols = resolve_group_cols(head, ALERT_GROUP_COLS)
+            population = pd.concat([pd.read_pickle(p)[cols + ["p_final"]] for p in scored], ignore_index=True) \
+                if scored else head[cols + ["p_final"]]
+            thresholds = alert_thresholds(population, cols, "p_final", **ALERT_QUANTILES)
+            del population
+
+        rows = 0
+        pd.DataFrame(columns=OUTPUT_COLS).to_csv(out_path, index=False)
+        for p in scored:
+            risks = pd.read_pickle(p)
+            risks["Alert"] = apply_alert_thresholds(risks, thresholds, cols, "p_final")
+            risks[OUTPUT_COLS].to_csv(out_path, mode="a", header=False, index=False)
+            rows += len(risks)
+        return rows
+    finally:
+        if own_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
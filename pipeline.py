@@ -1,9 +1,21 @@
+import os
+import numpy as np
 import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from itertools import repeat
 from typing import Optional
-from preprocessing import load_and_join, normalize_bins
+from preprocessing import load_and_join, join_panel, normalize_bins, BIN_COLS
 from risk_aggregate import compute_all_risks
+from risk_components import compute_risk_components, fuse_risk_components, KEY, RISK_COLS
+from rolling_state import RollingState
+from sketch import QuantileSketchStore
+from compact import compact_inputs, compact_preds, expand_output, is_month_index
+from tracing import Trace, StageRecord
+from stage_cache import StageCache, frame_digest, stage_keys
+from utils import shard_of
 from ensemble import weighted_ensemble, Calibrator
-from alerting import assign_alert_by_quantile
+from alerting import assign_alert_by_quantile, resolve_group_cols, alert_thresholds, apply_alert_thresholds
 from config import LAMBDA_BLEND
 
 
@@ -14,23 +26,285 @@ def _coerce_month_col(s):
 
 def _coerce_keys(df: pd.DataFrame) -> pd.DataFrame:
     out = df.copy()
-    if "ENCODED_MCT" in out.columns:
+    # 압축 모드의 키(범주형 ID, int32 월 인덱스)는 이미 정규형
+    if "ENCODED_MCT" in out.columns and out["ENCODED_MCT"].dtype != "category":
         out["ENCODED_MCT"] = out["ENCODED_MCT"].astype(str)
-    if "TA_YM" in out.columns:
+    if "TA_YM" in out.columns and not is_month_index(out["TA_YM"]):
         out["TA_YM"] = _coerce_month_col(out["TA_YM"])
     return out
 
 
 def run_pipeline(ds1: pd.DataFrame, ds2: pd.DataFrame, ds3: pd.DataFrame,
                  preds: Optional[pd.DataFrame] = None,
-                 calib_fit_y: Optional[pd.Series] = None) -> pd.DataFrame:
+                 calib_fit_y: Optional[pd.Series] = None,
+                 workers: int = 1,
+                 compact: bool = False,
+                 lean: bool = False,
+                 memory_budget_mb: Optional[float] = None,
+                 trace: Optional[Trace] = None,
+                 cache_dir: Optional[str] = None) -> pd.DataFrame:
+    """Score the panel and label alerts.
+
+    With ``compact=True`` the whole run works on categorical merchant/name codes, an int32
+    month index and float32 rank/risk columns (see compact.py); only the returned frame is
+    converted back to the regular dtypes. ``lean=True`` takes the copy-free path (join_panel,
+    in-place bins, no key re-coercion). ``memory_budget_mb`` (working memory on top of the
+    inputs) implies ``lean`` and, when the estimated peak exceeds it, scores merchant chunks
+    one after another; with ``workers > 1`` the shards are made small enough that ``workers``
+    of them in flight stay within the budget. ``trace`` (tracing.Trace) receives one record per stage: time, rows,
+    memory and row-explosion warnings from the joins.
+
+    With ``cache_dir`` the joined panel, the normalized panel and the compute_all_risks output
+    are stored on disk under keys derived from the ds1-ds3 contents and the config constants
+    each stage reads (stage_cache.py), so a rerun with only new ``preds``/``calib_fit_y`` or
+    LAMBDA_BLEND goes straight to ensemble, blend and alerts. It cannot be combined with
+    ``workers > 1`` or ``memory_budget_mb`` (sharded runs never see the whole panel), and
+    asking for both raises ValueError.
+    """
+    if cache_dir is not None and (workers > 1 or memory_budget_mb is not None):
+        raise ValueError("cache_dir is only supported for serial runs without memory_budget_mb")
+    n_chunks = 1
+    if memory_budget_mb is not None:
+        lean = True
+        n_chunks = _chunks_for_budget(ds1, ds2, ds3, memory_budget_mb)
+    if workers > 1:
+        # 작업 프로세스마다 샤드 하나씩 동시에 메모리에 있으므로 예산을 workers개로 나눔
+        n_shards = max(n_chunks * workers, 2 * workers)
+        return _run_sharded(ds1, ds2, ds3, preds, calib_fit_y, workers, compact, lean, n_shards, trace)
+    if n_chunks > 1:
+        return _run_sharded(ds1, ds2, ds3, preds, calib_fit_y, 1, compact, lean, n_chunks, trace)
+
+    cache = StageCache(cache_dir) if cache_dir is not None else None
+    risks = _score_risks(ds1, ds2, ds3, compact, lean, trace, cache)
+    risks = _traced_blend(risks, preds, calib_fit_y, compact, trace)
+    with _stage(trace, "alert", len(risks)) as rec:
+        out = _alert(risks)
+        out = expand_output(out) if compact else out
+        rec.rows_out = len(out)
+    return out
+
+
+# lean 경로의 입력 외 최대 메모리 ≈ 행 수 x 조인 폭 x 8바이트 x 이 계수 (bench_memory.py 측정치 ~1.4)
+LEAN_PEAK_FACTOR = 1.5
+
+
+def _chunks_for_budget(ds1: pd.DataFrame, ds2: pd.DataFrame, ds3: pd.DataFrame, budget_mb: float) -> int:
+    width = ds2.shape[1] + ds3.shape[1] + ds1.shape[1] + len(BIN_COLS)
+    est_mb = len(ds2) * width * 8 * LEAN_PEAK_FACTOR / 2 ** 20
+    return max(1, int(np.ceil(est_mb / budget_mb)))
+
+
+def _stage(trace: Optional[Trace], name: str, rows_in: Optional[int] = None, merge: bool = False):
+    if trace is None:
+        return nullcontext(StageRecord(name, rows_in=rows_in))
+    return trace.stage(name, rows_in, merge)
+
+
+def _score_risks(ds1: pd.DataFrame, ds2: pd.DataFrame, ds3: pd.DataFrame, compact: bool = False,
+                 lean: bool = False, trace: Optional[Trace] = None,
+                 cache: Optional[StageCache] = None) -> pd.DataFrame:
+    """join -> bins -> risks; with ``cache``, resumes after the last stage already on disk."""
+    keys = {}
+    if cache is not None:
+        with _stage(trace, "cache_key", len(ds2)) as rec:
+            digest = "".join(frame_digest(d) for d in (ds1, ds2, ds3))
+            keys = stage_keys(digest, compact=compact, lean=lean)
+            risks = cache.get("risks", keys["risks"])
+            rec.info["hits"] = ",".join(cache.hits) or "-"
+        if risks is not None:
+            return risks
+
+    df = cache.get("normalized", keys["normalized"]) if cache is not None else None
+    if df is None:
+        df = cache.get("joined", keys["joined"]) if cache is not None else None
+        if df is None:
+            df = _join(ds1, ds2, ds3, compact, lean, trace)
+            if cache is not None:
+                cache.put("joined", keys["joined"], df)
+        with _stage(trace, "bins", len(df)) as rec:
+            dtype = "float32" if compact else "float64"
+            if lean:
+                normalize_bins(df, dtype, inplace=True)
+            else:
+                df = _coerce_keys(normalize_bins(df, dtype))
+            rec.rows_out = len(df)
+        if cache is not None:
+            cache.put("normalized", keys["normalized"], df)
+
+    with _stage(trace, "risks", len(df)) as rec:
+        risks = compute_all_risks(df)
+        del df
+        if not lean:
+            risks = _coerce_keys(risks)
+        if compact:
+            risks[RISK_COLS] = risks[RISK_COLS].astype("float32")
+        rec.rows_out = len(risks)
+    if cache is not None:
+        cache.put("risks", keys["risks"], risks)
+    return risks
+
+
+def _join(ds1: pd.DataFrame, ds2: pd.DataFrame, ds3: pd.DataFrame, compact: bool, lean: bool,
+          trace: Optional[Trace]) -> pd.DataFrame:
+    if compact:
+        with _stage(trace, "compact", len(ds2)) as rec:
+            ds1, ds2, ds3, _ = compact_inputs(ds1, ds2, ds3, None, BIN_COLS)
+            rec.rows_out = len(ds2)
+    with _stage(trace, "join", len(ds2), merge=True) as rec:
+        df = join_panel(ds1, ds2, ds3) if lean else load_and_join(ds1, ds2, ds3)
+        rec.rows_out = len(df)
+    return df
+
+
+def _traced_blend(risks: pd.DataFrame, preds: Optional[pd.DataFrame], calib_fit_y: Optional[pd.Series],
+                  compact: bool, trace: Optional[Trace]) -> pd.DataFrame:
+    with _stage(trace, "blend", len(risks), merge=True) as rec:
+        if compact and preds is not None:
+            preds = compact_preds(preds, risks["ENCODED_MCT"].cat.categories)
+        risks = _blend(risks, preds, calib_fit_y)
+        rec.rows_out = len(risks)
+    return risks
+
+
+def score_shard(ds1: pd.DataFrame, ds2: pd.DataFrame, ds3: pd.DataFrame,
+                preds: Optional[pd.DataFrame] = None, blend: bool = True,
+                compact: bool = False, lean: bool = False,
+                trace: Optional[Trace] = None) -> pd.DataFrame:
+    """Everything in run_pipeline that only needs one merchant's rows: join, bins, risks, blend."""
+    risks = _score_risks(ds1, ds2, ds3, compact, lean, trace)
+    if blend:
+        risks = _traced_blend(risks, preds, None, compact, trace)
+    return expand_output(risks) if compact else risks
+
+
+def _split_by_merchant(df: Optional[pd.DataFrame], n_shards: int):
+    if df is None:
+        return repeat(None, n_shards)
+    shard = shard_of(df["ENCODED_MCT"], n_shards)
+    return (df[shard == k] for k in range(n_shards))
+
+
+def _run_sharded(ds1: pd.DataFrame, ds2: pd.DataFrame, ds3: pd.DataFrame,
+                 preds: Optional[pd.DataFrame],
+                 calib_fit_y: Optional[pd.Series],
+                 workers: int,
+                 compact: bool = False,
+                 lean: bool = False,
+                 n_shards: Optional[int] = None,
+                 trace: Optional[Trace] = None) -> pd.DataFrame:
+    """Phase 1 scores merchant shards (in a process pool, or one after another with
+    ``workers=1``); phase 2 derives the alert thresholds from the whole population and
+    applies them to every shard. Matches the serial path."""
+    n_shards = n_shards or workers * 2
+    # 보정(calibration) 학습은 전체 p_model이 필요하므로 그 경우 blend는 병합 후 수행
+    blend = calib_fit_y is None
+    shards = (_split_by_merchant(ds1, n_shards), _split_by_merchant(ds2, n_shards),
+              _split_by_merchant(ds3, n_shards), _split_by_merchant(preds, n_shards),
+              repeat(blend, n_shards), repeat(compact, n_shards), repeat(lean, n_shards))
+    if workers > 1:
+        # 작업 프로세스 안의 단계는 추적할 수 없으므로 전체를 한 단계로 기록
+        with _stage(trace, "shards", len(ds2)) as rec:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                parts = list(pool.map(score_shard, *shards))
+            rec.rows_out = sum(len(p) for p in parts)
+            rec.info.update(workers=workers, shards=n_shards)
+    else:
+        parts = list(map(score_shard, *shards, repeat(trace, n_shards)))
+
+    if not blend:
+        risks = pd.concat(parts).sort_values(["ENCODED_MCT", "TA_YM"], kind="mergesort", ignore_index=True)
+        risks = _traced_blend(risks, preds, calib_fit_y, False, trace)
+        with _stage(trace, "alert", len(risks)) as rec:
+            out = _alert(risks)
+            rec.rows_out = len(out)
+        return out
+
+    with _stage(trace, "alert", sum(len(p) for p in parts)) as rec:
+        cols = resolve_group_cols(parts[0], ALERT_GROUP_COLS)
+        population = pd.concat([p[cols + ["p_final"]] for p in parts], ignore_index=True)
+        thresholds = alert_thresholds(population, cols, "p_final", **ALERT_QUANTILES)
+        for p in parts:
+            p["Alert"] = apply_alert_thresholds(p, thresholds, cols, "p_final")
+        out = pd.concat([p[OUTPUT_COLS] for p in parts])
+        out = out.sort_values(["ENCODED_MCT", "TA_YM"], kind="mergesort", ignore_index=True)
+        rec.rows_out = len(out)
+    return out
+
+
+def run_pipeline_incremental(ds1: pd.DataFrame, ds2: pd.DataFrame, ds3: pd.DataFrame,
+                             state_path: str,
+                             preds: Optional[pd.DataFrame] = None,
+                             calib_fit_y: Optional[pd.Series] = None,
+                             sketch_path: Optional[str] = None) -> pd.DataFrame:
+    """Score only the months in ds2/ds3, continuing from the rolling state persisted at ``state_path``.
+
+    Without a state file the inputs are treated as the full history: everything is scored
+    and the state is bootstrapped from it. Months are appended in order, one at a time.
+    With ``sketch_path`` the alert thresholds come from a persisted QuantileSketchStore that
+    accumulates every run's scores, instead of from this batch alone.
+    """
     df = load_and_join(ds1, ds2, ds3)
     df = normalize_bins(df)
     df = _coerce_keys(df)
 
-    risks = compute_all_risks(df)
-    risks = _coerce_keys(risks)
+    if not os.path.exists(state_path):
+        risks, sig = compute_risk_components(df, keep_signals=True)
+        state = RollingState.from_signals(risks, sig)
+    else:
+        state = RollingState.load(state_path)
+        parts = []
+        for ym in np.sort(df["TA_YM"].dropna().unique()):
+            d = df[df["TA_YM"] == ym].sort_values("ENCODED_MCT", ignore_index=True)
+            ids = d["ENCODED_MCT"].to_numpy()
+            if d["ENCODED_MCT"].duplicated().any():
+                raise ValueError(f"duplicate merchants in month {pd.Timestamp(ym):%Y-%m}")
+            sig = state.signals(ids, ym)
+            fuse_risk_components(d, sig)
+            state = state.advance(ids, ym, sig)
+            parts.append(d[KEY + RISK_COLS])
+        risks = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=KEY + RISK_COLS)
+
+    if sketch_path is None:
+        out = _blend_and_alert(risks, preds, calib_fit_y)
+    else:
+        risks = _blend(risks, preds, calib_fit_y)
+        cols = resolve_group_cols(risks, ALERT_GROUP_COLS)
+        store = QuantileSketchStore.load_or_new(sketch_path, cols)
+        if store.group_cols != cols:
+            raise ValueError(f"sketch store {sketch_path} is grouped by {store.group_cols}, not {cols}")
+        store.update(risks, "p_final")
+        risks["Alert"] = apply_alert_thresholds(risks, store.thresholds(**ALERT_QUANTILES), cols, "p_final")
+        out = risks[OUTPUT_COLS]
+        store.save(sketch_path)
+    state.save(state_path)
+    return out
+
+
+ALERT_GROUP_COLS = ["HPSN_MCT_ZCD_NM"]
+ALERT_QUANTILES = dict(q_y=0.80, q_o=0.90, q_r=0.97)
+OUTPUT_COLS = ["ENCODED_MCT", "TA_YM", "Sales_Risk", "Customer_Risk", "Market_Risk", "RiskScore", "p_model",
+               "p_final", "Alert"]
+
+
+def _blend_and_alert(risks: pd.DataFrame,
+                     preds: Optional[pd.DataFrame],
+                     calib_fit_y: Optional[pd.Series]) -> pd.DataFrame:
+    return _alert(_blend(risks, preds, calib_fit_y))
 
+
+def _alert(risks: pd.DataFrame) -> pd.DataFrame:
+    risks["Alert"] = assign_alert_by_quantile(
+        risks,
+        group_cols=ALERT_GROUP_COLS,
+        score_col="p_final",
+        **ALERT_QUANTILES
+    )
+    return risks[OUTPUT_COLS]
+
+
+def _blend(risks: pd.DataFrame,
+           preds: Optional[pd.DataFrame],
+           calib_fit_y: Optional[pd.Series]) -> pd.DataFrame:
     if preds is None:
         risks["p_model"] = 0.0
         p_cal = risks["p_model"]
@@ -46,13 +320,4 @@ def run_pipeline(ds1: pd.DataFrame, ds2: pd.DataFrame, ds3: pd.DataFrame,
 
     risks["p_final"] = (LAMBDA_BLEND * risks.get("p_model_cal", risks["p_model"]).fillna(0)
                         + (1.0 - LAMBDA_BLEND) * risks["RiskScore"].fillna(0))
-    risks["Alert"] = assign_alert_by_quantile(
-        risks,
-        group_cols=["HPSN_MCT_ZCD_NM"],
-        score_col="p_final",
-        q_y=0.80, q_o=0.90, q_r=0.97
-    )
-
-    cols = ["ENCODED_MCT", "TA_YM", "Sales_Risk", "Customer_Risk", "Market_Risk", "RiskScore", "p_model", "p_final",
-            "Alert"]
-    return risks[cols]
\ No newline at end of file
+    return risks
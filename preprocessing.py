@@ -1,37 +1,141 @@
+import numpy as np
 import pandas as pd
-from config import MIN_PERIODS, ROLL_WINDOW
+from typing import Optional
+from config import MIN_PERIODS, ROLL_WINDOW, VERY_NEGATIVE_SV
 from utils import safe_nan, map_bin_to_rank, as_month_sorted
+from compact import is_month_index, month_index, month_to_datetime
 
 KEY_MCT = "ENCODED_MCT"
 KEY_YM = "TA_YM"
 
+BIN_COLS = [
+    "RC_M1_SAA", "RC_M1_TO_UE_CT", "RC_M1_UE_CUS_CN",
+    "RC_M1_AV_NP_AT", "APV_CE_RAT", "MCT_OPE_MS_CN"
+]
+
+
+def _skip_sentinel(col: str, s: pd.Series) -> bool:
+    # 구간 라벨("10-25%")은 normalize_bins에서 순위로 변환되므로 숫자 강제 변환 제외
+    return col in (KEY_MCT, KEY_YM) or (col in BIN_COLS and (s.dtype == object or s.dtype == "category"))
+
 
 def load_and_join(ds1: pd.DataFrame, ds2: pd.DataFrame, ds3: pd.DataFrame) -> pd.DataFrame:
     a, b, c = ds1.copy(), ds2.copy(), ds3.copy()
 
-    b = as_month_sorted(b, KEY_YM)
-    c = as_month_sorted(c, KEY_YM)
+    # 압축 모드(compact.py)에서는 월이 이미 int32 인덱스
+    b = b.sort_values([KEY_YM]) if is_month_index(b[KEY_YM]) else as_month_sorted(b, KEY_YM)
+    c = c.sort_values([KEY_YM]) if is_month_index(c[KEY_YM]) else as_month_sorted(c, KEY_YM)
 
     for col in b.columns:
-        if col not in (KEY_MCT, KEY_YM): b[col] = safe_nan(b[col])
+        if not _skip_sentinel(col, b[col]): b[col] = safe_nan(b[col])
     for col in c.columns:
-        if col not in (KEY_MCT, KEY_YM): c[col] = safe_nan(c[col])
+        if not _skip_sentinel(col, c[col]): c[col] = safe_nan(c[col])
 
     df = b.merge(c, on=[KEY_MCT, KEY_YM], how="left", suffixes=("", "_C"))
     df = df.merge(a, on=[KEY_MCT], how="left")
     return df
 
 
-def normalize_bins(df: pd.DataFrame) -> pd.DataFrame:
-    df = df.copy()
-    bin_cols = [
-        "RC_M1_SAA", "RC_M1_TO_UE_CT", "RC_M1_UE_CUS_CN",
-        "RC_M1_AV_NP_AT", "APV_CE_RAT", "MCT_OPE_MS_CN"
-    ]
-    for col in bin_cols:
+def _mct_keys(s: pd.Series):
+    # astype(str)와 같은 결과를 고유값 단위로 (NaN -> "nan")
+    if s.dtype == "category":
+        return s.array
+    codes, uniques = pd.factorize(s)
+    return np.append(pd.Index(uniques).astype(str).to_numpy(dtype=object), "nan")[codes]
+
+
+def _ym_keys(s: pd.Series) -> np.ndarray:
+    return s.to_numpy() if is_month_index(s) else month_to_datetime(month_index(s))
+
+
+def _sort_codes(keys) -> np.ndarray:
+    # sort_values와 같은 순서 (NaN은 마지막)
+    c, u = pd.factorize(keys, sort=True)
+    return np.where(c < 0, len(u), c)
+
+
+def _row_indexer(left: list, right: list) -> Optional[np.ndarray]:
+    """Row of ``right`` matching each ``left`` key (-1 if none); None if right keys repeat."""
+    r = pd.MultiIndex.from_arrays(right) if len(right) > 1 else pd.Index(right[0])
+    if not r.is_unique:
+        return None
+    l = pd.MultiIndex.from_arrays(left) if len(left) > 1 else pd.Index(left[0])
+    return r.get_indexer(l)
+
+
+def _numeric(s: pd.Series) -> np.ndarray:
+    return pd.to_numeric(s, errors="coerce").to_numpy(dtype="float64", na_value=np.nan) \
+        if s.dtype == object else s.to_numpy()
+
+
+def _take(s: pd.Series, row: np.ndarray):
+    # row == -1 -> 결측 (int는 float로 승격, merge와 동일)
+    if isinstance(s.dtype, np.dtype):
+        return pd.api.extensions.take(s.to_numpy(), row, allow_fill=True)
+    return s.array.take(row, allow_fill=True)
+
+
+def join_panel(ds1: pd.DataFrame, ds2: pd.DataFrame, ds3: pd.DataFrame) -> pd.DataFrame:
+    """load_and_join in one materialisation, with canonical keys (str IDs, month-start datetimes).
+
+    The only sort of the run happens here: rows come out in (merchant, month) order, so the
+    risk engine can use the columns as they are. ds3/ds1 rows are located with index
+    lookups instead of merges, every numeric ds2/ds3 column is written once into a single
+    float block and sentinels are masked over that block in one pass; other columns are
+    gathered directly. Inputs are not modified. Falls back to load_and_join when ds3 or
+    ds1 keys repeat.
+    """
+    b_keys = [_mct_keys(ds2[KEY_MCT]), _ym_keys(ds2[KEY_YM])]
+    order = np.lexsort([_sort_codes(b_keys[1]), _sort_codes(b_keys[0])])
+    b_keys = [k[order] for k in b_keys]
+    c_row = _row_indexer(b_keys, [_mct_keys(ds3[KEY_MCT]), _ym_keys(ds3[KEY_YM])])
+    a_row = _row_indexer(b_keys[:1], [_mct_keys(ds1[KEY_MCT])])
+    if c_row is None or a_row is None:
+        df = load_and_join(ds1, ds2, ds3)
+        df[KEY_MCT] = _mct_keys(df[KEY_MCT])
+        return df
+
+    n = len(ds2)
+    b_cols = [c for c in ds2.columns if c not in (KEY_MCT, KEY_YM)]
+    c_cols = [c for c in ds3.columns if c not in (KEY_MCT, KEY_YM)]
+    named = [(c, ds2[c], order) for c in b_cols] + [(c + "_C" if c in b_cols else c, ds3[c], c_row) for c in c_cols]
+
+    num = [i for i, (c, s, _) in enumerate(named) if not _skip_sentinel(c, s)]
+    dtype = "float32" if all(named[i][1].dtype == "float32" for i in num) and num else "float64"
+    block = np.empty((n, len(num)), dtype=dtype, order="F")
+    for j, i in enumerate(num):
+        _, s, row = named[i]
+        v = _numeric(s)
+        block[:, j] = v[np.maximum(row, 0)] if len(v) else np.nan
+        block[row < 0, j] = np.nan
+    block[block <= VERY_NEGATIVE_SV] = np.nan
+
+    data = {KEY_MCT: b_keys[0], KEY_YM: b_keys[1]}
+    slot = dict(zip(num, range(len(num))))
+    for i, (c, s, row) in enumerate(named):
+        if i in slot:
+            data[c] = block[:, slot[i]]
+        else:
+            data[c] = _take(s, row)
+
+    for c in ds1.columns:
+        if c == KEY_MCT:
+            continue
+        name = c
+        if c in data:
+            data[c + "_x"] = data.pop(c)
+            name = c + "_y"
+        data[name] = _take(ds1[c], a_row)
+    return pd.DataFrame(data, copy=False)
+
+
+def normalize_bins(df: pd.DataFrame, dtype="float64", inplace: bool = False) -> pd.DataFrame:
+    if not inplace:
+        df = df.copy()
+    for col in BIN_COLS:
         if col in df.columns:
             r = map_bin_to_rank(df[col])
-            df[col + "_RANK"] = r.fillna(0.5)
+            df[col + "_RANK"] = r.fillna(0.5).astype(dtype)
         else:
-            df[col + "_RANK"] = 0.5
+            df[col + "_RANK"] = np.full(len(df), 0.5, dtype=dtype)
     return df
\ No newline at end of file
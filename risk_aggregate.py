@@ -1,9 +1,14 @@
 import pandas as pd
 from config import ALPHA, BETA, GAMMA
-from risk_components import compute_sales_risk, compute_customer_risk, compute_market_risk
+from risk_components import (
+    compute_sales_risk, compute_customer_risk, compute_market_risk, compute_risk_components
+)
 
 
-def compute_all_risks(df: pd.DataFrame) -> pd.DataFrame:
+def compute_all_risks(df: pd.DataFrame, fused: bool = True) -> pd.DataFrame:
+    if fused:
+        return compute_risk_components(df)
+
     s = compute_sales_risk(df)
     c = compute_customer_risk(df)
     m = compute_market_risk(df)
@@ -17,4 +22,4 @@ def compute_all_risks(df: pd.DataFrame) -> pd.DataFrame:
             GAMMA * out["Market_Risk"].fillna(0)
     )
 
-    return out
\ No newline at end of file
+    return out
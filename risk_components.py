@@ -1,93 +1,194 @@
 import numpy as np
 import pandas as pd
 from typing import Tuple
-from config import ROLL_WINDOW, MIN_PERIODS, EPS
+from config import ROLL_WINDOW, MIN_PERIODS, ALPHA, BETA, GAMMA
 from utils import (
-    nz, relu_minus, logistic, to_percent, robust_z, mom
+    nz, relu_minus, logistic, to_percent, block_positions, block_mom, block_robust_stats
 )
 
+KEY = ["ENCODED_MCT", "TA_YM"]
+
+SALES_COLS = ["RC_M1_SAA_RANK", "RC_M1_TO_UE_CT_RANK", "RC_M1_AV_NP_AT_RANK", "APV_CE_RAT_RANK",
+              "M12_SME_RY_SAA_PCE_RT", "M12_SME_BZN_SAA_PCE_RT", "DLV_SAA_RAT"]
+AGE_COLS = ["M12_MAL_1020_RAT", "M12_MAL_30_RAT", "M12_MAL_40_RAT", "M12_MAL_50_RAT", "M12_MAL_60_RAT",
+            "M12_FME_1020_RAT", "M12_FME_30_RAT", "M12_FME_40_RAT", "M12_FME_50_RAT", "M12_FME_60_RAT"]
+TYPE_COLS = ["RC_M1_SHC_RSD_UE_CLN_RAT", "RC_M1_SHC_WP_UE_CLN_RAT", "RC_M1_SHC_FLP_UE_CLN_RAT"]
+CUSTOMER_COLS = ["RC_M1_UE_CUS_CN_RANK", "MCT_UE_CLN_REU_RAT", "MCT_UE_CLN_NEW_RAT"] + AGE_COLS + TYPE_COLS
+MARKET_COLS = ["M12_SME_RY_ME_MCT_RAT", "M12_SME_BZN_ME_MCT_RAT", "M1_SME_RY_SAA_RAT", "M1_SME_RY_CNT_RAT",
+               "MCT_OPE_MS_CN_RANK"]
+RISK_COLS = ["Sales_Risk", "Customer_Risk", "Market_Risk", "RiskScore"]
+
+
+class BlockSignals:
+    """mom / robust_z over the contiguous merchant blocks of a key-sorted panel.
+
+    With ``keep=True`` every series fed through it (and its median deviations) is
+    retained, so the rolling state of the last months can be extracted afterwards.
+    """
+
+    def __init__(self, pos: np.ndarray, keep: bool = False):
+        self.pos = pos
+        self.keep = keep
+        self.series = {}
+        self.devs = {}
+
+    def mom(self, name: str, x: np.ndarray) -> np.ndarray:
+        if self.keep:
+            self.series[name] = x
+        return block_mom(x, self.pos)
+
+    def robust_z(self, name: str, x: np.ndarray) -> np.ndarray:
+        med, _, z = block_robust_stats(x, self.pos, ROLL_WINDOW, MIN_PERIODS)
+        if self.keep:
+            self.series[name] = x
+            self.devs[name] = np.abs(x - med)
+        return z
+
+
+def _zero(s) -> np.ndarray:
+    s = np.asarray(s, dtype="float64")
+    return np.clip(np.nan_to_num(s, nan=0.0), 0.0, 1.0)
+
+
+def _col(d: pd.DataFrame, name: str, default: float) -> np.ndarray:
+    if name in d.columns:
+        return d[name].to_numpy(dtype="float64")
+    return np.full(len(d), default)
+
+
+def _key_order(df: pd.DataFrame, key) -> np.ndarray:
+    """Stable row order by ``key`` (NaN last), as sort_values would give, via factorized codes."""
+    codes = []
+    for k in key:
+        c, u = pd.factorize(df[k], sort=True)
+        codes.append(np.where(c < 0, len(u), c))
+    return np.lexsort(codes[::-1])
+
+
+def _sorted_panel(df: pd.DataFrame, cols, key=KEY) -> Tuple[pd.DataFrame, BlockSignals]:
+    """Gather only the columns a component needs, in key order, with at most one take per column."""
+    use = list(key) + [c for c in cols if c in df.columns and c not in key]
+    order = _key_order(df, key)
+    if (np.diff(order) == 1).all():
+        # 이미 키 순서(예: preprocessing.join_panel) → 복사 없이 컬럼을 그대로 사용
+        d = pd.DataFrame({c: df[c].array for c in use}, copy=False)
+    else:
+        d = pd.DataFrame({c: df[c].array.take(order) for c in use}, copy=False)
+    return d, BlockSignals(block_positions(d[key[0]]))
+
+
+def _sales_risk(d: pd.DataFrame, sig) -> np.ndarray:
+    rS = d["RC_M1_SAA_RANK"].to_numpy(dtype="float64")
+    rC = d["RC_M1_TO_UE_CT_RANK"].to_numpy(dtype="float64")
+    rA = d["RC_M1_AV_NP_AT_RANK"].to_numpy(dtype="float64")
+    rX = d["APV_CE_RAT_RANK"].to_numpy(dtype="float64")
+
+    s_drop = _zero(nz((relu_minus(sig.mom("RC_M1_SAA_RANK", rS)) + relu_minus(sig.mom("RC_M1_TO_UE_CT_RANK", rC))) / 2.0))
+    s_aov = _zero(nz(relu_minus(sig.robust_z("RC_M1_AV_NP_AT_RANK", rA))))
+    s_cxl = _zero(nz(np.maximum(rX, logistic(sig.robust_z("APV_CE_RAT_RANK", rX)))))
+
+    ind_rank = _zero(nz(1.0 - to_percent(_col(d, "M12_SME_RY_SAA_PCE_RT", 50.0))))
+    bzn_rank = _zero(nz(1.0 - to_percent(_col(d, "M12_SME_BZN_SAA_PCE_RT", 50.0))))
+    s_peer = _zero(nz((ind_rank + bzn_rank) / 2.0))
 
-def _zero(s: pd.Series) -> pd.Series:
-    return s.fillna(0.0).clip(0.0, 1.0)
+    dlv = _zero(nz(to_percent(_col(d, "DLV_SAA_RAT", 0.0))))
+    s_dlv_jump = _zero(nz(relu_minus(-sig.mom("DLV_SAA_RAT", dlv))
+                          + relu_minus(-sig.robust_z("DLV_SAA_RAT", dlv))))
 
+    return _zero(0.35 * s_drop + 0.15 * s_aov + 0.20 * s_cxl + 0.20 * s_peer + 0.10 * (dlv * s_dlv_jump))
 
-def compute_sales_risk(df: pd.DataFrame, key=["ENCODED_MCT", "TA_YM"]) -> pd.DataFrame:
-    d = df.sort_values(key).copy()
-    rS = d["RC_M1_SAA_RANK"];
-    rC = d["RC_M1_TO_UE_CT_RANK"];
-    rA = d["RC_M1_AV_NP_AT_RANK"];
-    rX = d["APV_CE_RAT_RANK"]
 
-    s_drop = _zero(nz((relu_minus(mom(rS)) + relu_minus(mom(rC))) / 2.0))
-    s_aov = _zero(nz(relu_minus(robust_z(rA, ROLL_WINDOW, MIN_PERIODS))))
-    s_cxl = _zero(nz(np.maximum(rX, logistic(robust_z(rX, ROLL_WINDOW, MIN_PERIODS)))))
+def _customer_risk(d: pd.DataFrame, sig) -> np.ndarray:
+    rU = d["RC_M1_UE_CUS_CN_RANK"].to_numpy(dtype="float64")
+    s_cus_drop = _zero(nz(relu_minus(sig.mom("RC_M1_UE_CUS_CN_RANK", rU))
+                          + relu_minus(sig.robust_z("RC_M1_UE_CUS_CN_RANK", rU))))
 
-    ind_rank = _zero(nz(1.0 - to_percent(d.get("M12_SME_RY_SAA_PCE_RT", pd.Series(50.0, index=d.index)))))
-    bzn_rank = _zero(nz(1.0 - to_percent(d.get("M12_SME_BZN_SAA_PCE_RT", pd.Series(50.0, index=d.index)))))
-    s_peer = _zero(nz((ind_rank + bzn_rank) / 2.0))
+    q_reu = _zero(nz(to_percent(_col(d, "MCT_UE_CLN_REU_RAT", 0.0))))
+    q_new = _zero(nz(to_percent(_col(d, "MCT_UE_CLN_NEW_RAT", 0.0))))
+    s_loyal = _zero(nz(relu_minus(sig.mom("MCT_UE_CLN_REU_RAT", q_reu))))
+    s_acq = _zero(nz(relu_minus(sig.mom("MCT_UE_CLN_NEW_RAT", q_new))))
 
-    dlv_raw = d["DLV_SAA_RAT"] if "DLV_SAA_RAT" in d.columns else pd.Series(0.0, index=d.index)
-    dlv = _zero(nz(to_percent(dlv_raw)))
-    s_dlv_jump = _zero(nz(relu_minus(-mom(dlv)) + relu_minus(-robust_z(dlv, ROLL_WINDOW, MIN_PERIODS))))
+    w = _zero(np.column_stack([_col(d, c, 0.0) for c in AGE_COLS]) / 100.0)
+    H_age = (w * w).sum(axis=1)
+    v = _zero(np.column_stack([_col(d, c, 0.0) for c in TYPE_COLS]) / 100.0)
+    H_type = (v * v).sum(axis=1)
 
-    sales_risk = _zero(0.35 * s_drop + 0.15 * s_aov + 0.20 * s_cxl + 0.20 * s_peer + 0.10 * (dlv * s_dlv_jump))
-    out = d[["ENCODED_MCT", "TA_YM"]].copy()
-    out["Sales_Risk"] = sales_risk
-    return out
+    def pos_norm(name: str, x: np.ndarray) -> np.ndarray:
+        return _zero(nz(np.maximum(0.0, sig.robust_z(name, x))))
 
+    s_mix = pos_norm("H_AGE", H_age)
+    s_type = pos_norm("H_TYPE", H_type)
 
-def compute_customer_risk(df: pd.DataFrame, key=["ENCODED_MCT", "TA_YM"]) -> pd.DataFrame:
-    d = df.sort_values(key).copy()
-    rU = d["RC_M1_UE_CUS_CN_RANK"]
-    s_cus_drop = _zero(nz(relu_minus(mom(rU)) + relu_minus(robust_z(rU, ROLL_WINDOW, MIN_PERIODS))))
-
-    q_reu = _zero(nz(to_percent(d.get("MCT_UE_CLN_REU_RAT", pd.Series(0.0, index=d.index)))))
-    q_new = _zero(nz(to_percent(d.get("MCT_UE_CLN_NEW_RAT", pd.Series(0.0, index=d.index)))))
-    s_loyal = _zero(nz(relu_minus(mom(q_reu))))
-    s_acq = _zero(nz(relu_minus(mom(q_new))))
-
-    age_cols = ["M12_MAL_1020_RAT", "M12_MAL_30_RAT", "M12_MAL_40_RAT", "M12_MAL_50_RAT", "M12_MAL_60_RAT",
-                "M12_FME_1020_RAT", "M12_FME_30_RAT", "M12_FME_40_RAT", "M12_FME_50_RAT", "M12_FME_60_RAT"]
-    for col in age_cols:
-        if col not in d.columns: d[col] = 0.0
-    w = _zero(pd.DataFrame({c: d[c] for c in age_cols}).fillna(0) / 100.0).to_numpy(dtype="float64")
-    H_age = pd.Series((w * w).sum(axis=1), index=d.index)
-
-    type_cols = ["RC_M1_SHC_RSD_UE_CLN_RAT", "RC_M1_SHC_WP_UE_CLN_RAT", "RC_M1_SHC_FLP_UE_CLN_RAT"]
-    for col in type_cols:
-        if col not in d.columns: d[col] = 0.0
-    v = _zero(pd.DataFrame({c: d[c] for c in type_cols}).fillna(0) / 100.0).to_numpy(dtype="float64")
-    H_type = pd.Series((v * v).sum(axis=1), index=d.index)
-
-    def pos_norm(x: pd.Series) -> pd.Series:
-        med = x.rolling(ROLL_WINDOW, MIN_PERIODS).median()
-        mad = (x - med).abs().rolling(ROLL_WINDOW, MIN_PERIODS).median()
-        z = (x - med) / (1.4826 * mad + EPS)
-        return _zero(nz(np.maximum(0.0, z)))
-
-    s_mix = pos_norm(H_age)
-    s_type = pos_norm(H_type)
-
-    customer_risk = _zero(0.40 * s_cus_drop + 0.25 * s_loyal + 0.20 * s_acq + 0.10 * s_mix + 0.05 * s_type)
-    out = d[["ENCODED_MCT", "TA_YM"]].copy()
-    out["Customer_Risk"] = customer_risk
-    return out
+    return _zero(0.40 * s_cus_drop + 0.25 * s_loyal + 0.20 * s_acq + 0.10 * s_mix + 0.05 * s_type)
 
 
-def compute_market_risk(df: pd.DataFrame, key=["ENCODED_MCT", "TA_YM"]) -> pd.DataFrame:
-    d = df.sort_values(key).copy()
-    h_ind = _zero(nz(to_percent(d.get("M12_SME_RY_ME_MCT_RAT", pd.Series(0.0, index=d.index)))))
-    h_bzn = _zero(nz(to_percent(d.get("M12_SME_BZN_ME_MCT_RAT", pd.Series(0.0, index=d.index)))))
+def _market_risk(d: pd.DataFrame) -> np.ndarray:
+    h_ind = _zero(nz(to_percent(_col(d, "M12_SME_RY_ME_MCT_RAT", 0.0))))
+    h_bzn = _zero(nz(to_percent(_col(d, "M12_SME_BZN_ME_MCT_RAT", 0.0))))
     s_closure_env = _zero((h_ind + h_bzn) / 2.0)
 
-    u_rev = _zero(nz(1.0 - to_percent(d.get("M1_SME_RY_SAA_RAT", pd.Series(100.0, index=d.index)))))
-    u_cnt = _zero(nz(1.0 - to_percent(d.get("M1_SME_RY_CNT_RAT", pd.Series(100.0, index=d.index)))))
+    u_rev = _zero(nz(1.0 - to_percent(_col(d, "M1_SME_RY_SAA_RAT", 100.0))))
+    u_cnt = _zero(nz(1.0 - to_percent(_col(d, "M1_SME_RY_CNT_RAT", 100.0))))
     s_underperf = _zero((u_rev + u_cnt) / 2.0)
 
-    a = d["MCT_OPE_MS_CN_RANK"]
+    a = d["MCT_OPE_MS_CN_RANK"].to_numpy(dtype="float64")
     s_age = _zero(nz(4.0 * np.minimum(a, 1.0 - a)))
 
-    market_risk = _zero(0.50 * s_closure_env + 0.35 * s_underperf + 0.15 * s_age)
-    out = d[["ENCODED_MCT", "TA_YM"]].copy()
-    out["Market_Risk"] = market_risk
-    return out
\ No newline at end of file
+    return _zero(0.50 * s_closure_env + 0.35 * s_underperf + 0.15 * s_age)
+
+
+def compute_sales_risk(df: pd.DataFrame, key=KEY) -> pd.DataFrame:
+    d, sig = _sorted_panel(df, SALES_COLS, key)
+    out = d[list(key)].copy()
+    out["Sales_Risk"] = _sales_risk(d, sig)
+    return out
+
+
+def compute_customer_risk(df: pd.DataFrame, key=KEY) -> pd.DataFrame:
+    d, sig = _sorted_panel(df, CUSTOMER_COLS, key)
+    out = d[list(key)].copy()
+    out["Customer_Risk"] = _customer_risk(d, sig)
+    return out
+
+
+def compute_market_risk(df: pd.DataFrame, key=KEY) -> pd.DataFrame:
+    d, _ = _sorted_panel(df, MARKET_COLS, key)
+    out = d[list(key)].copy()
+    out["Market_Risk"] = _market_risk(d)
+    return out
+
+
+def fuse_risk_components(d: pd.DataFrame, sig=None, key=KEY) -> pd.DataFrame:
+    """Write the three components and RiskScore as columns of an already key-sorted frame, in place.
+
+    ``sig`` supplies mom/robust_z; it defaults to block kernels over ``d`` itself.
+    """
+    if sig is None:
+        sig = BlockSignals(block_positions(d[key[0]]))
+    sales = _sales_risk(d, sig)
+    customer = _customer_risk(d, sig)
+    market = _market_risk(d)
+
+    score = np.multiply(ALPHA, sales)
+    score += BETA * customer
+    score += GAMMA * market
+
+    d["Sales_Risk"] = sales
+    d["Customer_Risk"] = customer
+    d["Market_Risk"] = market
+    d["RiskScore"] = score
+    return d
+
+
+def compute_risk_components(df: pd.DataFrame, key=KEY, keep_signals: bool = False):
+    """Single-sort engine: all three components over per-merchant blocks, plus RiskScore.
+
+    With ``keep_signals=True`` the BlockSignals holding every rolling series is returned too.
+    """
+    d, sig = _sorted_panel(df, SALES_COLS + CUSTOMER_COLS + MARKET_COLS, key)
+    sig.keep = keep_signals
+    fuse_risk_components(d, sig, key)
+    d.drop(columns=[c for c in d.columns if c not in key and c not in RISK_COLS], inplace=True)
+    if keep_signals:
+        return d, sig
+    return d
@@ -0,0 +1,126 @@
+import os
+import numpy as np
+import pandas as pd
+from config import ROLL_WINDOW, MIN_PERIODS, EPS
+from utils import window_median
+
+KEY_MCT = "ENCODED_MCT"
+KEY_YM = "TA_YM"
+
+# Every series the risk components feed through mom() / robust_z().
+SERIES = [
+    "RC_M1_SAA_RANK", "RC_M1_TO_UE_CT_RANK", "RC_M1_AV_NP_AT_RANK", "APV_CE_RAT_RANK", "DLV_SAA_RAT",
+    "RC_M1_UE_CUS_CN_RANK", "MCT_UE_CLN_REU_RAT", "MCT_UE_CLN_NEW_RAT", "H_AGE", "H_TYPE",
+]
+_SERIES_POS = {name: i for i, name in enumerate(SERIES)}
+
+
+class StateSignals:
+    """mom / robust_z for one new month per merchant, continuing from persisted windows."""
+
+    def __init__(self, values: np.ndarray, devs: np.ndarray):
+        self.values = values
+        self.devs = devs
+        self.new_values = np.full(values.shape[:2], np.nan)
+        self.new_devs = np.full(values.shape[:2], np.nan)
+
+    def mom(self, name: str, x: np.ndarray) -> np.ndarray:
+        s = _SERIES_POS[name]
+        self.new_values[:, s] = x
+        return x - self.values[:, s, -1]
+
+    def robust_z(self, name: str, x: np.ndarray) -> np.ndarray:
+        s = _SERIES_POS[name]
+        med = window_median(np.column_stack([self.values[:, s, 1:], x]), MIN_PERIODS)
+        dev = np.abs(x - med)
+        mad = 1.4826 * window_median(np.column_stack([self.devs[:, s, 1:], dev]), MIN_PERIODS)
+        self.new_values[:, s] = x
+        self.new_devs[:, s] = dev
+        return (x - med) / (mad + EPS)
+
+
+class RollingState:
+    """Last ROLL_WINDOW values (and median deviations) of every rolling series, per merchant."""
+
+    def __init__(self, ids: np.ndarray, last_ym: np.ndarray, values: np.ndarray, devs: np.ndarray):
+        self.ids = np.asarray(ids, dtype=object)
+        self.last_ym = np.asarray(last_ym, dtype="datetime64[ns]")
+        self.values = values
+        self.devs = devs
+        self._index = pd.Index(self.ids)
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def empty(cls) -> "RollingState":
+        shape = (0, len(SERIES), ROLL_WINDOW)
+        return cls(np.array([], dtype=object), np.array([], dtype="datetime64[ns]"),
+                   np.full(shape, np.nan), np.full(shape, np.nan))
+
+    @classmethod
+    def from_signals(cls, panel: pd.DataFrame, sig) -> "RollingState":
+        """Build the state from a key-sorted panel and the BlockSignals(keep=True) that scored it."""
+        pos = sig.pos
+        n = len(panel)
+        ends = np.flatnonzero(np.append(pos[1:] == 0, True)) if n else np.zeros(0, dtype="int64")
+        values = np.full((len(ends), len(SERIES), ROLL_WINDOW), np.nan)
+        devs = np.full_like(values, np.nan)
+        for j in range(ROLL_WINDOW):
+            lag = ROLL_WINDOW - 1 - j
+            ok = pos[ends] >= lag
+            idx = ends[ok] - lag
+            for name, s in _SERIES_POS.items():
+                if name in sig.series:
+                    values[ok, s, j] = sig.series[name][idx]
+                if name in sig.devs:
+                    devs[ok, s, j] = sig.devs[name][idx]
+        return cls(panel[KEY_MCT].to_numpy()[ends], panel[KEY_YM].to_numpy()[ends], values, devs)
+
+    def signals(self, ids: np.ndarray, ym) -> StateSignals:
+        """Signals for one new month; ``ids`` must be unique and newer than the stored month."""
+        rows = self._index.get_indexer(ids)
+        known = rows >= 0
+        stale = self.last_ym[rows[known]] >= np.datetime64(ym, "ns")
+        if stale.any():
+            raise ValueError(f"{int(stale.sum())} merchants already scored up to {pd.Timestamp(ym):%Y-%m}")
+        values = np.full((len(ids), len(SERIES), ROLL_WINDOW), np.nan)
+        devs = np.full_like(values, np.nan)
+        values[known] = self.values[rows[known]]
+        devs[known] = self.devs[rows[known]]
+        return StateSignals(values, devs)
+
+    def advance(self, ids: np.ndarray, ym, sig: StateSignals) -> "RollingState":
+        """Append one month of values (recorded in ``sig``) and return the updated state."""
+        values = np.concatenate([sig.values[:, :, 1:], sig.new_values[:, :, None]], axis=2)
+        devs = np.concatenate([sig.devs[:, :, 1:], sig.new_devs[:, :, None]], axis=2)
+
+        rows = self._index.get_indexer(ids)
+        known = rows >= 0
+        state_values = self.values.copy()
+        state_devs = self.devs.copy()
+        last_ym = self.last_ym.copy()
+        state_values[rows[known]] = values[known]
+        state_devs[rows[known]] = devs[known]
+        last_ym[rows[known]] = np.datetime64(ym, "ns")
+
+        new = ~known
+        return RollingState(
+            np.concatenate([self.ids, np.asarray(ids, dtype=object)[new]]),
+            np.concatenate([last_ym, np.full(int(new.sum()), np.datetime64(ym, "ns"))]),
+            np.concatenate([state_values, values[new]]),
+            np.concatenate([state_devs, devs[new]]),
+        )
+
+    def save(self, path: str):
+        tmp = path + ".tmp.npz"
+        np.savez(tmp, ids=self.ids.astype(str), last_ym=self.last_ym.astype("int64"),
+                 values=self.values, devs=self.devs, series=np.array(SERIES), window=ROLL_WINDOW)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "RollingState":
+        with np.load(path, allow_pickle=False) as z:
+            if list(z["series"]) != SERIES or int(z["window"]) != ROLL_WINDOW:
+                raise ValueError(f"rolling state {path} was built with a different series set or ROLL_WINDOW")
+            return cls(z["ids"].astype(object), z["last_ym"].astype("datetime64[ns]"), z["values"], z["devs"])
@@ -1,20 +1,20 @@
-import os, sys, pandas as pd
-
-
-def read_csv_smart(path):
-    for enc in ["utf-8", "cp949", "euc-kr", "latin1"]:
-        try:
-            return pd.read_csv(path, encoding=enc)
-        except Exception:
-            pass
-    raise RuntimeError(f"CSV 인코딩 해석 실패: {path}")
+import os, sys, argparse
 
 
 def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--profile", metavar="PATH", default=None,
+                    help="write the per-stage trace (time, rows, memory, warnings) to PATH as JSON")
+    ap.add_argument("--profile-alloc", action="store_true",
+                    help="also record tracemalloc peaks per stage (slow)")
+    args = ap.parse_args()
+
     base_dir = os.path.dirname(os.path.abspath(__file__))
     sys.path.insert(0, base_dir)
 
     from pipeline import run_pipeline  # model_test 안에 pipeline.py 필요
+    from ingest import read_table as read_csv_smart
+    from tracing import Trace
     data_dir = os.path.join(base_dir, "data")
 
     ds1 = read_csv_smart(os.path.join(data_dir, "big_data_set1_f.csv"))
@@ -24,10 +24,14 @@ def main():
     preds_path = os.path.join(data_dir, "preds.csv")
     preds = read_csv_smart(preds_path) if os.path.exists(preds_path) else None
 
-    out = run_pipeline(ds1, ds2, ds3, preds)
+    trace = Trace(alloc=args.profile_alloc, echo=args.profile is not None)
+    out = run_pipeline(ds1, ds2, ds3, preds, trace=trace)
     out_path = os.path.join(base_dir, "risk_output.csv")
     out.to_csv(out_path, index=False)
     print("Saved:", out_path)
+    if args.profile:
+        trace.save_json(args.profile)
+        print("Saved:", args.profile)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,175 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+from typing import Optional
+
+
+class TDigest:
+    """Mergeable quantile sketch (merging t-digest, arcsine scale function).
+
+    Centroids are kept as parallel mean/weight arrays. While every centroid still holds a
+    single point, quantile() reproduces pandas' linear interpolation exactly; after
+    compression the tails stay fine-grained and the middle is coarsened.
+    """
+
+    def __init__(self, delta: float = 200.0, means=None, weights=None,
+                 vmin: float = np.inf, vmax: float = -np.inf, buffer: int = 2048):
+        self.delta = float(delta)
+        self.means = np.asarray(means if means is not None else [], dtype="float64")
+        self.weights = np.asarray(weights if weights is not None else [], dtype="float64")
+        self.vmin = float(vmin)
+        self.vmax = float(vmax)
+        self.buffer = buffer
+        self._pending = []
+
+    @property
+    def count(self) -> float:
+        self._flush()
+        return float(self.weights.sum())
+
+    def update(self, values) -> "TDigest":
+        v = np.asarray(values, dtype="float64")
+        v = v[~np.isnan(v)]
+        if len(v):
+            self._pending.append(v)
+            self.vmin = min(self.vmin, float(v.min()))
+            self.vmax = max(self.vmax, float(v.max()))
+            if sum(len(p) for p in self._pending) >= self.buffer:
+                self._flush()
+        return self
+
+    def merge(self, other: "TDigest") -> "TDigest":
+        other._flush()
+        self._flush(extra=(other.means, other.weights))
+        self.vmin = min(self.vmin, other.vmin)
+        self.vmax = max(self.vmax, other.vmax)
+        return self
+
+    def _flush(self, extra=None):
+        parts_m = [self.means] + self._pending
+        parts_w = [self.weights] + [np.ones(len(p)) for p in self._pending]
+        if extra is not None:
+            parts_m.append(extra[0])
+            parts_w.append(extra[1])
+        if len(parts_m) == 1:
+            return
+        self._pending = []
+        m = np.concatenate(parts_m)
+        w = np.concatenate(parts_w)
+        order = np.argsort(m, kind="mergesort")
+        self.means, self.weights = self._compress(m[order], w[order])
+
+    def _compress(self, m: np.ndarray, w: np.ndarray):
+        if len(m) <= self.delta:
+            return m, w
+        total = w.sum()
+        q = (np.cumsum(w) - w / 2.0) / total
+        k = self.delta / np.pi * np.arcsin(2.0 * q - 1.0)
+        bucket = np.floor(k - k[0]).astype("int64")
+        starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+        ws = np.add.reduceat(w, starts)
+        ms = np.add.reduceat(m * w, starts) / ws
+        return ms, ws
+
+    def quantile(self, qs) -> np.ndarray:
+        self._flush()
+        qs = np.atleast_1d(np.asarray(qs, dtype="float64"))
+        if not len(self.weights):
+            return np.full(len(qs), np.nan)
+        w = self.weights
+        n = w.sum()
+        # 각 중심점의 '가운데 점' 위치 (0-based) — 단일 점일 때 pandas 선형보간과 동일
+        pos = np.cumsum(w) - w + (w - 1.0) / 2.0
+        target = qs * (n - 1.0)
+        out = np.interp(target, pos, self.means)
+        return np.clip(out, self.vmin, self.vmax)
+
+    def to_arrays(self):
+        self._flush()
+        return self.means, self.weights
+
+
+class QuantileSketchStore:
+    """One TDigest per group (e.g. HPSN_MCT_ZCD_NM, optionally TA_YM).
+
+    Stores built on different shards, workers or months merge with ``merge``; ``thresholds``
+    returns the same table layout as alerting.alert_thresholds, so it plugs into
+    apply_alert_thresholds.
+    """
+
+    def __init__(self, group_cols=("HPSN_MCT_ZCD_NM",), delta: float = 200.0):
+        self.group_cols = list(group_cols)
+        self.delta = float(delta)
+        self.digests = {}
+
+    def __len__(self):
+        return len(self.digests)
+
+    def _digest(self, key) -> TDigest:
+        d = self.digests.get(key)
+        if d is None:
+            d = self.digests[key] = TDigest(self.delta)
+        return d
+
+    def update(self, df: pd.DataFrame, score_col: str = "p_final") -> "QuantileSketchStore":
+        if not self.group_cols:
+            self._digest(()).update(df[score_col].to_numpy())
+            return self
+        for key, s in df.groupby(self.group_cols, sort=False)[score_col]:
+            key = key if isinstance(key, tuple) else (key,)
+            self._digest(tuple(_plain(k) for k in key)).update(s.to_numpy())
+        return self
+
+    def merge(self, other: "QuantileSketchStore") -> "QuantileSketchStore":
+        if other.group_cols != self.group_cols:
+            raise ValueError(f"cannot merge sketches grouped by {other.group_cols} into {self.group_cols}")
+        for key, d in other.digests.items():
+            self._digest(key).merge(d)
+        return self
+
+    def thresholds(self, q_y=0.80, q_o=0.90, q_r=0.97) -> pd.DataFrame:
+        keys = sorted(self.digests, key=lambda k: tuple(str(x) for x in k))
+        rows = [list(k) + list(self.digests[k].quantile([q_y, q_o, q_r])) for k in keys]
+        thr = pd.DataFrame(rows, columns=self.group_cols + ["yellow", "orange", "red"])
+        if "TA_YM" in self.group_cols:
+            thr["TA_YM"] = pd.to_datetime(thr["TA_YM"])
+        return thr
+
+    def save(self, path: str):
+        keys = list(self.digests)
+        arrays = [self.digests[k].to_arrays() for k in keys]
+        sizes = np.array([len(m) for m, _ in arrays], dtype="int64")
+        meta = {"group_cols": self.group_cols, "delta": self.delta,
+                "keys": [[str(x) for x in k] for k in keys],
+                "ranges": [[self.digests[k].vmin, self.digests[k].vmax] for k in keys]}
+        tmp = path + ".tmp.npz"
+        np.savez(tmp, meta=np.array(json.dumps(meta, ensure_ascii=False)), sizes=sizes,
+                 means=np.concatenate([m for m, _ in arrays]) if arrays else np.zeros(0),
+                 weights=np.concatenate([w for _, w in arrays]) if arrays else np.zeros(0))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "QuantileSketchStore":
+        with np.load(path, allow_pickle=False) as z:
+            meta = json.loads(str(z["meta"]))
+            store = cls(meta["group_cols"], meta["delta"])
+            bounds = np.r_[0, np.cumsum(z["sizes"])]
+            for i, key in enumerate(meta["keys"]):
+                lo, hi = bounds[i], bounds[i + 1]
+                vmin, vmax = meta["ranges"][i]
+                store.digests[tuple(key)] = TDigest(store.delta, z["means"][lo:hi], z["weights"][lo:hi], vmin, vmax)
+        return store
+
+    @classmethod
+    def load_or_new(cls, path: Optional[str], group_cols=("HPSN_MCT_ZCD_NM",), delta: float = 200.0):
+        if path and os.path.exists(path):
+            return cls.load(path)
+        return cls(group_cols, delta)
+
+
+def _plain(k) -> str:
+    # 저장/병합 시 키 타입이 달라지지 않도록 문자열로 정규화 (월은 YYYY-MM-DD)
+    if isinstance(k, (pd.Timestamp, np.datetime64)):
+        return pd.Timestamp(k).strftime("%Y-%m-%d")
+    return str(k)
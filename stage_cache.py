@@ -0,0 +1,71 @@
+import os
+import json
+import pickle
+import hashlib
+import pandas as pd
+from typing import Optional
+import config
+
+# 단계 코드가 바뀌어 결과가 달라지면 올린다 (기존 캐시 무효화)
+STAGE_CACHE_VERSION = 1
+
+# 각 단계의 결과에 영향을 주는 config 상수
+STAGE_CONFIG = {
+    "joined": ["VERY_NEGATIVE_SV"],
+    "normalized": ["BIN2RANK"],
+    "risks": ["ALPHA", "BETA", "GAMMA", "ROLL_WINDOW", "MIN_PERIODS", "EPS"],
+}
+
+
+def frame_digest(df: Optional[pd.DataFrame]) -> str:
+    """Content hash of a frame: column names, dtypes and row values (index ignored)."""
+    h = hashlib.blake2b(digest_size=16)
+    if df is None:
+        return h.hexdigest()
+    h.update(json.dumps([[str(c), str(t)] for c, t in df.dtypes.items()]).encode("utf-8"))
+    h.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def stage_keys(input_digest: str, **flags) -> dict:
+    """Chained keys: each stage's key covers its input's key plus its own config constants."""
+    keys, prev = {}, json.dumps([STAGE_CACHE_VERSION, input_digest, sorted(flags.items())])
+    for stage, names in STAGE_CONFIG.items():
+        consts = json.dumps({n: getattr(config, n) for n in names}, sort_keys=True, ensure_ascii=False, default=str)
+        prev = hashlib.blake2b((prev + stage + consts).encode("utf-8"), digest_size=16).hexdigest()
+        keys[stage] = prev
+    return keys
+
+
+class StageCache:
+    """On-disk, content-addressed store of pipeline stage outputs (one pickle per stage/key)."""
+
+    def __init__(self, root: str):
+        self.root = root
+        self.hits = []
+        self.misses = []
+
+    def _path(self, stage: str, key: str) -> str:
+        return os.path.join(self.root, f"{stage}-{key}.pkl")
+
+    def get(self, stage: str, key: str) -> Optional[pd.DataFrame]:
+        path = self._path(stage, key)
+        try:
+            df = pd.read_pickle(path)
+        except (OSError, EOFError, ValueError, pickle.UnpicklingError):
+            self.misses.append(stage)
+            return None
+        self.hits.append(stage)
+        return df
+
+    def put(self, stage: str, key: str, df: pd.DataFrame):
+        os.makedirs(self.root, exist_ok=True)
+        path = self._path(stage, key)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        try:
+            df.to_pickle(tmp)
+            os.replace(tmp, path)
+        except OSError as e:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            print(f"[warn] stage cache write skipped for {stage}: {e}")
@@ -0,0 +1,25 @@
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 저장소 루트의 평면 모듈 (utils, pipeline, alerting, api ...) import
+sys.path.insert(0, ROOT)
+
+# API 테스트: asyncpg/PostgreSQL 없이 sqlite, 위험도 파일/스냅샷은 임시 디렉터리
+_tmp = tempfile.mkdtemp(prefix="api_test_")
+os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{os.path.join(_tmp, 'test.db')}")
+os.environ.setdefault("BASE_DIR", _tmp)
+os.environ.setdefault("RISK_SNAPSHOT_DIR", "")
+
+# 저장소의 .env(쉼표 구분 CORS_ORIGINS)는 pydantic-settings가 List로 읽지 못하므로
+# 설정은 .env가 없는 디렉터리에서 한 번 만들어 둔다 (API 의존성이 없으면 해당 테스트는 skip)
+_cwd = os.getcwd()
+os.chdir(os.path.dirname(os.path.abspath(__file__)))
+try:
+    import api.config  # noqa: F401
+except ImportError:
+    pass
+finally:
+    os.chdir(_cwd)
@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from alerting import AlertState, assign_alert
+from config import THRESHOLDS
+
+LEVELS = ["GREEN", "YELLOW", "ORANGE", "RED"]
+
+
+def reference_alerts(prob, ids, k=THRESHOLDS["persistence_k"]):
+    """Row-by-row loop: per merchant, latch each level on its threshold, release below threshold - delta."""
+    ts = [THRESHOLDS["yellow"], THRESHOLDS["orange"], THRESHOLDS["red"]]
+    delta = THRESHOLDS["delta"]
+    out, prev, latches, window = [], None, None, None
+    for p, m in zip(prob, ids):
+        if m != prev:
+            prev, latches, window = m, [False, False, False], []
+        window = (window + [p])[-k:]
+        vals = [v for v in window if not np.isnan(v)]
+        pbar = np.mean(vals) if vals else np.nan
+        for i, t in enumerate(ts):
+            on = p >= t and (i < 2 or pbar >= ts[2] - delta)
+            if on:
+                latches[i] = True
+            elif p < t - delta:
+                latches[i] = False
+        out.append(LEVELS[sum(latches)])
+    return out
+
+
+def _panel(n_merchants=300, n_months=12, seed=0):
+    rng = np.random.default_rng(seed)
+    ids = np.repeat([f"M{i:04d}" for i in range(n_merchants)], n_months)
+    months = np.tile(np.arange(n_months), n_merchants)
+    prob = rng.uniform(0.0, 0.6, len(ids))
+    prob[rng.random(len(ids)) < 0.1] = np.nan
+    return pd.DataFrame({"ENCODED_MCT": ids, "month": months, "prob": prob})
+
+
+def test_assign_alert_matches_row_by_row_reference():
+    df = _panel()
+    got = assign_alert(df["prob"], ids=df["ENCODED_MCT"])
+    assert got.tolist() == reference_alerts(df["prob"].tolist(), df["ENCODED_MCT"].tolist())
+
+
+def test_assign_alert_split_through_saved_state_matches_full_run(tmp_path):
+    df = _panel()
+    full = assign_alert(df["prob"], ids=df["ENCODED_MCT"])
+
+    head, tail = df[df["month"] < 5], df[df["month"] >= 5]
+    lbl_head, state = assign_alert(head["prob"], ids=head["ENCODED_MCT"], return_state=True)
+    path = str(tmp_path / "alert_state.npz")
+    state.save(path)
+    lbl_tail, state = assign_alert(tail["prob"], ids=tail["ENCODED_MCT"], state=AlertState.load(path),
+                                   return_state=True)
+
+    assert pd.concat([lbl_head, lbl_tail]).sort_index().tolist() == full.tolist()
+    assert len(state) == df["ENCODED_MCT"].nunique()
+
+
+def test_assign_alert_rejects_non_adjacent_merchant_blocks():
+    prob = pd.Series([0.1, 0.2, 0.3, 0.4])
+    with pytest.raises(ValueError, match="non-adjacent"):
+        assign_alert(prob, ids=np.array(["a", "b", "a", "b"]))
@@ -0,0 +1,93 @@
+import asyncio
+import random
+
+import pytest
+
+pytest.importorskip("sqlalchemy")
+pytest.importorskip("aiosqlite")
+
+from api.service.prediction import BASE_MARKET, quickscore, quickscore_batch
+
+
+def _payloads(n, seed=0):
+    rng = random.Random(seed)
+    industries = list(BASE_MARKET) + ["한식", None]
+    regions = ["서울 성동구", "성동구", "수원시", "", None]
+
+    def amount(scale):
+        return rng.choice([None, 0, 0.0, rng.uniform(0, scale), rng.uniform(0, scale)])
+
+    out = []
+    for i in range(n):
+        p = {"store_id": rng.choice([None, f"S{i:05d}"]), "target_month": rng.choice([None, "2024-06"]),
+             "industry_code": rng.choice(industries), "region_code": rng.choice(regions),
+             "delivery_share": rng.choice([None, 0.0, 1.0, rng.random()]),
+             "sales_1m": amount(3e7), "sales_3m_avg": amount(3e7),
+             "cust_1m": amount(2000), "cust_3m_avg": amount(2000)}
+        if rng.random() < 0.2:  # 키 자체가 없는 payload
+            for k in rng.sample(sorted(p), 3):
+                del p[k]
+        out.append(p)
+    return out
+
+
+def test_quickscore_batch_matches_per_item_quickscore():
+    payloads = _payloads(5000)
+    payloads += [{}, {"industry_code": "치킨", "region_code": "강남구", "sales_1m": 0, "sales_3m_avg": 0},
+                 {"sales_1m": 1e7, "sales_3m_avg": None, "cust_1m": 100, "cust_3m_avg": 0}]
+    assert quickscore_batch(payloads) == [quickscore(p) for p in payloads]
+    assert quickscore_batch([]) == []
+
+
+def test_batch_endpoint_bulk_inserts_history(monkeypatch):
+    pytest.importorskip("httpx")
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from sqlalchemy import select
+    from api import database
+    from api.routes import prediction
+
+    inserts = []
+    save = prediction.save_predictions
+
+    async def counting_save(db, rows):
+        inserts.append(len(rows))
+        return await save(db, rows)
+
+    monkeypatch.setattr(prediction, "save_predictions", counting_save)
+    # 규칙 점수는 ~0.26이 상한이라 경보 구간을 낮춰 high_risk_stores 경로를 태운다
+    from api.service import prediction as service
+    monkeypatch.setattr(service, "_label_alert", lambda p: "RED" if p >= 0.24 else "GREEN")
+    asyncio.run(database.init_db())
+    app = FastAPI()
+    app.include_router(prediction.router, prefix="/api/v1/predict")
+
+    stores = [
+        {"store_id": "LOW", "industry_code": "편의점", "sales_1m": 3e7, "sales_3m_avg": 3e7},
+        {"store_id": "DROP", "industry_code": "피자", "region_code": "성동구", "delivery_share": 1.0,
+         "sales_1m": 1e6, "sales_3m_avg": 3e7, "cust_1m": 10, "cust_3m_avg": 1000},
+        {"industry_code": "피자", "region_code": "성동구", "delivery_share": 1.0,
+         "sales_1m": 1e6, "sales_3m_avg": 3e7, "cust_1m": 10, "cust_3m_avg": 1000},
+    ]
+    resp = TestClient(app).post("/api/v1/predict/batch", json={"stores": stores},
+                                headers={"user-agent": "batch-test"})
+    assert resp.status_code == 200, resp.text
+    body = resp.json()
+
+    expected = quickscore_batch(stores)
+    assert [r["p_final"] for r in body["results"]] == [e["p_final"] for e in expected]
+    assert body["high_risk_stores"] == ["DROP", "#2"]
+    assert body["summary"]["count"] == 3
+    assert body["summary"]["alert_counts"] == {"GREEN": 1, "RED": 2}
+    assert body["summary"]["p_final_max"] == max(e["p_final"] for e in expected)
+    assert inserts == [3]  # 한 번의 multi-row INSERT
+
+    async def stored():
+        async with database.AsyncSessionLocal() as db:
+            q = select(database.PredictionHistory).where(database.PredictionHistory.user_agent == "batch-test")
+            return (await db.execute(q)).scalars().all()
+
+    rows = asyncio.run(stored())
+    assert sorted(r.store_id or "" for r in rows) == ["", "DROP", "LOW"]
+    assert sorted(r.p_final for r in rows) == sorted(e["p_final"] for e in expected)
+    assert len({r.created_at for r in rows}) == 1 and rows[0].created_at is not None
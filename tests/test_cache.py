@@ -0,0 +1,164 @@
+import asyncio
+import time
+
+import pytest
+
+pytest.importorskip("redis")
+fakeredis = pytest.importorskip("fakeredis")
+
+from api.cache import LocalCache, TieredCache
+
+
+async def _settle():
+    # 무효화 메시지가 다른 계층의 리스너에 도착할 때까지
+    await asyncio.sleep(0.05)
+
+
+async def _pair():
+    server = fakeredis.FakeServer()
+    a = TieredCache(fakeredis.FakeAsyncRedis(server=server), LocalCache(100, 60))
+    b = TieredCache(fakeredis.FakeAsyncRedis(server=server), LocalCache(100, 60))
+    a.start()
+    b.start()
+    await _settle()
+    return a, b
+
+
+def test_tiers_stay_coherent_after_set_and_delete():
+    async def main():
+        a, b = await _pair()
+        await a.set("k", {"v": 1}, 100)
+        await _settle()
+        assert await b.get("k") == {"v": 1}
+        assert await b.get("k") == {"v": 1}
+        assert (b.redis_hits, b.local.hits) == (1, 1)  # 두 번째는 로컬 계층에서
+
+        await a.set("k", {"v": 2}, 100)
+        await _settle()
+        assert await b.get("k") == {"v": 2}
+
+        await b.delete("k")
+        await _settle()
+        assert await a.get("k") is None
+        assert a.invalidations == 1 and b.invalidations == 2
+        await a.stop()
+        await b.stop()
+
+    asyncio.run(main())
+
+
+def test_local_copy_is_isolated_from_callers():
+    async def main():
+        cache = TieredCache(None, LocalCache(10, 60))
+        await cache.set("k", {"v": [1]}, 100)
+        got = await cache.get("k")
+        got["v"].append(2)
+        return await cache.get("k")
+
+    assert asyncio.run(main()) == {"v": [1]}
+
+
+def test_lru_eviction():
+    local = LocalCache(2, 60)
+    local.set("a", b"1")
+    local.set("b", b"2")
+    assert local.get("a") == b"1"  # a가 최근 사용
+    local.set("c", b"3")
+    assert "b" not in local and "a" in local and "c" in local
+    assert local.evictions == 1
+
+
+def test_local_ttl_is_capped_by_redis_pttl():
+    async def main():
+        a, b = await _pair()
+        await a.set("short", 1, 1)
+        await a.set("long", 2, 3600)
+        await b.get("short")
+        await b.get("long")
+        now = time.monotonic()
+        remaining = {k: b.local._data[k][0] - now for k in ("short", "long")}
+        await a.stop()
+        await b.stop()
+        return remaining
+
+    remaining = asyncio.run(main())
+    assert 0 < remaining["short"] <= 1.0  # Redis에 남은 TTL
+    assert 59 < remaining["long"] <= 60  # 로컬 최대 보관 시간
+
+
+def test_expired_local_entries_are_dropped():
+    local = LocalCache(10, 0.05)
+    local.set("k", b"v")
+    time.sleep(0.06)
+    assert "k" not in local
+    assert local.get("k") is None
+
+
+def test_local_only_without_client():
+    async def main():
+        cache = TieredCache(None, LocalCache(10, 60))
+        cache.start()  # 클라이언트가 없으면 리스너도 없음
+        assert await cache.set("k", [1, 2], 100)
+        assert await cache.get("k") == [1, 2]
+        assert await cache.exists("k")
+        assert await cache.delete("k")
+        assert await cache.get("k") is None and not await cache.exists("k")
+        await cache.stop()
+        return cache.stats()
+
+    stats = asyncio.run(main())
+    assert stats["redis"]["connected"] is False
+    assert (stats["local"]["hits"], stats["local"]["misses"]) == (1, 1)
+
+
+def test_exists_does_not_touch_hit_counters():
+    async def main():
+        a, b = await _pair()
+        await a.set("k", 1, 100)
+        before = a.local.stats()
+        assert await a.exists("k") and not await a.exists("missing")
+        after = a.local.stats()
+        await a.stop()
+        await b.stop()
+        return before, after
+
+    before, after = asyncio.run(main())
+    assert before == after
+
+
+def test_invalidation_during_redis_read_skips_local_fill():
+    async def main():
+        a, b = await _pair()
+        await a.set("k", "old", 100)
+        pipeline = b.client.pipeline
+
+        class RacingPipeline:
+            """GET이 이전 값을 읽은 뒤, 결과가 돌아오기 전에 다른 워커의 SET+무효화가 도착"""
+            def __init__(self, *args, **kw):
+                self.pipe = pipeline(*args, **kw)
+
+            async def __aenter__(self):
+                await self.pipe.__aenter__()
+                return self
+
+            async def __aexit__(self, *exc):
+                return await self.pipe.__aexit__(*exc)
+
+            def __getattr__(self, name):
+                return getattr(self.pipe, name)
+
+            async def execute(self):
+                result = await self.pipe.execute()
+                await a.set("k", "new", 100)
+                await _settle()
+                return result
+
+        b.client.pipeline = RacingPipeline
+        assert await b.get("k") == "old"  # 이 요청은 조회 시점의 값을 받지만
+        assert "k" not in b.local  # 오래된 값을 로컬에 남기지 않는다
+        b.client.pipeline = pipeline
+        assert await b.get("k") == "new"
+        await a.stop()
+        await b.stop()
+
+    asyncio.run(main())
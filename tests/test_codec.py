@@ -0,0 +1,112 @@
+import asyncio
+import json
+import math
+import struct
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+
+pytest.importorskip("msgpack")
+
+from api.codec import MAGIC, CODECS, CacheSerializer, JSONCodec, MsgpackCodec
+
+KST = timezone(timedelta(hours=9))
+VALUES = {
+    "naive": datetime(2024, 6, 1, 9, 30, 15, 123456),
+    "aware": datetime(2024, 6, 1, 9, 0, 0, 1, tzinfo=KST),
+    "negative_offset": datetime(2024, 1, 1, tzinfo=timezone(timedelta(hours=-3, minutes=-30))),
+    "pre_epoch": datetime(1969, 12, 31, 23, 59, 59, 999999),
+    "ancient": datetime(1, 1, 1),
+    "date": date(1900, 2, 28),
+    "floats": [0.1 + 0.2, 1e-308, 5e-324, 1.7976931348623157e308, -0.0, 1 / 3],
+    "nested": {"a": [1, {"b": None, "c": True}], "한글": "값"},
+}
+
+
+def _bits(x: float) -> bytes:
+    return struct.pack(">d", x)
+
+
+def test_msgpack_round_trips_exactly():
+    codec = MsgpackCodec()
+    out = codec.loads(codec.dumps(VALUES))
+    assert out == VALUES
+    for k in ("naive", "aware", "negative_offset", "pre_epoch", "ancient", "date"):
+        assert type(out[k]) is type(VALUES[k])
+    assert out["aware"].utcoffset() == timedelta(hours=9)
+    assert out["negative_offset"].utcoffset() == timedelta(hours=-3, minutes=-30)
+    assert [_bits(x) for x in out["floats"]] == [_bits(x) for x in VALUES["floats"]]
+    assert math.copysign(1, out["floats"][4]) == -1
+
+
+def test_compression_flag_above_threshold():
+    ser = CacheSerializer(MsgpackCodec(), compress_threshold=256)
+    small, large = {"x": 1}, {"rows": [{"store": f"{i:010d}", "score": 0.25} for i in range(200)]}
+    raw_small, raw_large = ser.encode(small), ser.encode(large)
+    assert raw_small[:2] == bytes([MAGIC, MsgpackCodec.codec_id << 1])
+    assert raw_large[:2] == bytes([MAGIC, MsgpackCodec.codec_id << 1 | 1])
+    assert len(raw_large) < len(MsgpackCodec().dumps(large))
+    assert ser.decode(raw_small) == small and ser.decode(raw_large) == large
+    assert CacheSerializer(MsgpackCodec(), compress_threshold=0).encode(large)[1] & 1 == 0
+
+
+def test_reads_legacy_headerless_json():
+    ser = CacheSerializer(MsgpackCodec())
+    legacy = {"p_final": 0.31, "timestamp": "2024-06-01 09:30:15", "list": [1, 2]}
+    assert ser.decode(json.dumps(legacy).encode()) == legacy
+    assert ser.decode(json.dumps(legacy)) == legacy
+    assert ser.decode(json.dumps([1, 2]).encode()) == [1, 2]
+    assert ser.decode(b'"text"') == "text"
+
+
+def test_json_and_msgpack_serializers_read_each_other():
+    as_json = CacheSerializer(JSONCodec(), compress_threshold=16)
+    as_msgpack = CacheSerializer(MsgpackCodec(), compress_threshold=16)
+    value = {"ts": VALUES["naive"], "f": 0.1 + 0.2, "rows": list(range(50))}
+    assert as_json.decode(as_msgpack.encode(value)) == value  # msgpack으로 쓴 값은 정확히
+    assert as_msgpack.decode(as_json.encode(value)) == {**value, "ts": str(value["ts"])}
+
+
+def test_codec_ids_must_fit_and_not_collide(monkeypatch):
+    class Wide(JSONCodec):
+        name, codec_id = "wide", 0x80
+
+    class Clash(JSONCodec):
+        name, codec_id = "clash", MsgpackCodec.codec_id
+
+    class Third(JSONCodec):
+        name, codec_id = "third", 2
+
+    with pytest.raises(ValueError, match="outside"):
+        CacheSerializer(Wide())
+    with pytest.raises(ValueError, match="share id"):
+        CacheSerializer(Clash())
+
+    # 세 번째 코덱 (헤더가 0x20 이상이 되는 ID)도 다른 직렬화기가 JSON으로 오인하지 않음
+    monkeypatch.setitem(CODECS, "third", Third)
+    raw = CacheSerializer(Third()).encode({"x": 1})
+    assert CacheSerializer(MsgpackCodec()).decode(raw) == {"x": 1}
+    monkeypatch.delitem(CODECS, "third")
+    with pytest.raises(ValueError, match="unknown cache codec id 2"):
+        CacheSerializer(MsgpackCodec()).decode(raw)
+
+
+def test_tiered_cache_round_trip_on_raw_bytes_redis():
+    fakeredis = pytest.importorskip("fakeredis")
+    from api.cache import LocalCache, TieredCache
+
+    async def main():
+        client = fakeredis.FakeAsyncRedis(decode_responses=False)
+        writer = TieredCache(client, LocalCache(10, 60), serializer=CacheSerializer(MsgpackCodec(), 64))
+        reader = TieredCache(client, LocalCache(10, 60), serializer=CacheSerializer(JSONCodec()))
+        await writer.set("k", VALUES, 100)
+        raw = await client.get("k")
+        await client.set("legacy", json.dumps({"v": 1}))
+        await client.set("garbage", bytes([MAGIC, 0x7E]) + b"??")
+        return raw, await reader.get("k"), await reader.get("legacy"), await reader.get("garbage"), reader
+
+    raw, got, legacy, garbage, reader = asyncio.run(main())
+    assert isinstance(raw, bytes) and raw[0] == MAGIC
+    assert got == VALUES
+    assert legacy == {"v": 1}
+    assert garbage is None and reader.redis_errors == 1  # 읽을 수 없는 값은 캐시 실패
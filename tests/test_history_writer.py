@@ -0,0 +1,54 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip("sqlalchemy")
+pytest.importorskip("aiosqlite")
+
+from api.database import HistoryWriter
+
+
+class RecordingWriter(HistoryWriter):
+    def __init__(self, **kw):
+        super().__init__(**kw)
+        self.rows = []
+
+    async def _write(self, rows):
+        await asyncio.sleep(0.001)
+        self.rows.extend(rows)
+        self.written += len(rows)
+
+
+def test_stop_writes_rows_submitted_behind_the_stop_sentinel():
+    async def main():
+        w = RecordingWriter(batch_rows=2, flush_ms=1000, max_queue=2)
+        w.start()
+        # 큐(2칸)가 가득 찬 채로 종료를 시작하고, 그 뒤에 온 submit은 _STOP 뒤에 줄을 선다
+        submits = [asyncio.create_task(w.submit({"id": str(i)})) for i in range(10)]
+        await asyncio.sleep(0)
+        stop = asyncio.create_task(w.stop())
+        await asyncio.sleep(0)
+        submits += [asyncio.create_task(w.submit({"id": str(i)})) for i in range(10, 20)]
+        await stop
+        await asyncio.wait_for(asyncio.gather(*submits), 1)
+        return w
+
+    w = asyncio.run(main())
+    assert sorted(int(r["id"]) for r in w.rows) == list(range(20))
+
+
+def test_created_at_is_the_submit_time():
+    async def main():
+        w = RecordingWriter(batch_rows=100, flush_ms=50)
+        w.start()
+        before = datetime.utcnow()
+        await w.submit({"id": "a"})
+        await asyncio.sleep(0.1)
+        await w.stop()
+        return w, before
+
+    w, before = asyncio.run(main())
+    (row,) = w.rows
+    # 배치는 flush_ms(50ms) 뒤에 저장되지만 created_at은 submit 시각
+    assert 0 <= (row["created_at"] - before).total_seconds() < 0.04
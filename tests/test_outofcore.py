@@ -0,0 +1,22 @@
+import pandas as pd
+
+from ingest import detect_encoding
+from outofcore import partition_csv, _read_shard
+
+
+def test_partition_csv_retries_encoding_past_the_sniffed_head(tmp_path):
+    n = 5000
+    df = pd.DataFrame({"ENCODED_MCT": [f"M{i % 97:03d}" for i in range(n)], "TA_YM": "202401",
+                       "MCT_NM": ["store"] * (n - 1) + ["한식당"]})
+    path = tmp_path / "ds1.csv"
+    df.to_csv(path, index=False, encoding="cp949")
+    assert detect_encoding(str(path)) == "utf-8"  # 첫 비ASCII 바이트가 감지 샘플(64 KiB) 밖
+
+    out = tmp_path / "shards"
+    rows = partition_csv(str(path), str(out), n_shards=4, chunksize=500)
+
+    assert rows == n
+    parts = [_read_shard(str(out), k) for k in range(4)]
+    back = pd.concat([p for p in parts if p is not None], ignore_index=True)
+    assert len(back) == n
+    assert (back["MCT_NM"] == "한식당").sum() == 1
@@ -0,0 +1,50 @@
+import asyncio
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("pydantic_settings")
+
+from api import peer_index
+from api.loader import RiskTable
+from api.peer_index import PeerIndex
+from api.service.analysis import get_benchmark
+
+
+@pytest.fixture
+def index(monkeypatch):
+    months = pd.to_datetime(["2024-05-01", "2024-06-01"])
+    risk = pd.DataFrame({
+        "ENCODED_MCT": np.repeat(["A", "B", "C"], 2),
+        "TA_YM": np.tile(months, 3),
+        "p_final": [0.1, 0.2, 0.3, 0.4, 0.5, 0.6],
+        # 한식/성동구의 Sales_Risk는 전부 결측
+        "Sales_Risk": [np.nan, np.nan, np.nan, np.nan, 0.7, 0.8],
+    })
+    info = pd.DataFrame({"ENCODED_MCT": ["A", "B", "C"],
+                         "HPSN_MCT_ZCD_NM": ["한식", "한식", "카페"],
+                         "MCT_SIGUNGU_NM": ["성동구", "성동구", "마포구"]})
+    index = PeerIndex(RiskTable.from_frame(risk), info)
+    monkeypatch.setattr(peer_index, "get_peer_index", lambda: index)
+    return index
+
+
+def test_summary_of_group_without_values_has_no_nan(index):
+    g, _ = index.group("한식", "성동구")
+    assert index.summary("Sales_Risk", g) == {"mean": None, "count": 0, "p25": None, "median": None, "p75": None}
+    assert index.summary("p_final", g)["count"] == 2
+
+
+def test_benchmark_empty_metric_group_is_lookup_error(index):
+    with pytest.raises(LookupError):
+        asyncio.run(get_benchmark("한식", "성동구", "Sales_Risk"))
+    out = asyncio.run(get_benchmark("한식", "성동구", "p_final", value=0.35, target_month="2024-05"))
+    assert out["sample_size"] == 2 and out["industry_percentile"] == 100.0
+
+
+@pytest.mark.parametrize("kwargs", [{"target_month": "2024-13"}, {"target_month": "June"},
+                                    {"value": float("nan")}])
+def test_benchmark_rejects_malformed_input(index, kwargs):
+    with pytest.raises(ValueError):
+        asyncio.run(get_benchmark("한식", "성동구", "p_final", **kwargs))
@@ -0,0 +1,37 @@
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import make_datasets, make_preds
+from pipeline import run_pipeline, _chunks_for_budget
+from tracing import Trace
+
+
+@pytest.fixture(scope="module")
+def panel():
+    ds1, ds2, ds3 = make_datasets(n_merchants=200, n_months=12, seed=0)
+    return ds1, ds2, ds3, make_preds(ds2)
+
+
+@pytest.fixture(scope="module")
+def serial(panel):
+    ds1, ds2, ds3, preds = panel
+    return run_pipeline(ds1, ds2, ds3, preds)
+
+
+def test_memory_budget_with_workers_shards_for_the_budget(panel, serial):
+    ds1, ds2, ds3, preds = panel
+    budget = 0.5
+    n_chunks = _chunks_for_budget(ds1, ds2, ds3, budget)
+    assert n_chunks > 2
+    trace = Trace()
+    out = run_pipeline(ds1, ds2, ds3, preds, workers=2, memory_budget_mb=budget, trace=trace)
+    shards = next(r for r in trace.records if r.name == "shards")
+    assert shards.info["shards"] == n_chunks * 2
+    pd.testing.assert_frame_equal(out, serial)
+
+
+@pytest.mark.parametrize("kwargs", [{"workers": 2}, {"memory_budget_mb": 1024}])
+def test_cache_dir_rejects_sharded_runs(panel, tmp_path, kwargs):
+    ds1, ds2, ds3, preds = panel
+    with pytest.raises(ValueError, match="cache_dir"):
+        run_pipeline(ds1, ds2, ds3, preds, cache_dir=str(tmp_path), **kwargs)
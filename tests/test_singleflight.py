@@ -0,0 +1,88 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("redis")
+
+from api.cache import SingleFlight, make_cache_key
+
+
+def test_cache_key_is_canonical():
+    base = make_cache_key("quickscore", {"sales_1m": 1, "delivery_share": -0.0, "region_code": "성동구"})
+    assert make_cache_key("quickscore", {"region_code": "성동구", "delivery_share": 0.0, "sales_1m": 1.0}) == base
+    assert make_cache_key("quickscore", {"sales_1m": 1.0, "delivery_share": 0, "region_code": "성동구",
+                                         "store_id": None}) == base
+    assert make_cache_key("quickscore", {"sales_1m": 1.5, "delivery_share": 0, "region_code": "성동구"}) != base
+    assert make_cache_key("other", {"sales_1m": 1, "delivery_share": 0, "region_code": "성동구"}) != base
+
+
+class Work:
+    def __init__(self, result="ok", error=None, delay=0.02):
+        self.calls = 0
+        self.result, self.error, self.delay = result, error, delay
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+def test_concurrent_calls_run_once():
+    async def main():
+        flights, work = SingleFlight(), Work()
+        out = await asyncio.gather(*(flights.do("k", work) for _ in range(10)))
+        return flights, work, out
+
+    flights, work, out = asyncio.run(main())
+    assert work.calls == 1
+    assert [v for v, _ in out] == ["ok"] * 10
+    assert sum(leader for _, leader in out) == 1
+    assert (flights.leaders, flights.coalesced) == (1, 9)
+    assert not flights._flights
+
+
+def test_exception_reaches_every_waiter():
+    async def main():
+        flights, work = SingleFlight(), Work(error=RuntimeError("boom"))
+        out = await asyncio.gather(*(flights.do("k", work) for _ in range(5)), return_exceptions=True)
+        return work, out
+
+    work, out = asyncio.run(main())
+    assert work.calls == 1
+    assert all(isinstance(e, RuntimeError) and str(e) == "boom" for e in out)
+
+
+def test_cancelled_leader_hands_over_to_one_waiter():
+    async def main():
+        flights, work = SingleFlight(), Work()
+        leader = asyncio.create_task(flights.do("k", work))
+        await asyncio.sleep(0)
+        waiters = [asyncio.create_task(flights.do("k", work)) for _ in range(5)]
+        await asyncio.sleep(0)
+        leader.cancel()
+        out = await asyncio.gather(*waiters)
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return work, out
+
+    work, out = asyncio.run(main())
+    assert work.calls == 2  # 취소된 leader + 이어받은 대기자 하나
+    assert [v for v, _ in out] == ["ok"] * 5
+    assert sum(leader for _, leader in out) == 1
+
+
+def test_cancelled_waiter_does_not_cancel_the_flight():
+    async def main():
+        flights, work = SingleFlight(), Work()
+        leader = asyncio.create_task(flights.do("k", work))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(flights.do("k", work))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        return work, await leader, waiter
+
+    work, (value, is_leader), waiter = asyncio.run(main())
+    assert (work.calls, value, is_leader) == (1, "ok", True)
+    assert waiter.cancelled()
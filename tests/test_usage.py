@@ -0,0 +1,81 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+pytest.importorskip("sqlalchemy")
+pytest.importorskip("aiosqlite")
+
+from api import database
+from api.database import init_db, get_api_usage_stats
+from api.usage import UsageRecorder, UNMATCHED_ENDPOINT
+
+ENDPOINT = "/api/v1/predict/quickscore"
+
+
+async def _stats(**kw):
+    async with database.AsyncSessionLocal() as db:
+        return await get_api_usage_stats(db, **kw)
+
+
+def test_record_flush_and_read_back_rollups():
+    latencies = np.random.default_rng(0).lognormal(np.log(0.05), 0.5, 2000)
+    t0 = datetime.utcnow().replace(second=0, microsecond=0) - timedelta(minutes=10)
+
+    async def main():
+        await init_db()
+        rec = UsageRecorder()
+        for i, s in enumerate(latencies):
+            rec.record("Development Key", ENDPOINT, 500 if i % 100 == 0 else 200, float(s),
+                       now=t0 + timedelta(seconds=i % 180))
+        rec.record(None, "/api/v1/health", 200, 0.002)  # 진행 중인 분: 이번 flush 대상 아님
+        written = await rec.flush()
+        stats = await _stats(api_key="Development Key")
+        before_stop = await _stats()
+        await rec.stop()
+        return written, stats, before_stop, await _stats()
+
+    written, stats, before_stop, after_stop = asyncio.run(main())
+    assert written == 3  # 3개의 분 버킷
+    (s,) = stats
+    assert s["endpoint"] == ENDPOINT and s["count"] == len(latencies)
+    assert s["status_counts"] == {"200": 1980, "500": 20}
+    assert s["avg_response_time"] == pytest.approx(latencies.mean())
+    for q in (50, 95, 99):
+        assert s[f"p{q}"] == pytest.approx(np.percentile(latencies, q), rel=0.1)
+    assert [r["endpoint"] for r in before_stop] == [ENDPOINT]
+    assert [r["endpoint"] for r in after_stop] == ["/api/v1/health", ENDPOINT]
+
+
+def test_failed_flush_keeps_buckets(monkeypatch):
+    def broken_session():
+        raise RuntimeError("db down")
+
+    monkeypatch.setattr(database, "AsyncSessionLocal", broken_session)
+    rec = UsageRecorder()
+    rec.record(None, UNMATCHED_ENDPOINT, 404, 0.001, now=datetime(2024, 1, 1, 0, 0))
+    assert asyncio.run(rec.flush()) == 0
+    assert len(rec._buckets) == 1
+
+
+def test_unmatched_routes_share_one_bucket(monkeypatch):
+    pytest.importorskip("httpx")
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from api import middleware
+
+    rec = UsageRecorder()
+    monkeypatch.setattr(middleware, "usage_recorder", rec)
+    app = FastAPI()
+    app.add_middleware(middleware.TimingMiddleware)
+
+    @app.get("/items/{item_id}")
+    async def item(item_id: int):
+        return {"id": item_id}
+
+    client = TestClient(app)
+    for path in ("/items/1", "/items/2", "/wp-login.php", "/.env", "/admin/../etc/passwd"):
+        client.get(path)
+    endpoints = {key[1]: b.count for key, b in rec._buckets.items()}
+    assert endpoints == {"/items/{item_id}": 2, UNMATCHED_ENDPOINT: 3}
@@ -0,0 +1,25 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils import block_positions, block_roll_median
+
+
+@pytest.mark.parametrize("window,min_periods", [(6, 3), (12, 1), (5, 5)])
+def test_block_roll_median_matches_pandas_with_nan_and_inf(window, min_periods):
+    rng = np.random.default_rng(0)
+    x = rng.normal(size=5000)
+    x[rng.random(5000) < 0.1] = np.nan
+    x[[100, 3000]] = np.inf
+    x[[2000, 3001]] = -np.inf
+    got = block_roll_median(x, np.arange(len(x)), window, min_periods)
+    ref = pd.Series(x).rolling(window, min_periods=min_periods).median().to_numpy()
+    np.testing.assert_allclose(got, ref, equal_nan=True)
+
+
+def test_block_roll_median_restarts_per_block():
+    keys = np.repeat(["a", "b", "c"], [7, 1, 9])
+    x = np.random.default_rng(1).normal(size=len(keys))
+    got = block_roll_median(x, block_positions(keys), 6, 3)
+    ref = pd.Series(x).groupby(keys).transform(lambda s: s.rolling(6, min_periods=3).median()).to_numpy()
+    np.testing.assert_allclose(got, ref, equal_nan=True)
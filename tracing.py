@@ -0,0 +1,92 @@
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass, field, asdict
+from typing import Optional
+from memtrack import rss_mb, rss_peak_mb, reset_rss_peak
+
+
+@dataclass
+class StageRecord:
+    name: str
+    wall_s: float = 0.0
+    cpu_s: float = 0.0
+    rows_in: Optional[int] = None
+    rows_out: Optional[int] = None
+    rss_delta_mb: float = 0.0
+    rss_peak_mb: float = 0.0
+    alloc_peak_mb: Optional[float] = None
+    info: dict = field(default_factory=dict)
+    warnings: list = field(default_factory=list)
+
+
+class Trace:
+    """Structured per-stage trace of a pipeline run.
+
+    Each ``stage()`` block records wall/CPU time, input/output rows, the RSS delta and peak
+    RSS of the block, and with ``alloc=True`` the tracemalloc peak (slow on object-heavy
+    frames). Blocks opened with ``merge=True`` warn when they return more rows than they were
+    given (duplicate join keys). ``echo=True`` prints one line per finished stage.
+    """
+
+    def __init__(self, alloc: bool = False, echo: bool = False):
+        self.alloc = alloc
+        self.echo = echo
+        self.records = []
+
+    @contextmanager
+    def stage(self, name: str, rows_in: Optional[int] = None, merge: bool = False):
+        rec = StageRecord(name, rows_in=rows_in)
+        own_tm = False
+        if self.alloc:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                own_tm = True
+            tracemalloc.reset_peak()
+        reset_rss_peak()
+        rss0 = rss_mb()
+        w0, c0 = time.perf_counter(), time.process_time()
+        try:
+            yield rec
+        finally:
+            rec.wall_s = time.perf_counter() - w0
+            rec.cpu_s = time.process_time() - c0
+            rec.rss_delta_mb = rss_mb() - rss0
+            rec.rss_peak_mb = rss_peak_mb()
+            if self.alloc:
+                rec.alloc_peak_mb = tracemalloc.get_traced_memory()[1] / 2 ** 20
+                if own_tm:
+                    tracemalloc.stop()
+            if merge and rec.rows_in is not None and rec.rows_out is not None and rec.rows_out > rec.rows_in:
+                rec.warnings.append(f"row explosion: {rec.rows_in:,} -> {rec.rows_out:,} rows (duplicate join keys?)")
+            self.records.append(rec)
+            if self.echo:
+                print(self.line(rec))
+            for w in rec.warnings:
+                print(f"[warn] {name}: {w}")
+
+    def peaks(self) -> dict:
+        """stage -> peak RSS (MB), the maximum over repeated stages (e.g. chunks)."""
+        out = {}
+        for r in self.records:
+            out[r.name] = max(out.get(r.name, 0.0), r.rss_peak_mb)
+        return out
+
+    @staticmethod
+    def line(r: StageRecord) -> str:
+        rows = ""
+        if r.rows_out is not None:
+            rows = f" rows {'?' if r.rows_in is None else format(r.rows_in, ',')}->{r.rows_out:,}"
+        info = "".join(f" {k}={v}" for k, v in r.info.items())
+        return (f"[trace] {r.name:<10} wall {r.wall_s:7.3f}s cpu {r.cpu_s:7.3f}s{rows} "
+                f"rss {r.rss_delta_mb:+.0f}MB peak {r.rss_peak_mb:.0f}MB{info}")
+
+    def to_dict(self) -> dict:
+        return {"stages": [asdict(r) for r in self.records],
+                "total_wall_s": sum(r.wall_s for r in self.records),
+                "total_cpu_s": sum(r.cpu_s for r in self.records)}
+
+    def save_json(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
@@ -11,14 +11,6 @@ Creates:
 import os, argparse, warnings, numpy as np, pandas as pd
 warnings.filterwarnings("ignore")
 
-def read_csv_smart(path):
-    for enc in ["utf-8", "cp949", "euc-kr", "latin1"]:
-        try:
-            return pd.read_csv(path, encoding=enc)
-        except Exception:
-            pass
-    raise RuntimeError(f"CSV 인코딩 해석 실패: {path}")
-
 def to_month(s):
     dt = pd.to_datetime(s.astype(str), errors="coerce")
     return pd.to_datetime(dt.dt.to_period("M").astype(str))
@@ -28,14 +20,17 @@ def main():
     ap.add_argument("--root", required=True)
     ap.add_argument("--k", type=int, default=3)
     ap.add_argument("--topq", type=float, default=0.10)
+    ap.add_argument("--stage-cache", default=None, help="pipeline stage cache dir (default: <root>/.cache/stages)")
     args = ap.parse_args()
 
     BASE_DIR = args.root
     DATA_DIR = os.path.join(BASE_DIR, "data")
+    STAGE_CACHE = args.stage_cache or os.path.join(BASE_DIR, ".cache", "stages")
 
     import sys
     sys.path.insert(0, BASE_DIR)
     from pipeline import run_pipeline
+    from ingest import read_table as read_csv_smart
 
     ds1 = read_csv_smart(os.path.join(DATA_DIR, "big_data_set1_f.csv"))
     ds2 = read_csv_smart(os.path.join(DATA_DIR, "ds2_monthly_usage.csv"))
@@ -69,7 +64,7 @@ def main():
             df["y_proxy"]=(sig>=2).astype(int)
             if df["y_proxy"].nunique()>=2 and df["y_proxy"].sum()>0: df["y"]=df["y_proxy"]
         if df["y"].nunique()<2:
-            out = run_pipeline(ds1, ds2, ds3, preds=None)
+            out = run_pipeline(ds1, ds2, ds3, preds=None, cache_dir=STAGE_CACHE)
             outj = out.merge(df[[KEY_MCT, KEY_YM]], on=[KEY_MCT, KEY_YM], how="right")
             pf = pd.to_numeric(outj["p_final"], errors="coerce").fillna(0)
             thr = pf.quantile(1-topq); df["y"]=(pf>=thr).astype(int)
@@ -159,10 +154,10 @@ def main():
     print("Saved preds:", preds_path)
 
     # pipeline 재실행 (타입 강제)
-    p = pd.read_csv(preds_path)
+    p = read_csv_smart(preds_path)
     p["ENCODED_MCT"]=p["ENCODED_MCT"].astype(str)
     p["TA_YM"]=to_month(p["TA_YM"]); p=p.dropna(subset=["ENCODED_MCT","TA_YM"])
-    out = run_pipeline(ds1, ds2, ds3, preds=p)
+    out = run_pipeline(ds1, ds2, ds3, preds=p, cache_dir=STAGE_CACHE)
     out_path = os.path.join(BASE_DIR, "risk_output_trained.csv")
     out.to_csv(out_path, index=False, encoding="utf-8")
     print("Saved:", out_path)
@@ -1,6 +1,7 @@
 import re
 import numpy as np
 import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
 from typing import Iterable
 from config import EPS, VERY_NEGATIVE_SV, BIN2RANK
 
@@ -40,10 +41,6 @@ def parse_bin_string(s: pd.Series) -> pd.Series:
     return m.astype(float)
 
 
-def map_bin_to_rank(s: pd.Series) -> pd.Series:
-    return parse_bin_string(s)
-
-
 def coerce_month_col(df: pd.DataFrame, ym_col: str) -> pd.DataFrame:
     df = df.copy()
     dt = pd.to_datetime(df[ym_col].astype(str), errors="coerce")
@@ -86,9 +83,28 @@ def safe_nan(x):
     return x
 
 
+_BIN_RANK_CACHE = {}
+_BIN_RANK_CACHE_MAX = 4096
+
+
 def map_bin_to_rank(s: pd.Series) -> pd.Series:
-    s = s.astype(str).str.strip()
-    return s.map(BIN2RANK).fillna(pd.to_numeric(s, errors="coerce")).astype(float)
+    """parse_bin_string, applied to each distinct label once and broadcast back through the codes.
+
+    Parsed labels are memoised for the life of the process, so repeated columns and
+    repeated pipeline runs only pay for labels they have not seen yet.
+    """
+    if pd.api.types.is_numeric_dtype(s):
+        return s.astype(float)
+    codes, uniques = pd.factorize(s)
+    keys = [str(v) for v in uniques]
+    todo = [k for k in keys if k not in _BIN_RANK_CACHE]
+    parsed = {}
+    if todo:
+        parsed = dict(zip(todo, parse_bin_string(pd.Series(todo, dtype=object)).to_numpy()))
+        if len(_BIN_RANK_CACHE) + len(parsed) <= _BIN_RANK_CACHE_MAX:
+            _BIN_RANK_CACHE.update(parsed)
+    table = np.array([parsed[k] if k in parsed else _BIN_RANK_CACHE[k] for k in keys] + [np.nan], dtype="float64")
+    return pd.Series(table[codes], index=s.index)
 
 
 def group_roll_median(x: pd.Series, window: int, min_periods: int) -> pd.Series:
@@ -101,16 +117,91 @@ def group_roll_mad(x: pd.Series, window: int, min_periods: int) -> pd.Series:
     return 1.4826 * mad
 
 
-def robust_z(x: pd.Series, window: int, min_periods: int) -> pd.Series:
-    med = group_roll_median(x, window, min_periods)
-    mad = group_roll_mad(x, window, min_periods)
-    return (x - med) / (mad + EPS)
+def robust_z(x: pd.Series, window: int, min_periods: int, pos: np.ndarray = None) -> pd.Series:
+    """Rolling robust z-score; pass ``pos`` (see block_positions) to restart the window per merchant."""
+    if pos is None:
+        pos = np.arange(len(x))
+    z = block_robust_stats(x.to_numpy(dtype="float64"), pos, window, min_periods)[2]
+    return pd.Series(z, index=x.index)
 
 
 def mom(x: pd.Series) -> pd.Series:
     return x - x.shift(1)
 
 
+def block_positions(keys) -> np.ndarray:
+    """Position of each row inside its contiguous run of equal keys (keys must be sorted)."""
+    if isinstance(keys, pd.Series) and keys.dtype == "category":
+        keys = keys.cat.codes
+    keys = np.asarray(keys)
+    n = len(keys)
+    if n == 0:
+        return np.zeros(0, dtype="int64")
+    new_block = np.empty(n, dtype=bool)
+    new_block[0] = True
+    new_block[1:] = keys[1:] != keys[:-1]
+    starts = np.flatnonzero(new_block)
+    lengths = np.diff(np.append(starts, n))
+    return np.arange(n, dtype="int64") - np.repeat(starts, lengths)
+
+
+def block_mom(x, pos: np.ndarray) -> np.ndarray:
+    x = np.asarray(x, dtype="float64")
+    out = np.full_like(x, np.nan)
+    out[1:] = x[1:] - x[:-1]
+    out[pos == 0] = np.nan
+    return out
+
+
+def window_median(win: np.ndarray, min_periods: int) -> np.ndarray:
+    """Row-wise median of a (rows, window) matrix, ignoring NaN and +-inf like pandas rolling;
+    NaN where fewer than min_periods values."""
+    ok = np.isfinite(win)
+    w = np.sort(np.where(ok, win, np.nan), axis=1)  # NaN sorts last
+    cnt = np.count_nonzero(ok, axis=1)
+    lo = np.take_along_axis(w, np.maximum(cnt - 1, 0)[:, None] // 2, axis=1)[:, 0]
+    hi = np.take_along_axis(w, np.minimum(cnt // 2, max(w.shape[1] - 1, 0))[:, None], axis=1)[:, 0]
+    return np.where(cnt >= min_periods, (lo + hi) / 2.0, np.nan)
+
+
+def block_roll_median(x, pos: np.ndarray, window: int, min_periods: int,
+                      chunk: int = 1 << 18) -> np.ndarray:
+    """Trailing rolling median that never looks across block boundaries.
+
+    Each trailing window is gathered as a strided view, masked at the block start and
+    sorted in place; chunking keeps the (rows, window) scratch matrix cache-sized.
+    """
+    x = np.asarray(x, dtype="float64")
+    n = len(x)
+    out = np.full(n, np.nan)
+    lag = np.arange(window - 1, -1, -1)
+    padded = np.concatenate([np.full(window - 1, np.nan), x])
+    for lo in range(0, n, chunk):
+        hi = min(n, lo + chunk)
+        win = sliding_window_view(padded[lo:hi + window - 1], window)
+        win = np.where(lag[None, :] <= pos[lo:hi, None], win, np.nan)
+        out[lo:hi] = window_median(win, min_periods)
+    return out
+
+
+def block_robust_stats(x, pos: np.ndarray, window: int, min_periods: int):
+    """Rolling median, scaled MAD and robust z-score over merchant blocks, in one call."""
+    x = np.asarray(x, dtype="float64")
+    med = block_roll_median(x, pos, window, min_periods)
+    mad = 1.4826 * block_roll_median(np.abs(x - med), pos, window, min_periods)
+    return med, mad, (x - med) / (mad + EPS)
+
+
+def block_robust_z(x, pos: np.ndarray, window: int, min_periods: int) -> np.ndarray:
+    return block_robust_stats(x, pos, window, min_periods)[2]
+
+
+def shard_of(ids, n_shards: int) -> np.ndarray:
+    """Stable merchant -> shard assignment (independent of process, run and row order)."""
+    h = pd.util.hash_array(pd.Series(ids).astype(str).to_numpy(dtype=object))
+    return (h % np.uint64(n_shards)).astype("int64")
+
+
 def hhi(weights: Iterable) -> float:
     w = np.asarray(weights, dtype="float64")
     s = w / (w.sum() + EPS)
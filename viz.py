@@ -3,15 +3,7 @@ import argparse
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
-
-
-def read_csv_smart(path):
-    for enc in ["utf-8", "cp949", "euc-kr", "latin1"]:
-        try:
-            return pd.read_csv(path, encoding=enc)
-        except Exception:
-            pass
-    raise RuntimeError(f"CSV 인코딩 해석 실패: {path}")
+from ingest import read_table as read_csv_smart
 
 
 def ensure_dir(d):